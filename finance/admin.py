@@ -5,6 +5,7 @@ from django.contrib import admin
 from django.db import models  # Import models to use Q and Sum
 from django.utils.html import format_html  # For better display formatting
 from .models import Period, Cycle, FinancialRecord, Category
+from .streaming import csv_response, iter_financial_records_csv
 from django.urls import path
 from django.shortcuts import render
 from django.db.models import Sum, Q
@@ -38,6 +39,11 @@ class FinancialRecordAdmin(admin.ModelAdmin):
     list_filter = ("type_choice", "cycle", "category")
     search_fields = ("category__name", "cycle__name")
     autocomplete_fields = ("category", "cycle")
+    actions = ("export_as_csv",)
+
+    @admin.action(description="Export selected records as CSV")
+    def export_as_csv(self, request, queryset):
+        return csv_response(iter_financial_records_csv(queryset), "financial-records.csv")
 
 
 @admin.register(Period)
@@ -67,67 +73,27 @@ class PeriodAdmin(admin.ModelAdmin):
 
     def total_incomes(self, obj):
         """Calculate total incomes for the period."""
-        total_income = (
-            obj.cycles.aggregate(total=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice="income")))
-            .get("total")
-            or 0
-        )
-        return f"${total_income:.2f}"
+        return f"${obj.totals().total_incomes:.2f}"
 
     def total_expenses(self, obj):
         """Calculate total expenses for the period."""
-        total_expenses = (
-            obj.cycles.aggregate(total=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice="expenses")))
-            .get("total")
-            or 0
-        )
-        return f"${total_expenses:.2f}"
+        return f"${obj.totals().total_expenses:.2f}"
 
     def net_income(self, obj):
         """Calculate net income for the period."""
-        total_income = (
-            obj.cycles.aggregate(total=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice="income")))
-            .get("total")
-            or 0
-        )
-        total_expenses = (
-            obj.cycles.aggregate(total=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice="expenses")))
-            .get("total")
-            or 0
-        )
-        return f"${total_income - total_expenses:.2f}"
+        return f"${obj.totals().net_income:.2f}"
 
     def planned_total_incomes(self, obj):
         """Calculate planned incomes for the period."""
-        planned_total_income = (
-            obj.cycles.aggregate(total=Sum("financial_records__planned_amount", filter=Q(financial_records__type_choice="income")))
-            .get("total")
-            or 0
-        )
-        return f"${planned_total_income:.2f}"
+        return f"${obj.totals().planned_total_incomes:.2f}"
 
     def planned_total_expenses(self, obj):
         """Calculate planned expenses for the period."""
-        planned_total_expenses = (
-            obj.cycles.aggregate(total=Sum("financial_records__planned_amount", filter=Q(financial_records__type_choice="expenses")))
-            .get("total")
-            or 0
-        )
-        return f"${planned_total_expenses:.2f}"
+        return f"${obj.totals().planned_total_expenses:.2f}"
 
     def planned_net_income(self, obj):
         """Calculate planned net income for the period."""
-        planned_total_income = (
-            obj.cycles.aggregate(total=Sum("financial_records__planned_amount", filter=Q(financial_records__type_choice="income")))
-            .get("total")
-            or 0
-        )
-        planned_total_expenses = (
-            obj.cycles.aggregate(total=Sum("financial_records__planned_amount", filter=Q(financial_records__type_choice="expenses")))
-            .get("total")
-            or 0
-        )
-        return f"${planned_total_income - planned_total_expenses:.2f}"
+        return f"${obj.totals().planned_net_income:.2f}"
 
     total_incomes.short_description = "Total Incomes"
     total_expenses.short_description = "Total Expenses"
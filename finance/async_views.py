@@ -0,0 +1,153 @@
+"""
+Async variants of the read-heavy endpoints, for serving through gradiafinance.asgi.
+
+Independent sections run concurrently, each on its own worker thread and database
+connection, so a report takes about as long as its slowest section instead of the sum of all
+of them. Responses match their synchronous counterparts, including ETag handling.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import connection
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import FirebaseAuthentication
+from .cache import acached_summary
+from .conditional import data_version_etag, data_version_last_modified
+from .models import Cycle, FinancialSummary, Period
+from .reports import REPORT_SECTIONS
+from .serializers import CycleSerializer, PeriodSummarySerializer
+from .views import CycleViewSet
+
+
+def _json(data, status=200):
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+async def _authenticate(request):
+    """Authenticate like the DRF views do; returns (user, None) or (None, error response)."""
+    try:
+        result = await sync_to_async(FirebaseAuthentication().authenticate)(request)
+    except AuthenticationFailed as exc:
+        return None, _json({"detail": str(exc.detail)}, status=403)
+    if result is None:
+        return None, _json({"detail": "Authentication credentials were not provided."}, status=403)
+    request.user = result[0]
+    return result[0], None
+
+
+async def _conditional(request, view):
+    """Answer with 304 when the client's ETag matches, otherwise run `view` and tag its response."""
+    etag, last_modified = await sync_to_async(
+        lambda: (data_version_etag(request), data_version_last_modified(request))
+    )()
+    if last_modified is not None:
+        last_modified = int(last_modified.timestamp())
+    response = get_conditional_response(request, etag=f'"{etag}"', last_modified=last_modified)
+    if response is None:
+        response = await view()
+        response.headers.setdefault("ETag", f'"{etag}"')
+        if last_modified is not None:
+            response.headers.setdefault("Last-Modified", http_date(last_modified))
+    return response
+
+
+async def _in_own_thread(func, *args):
+    """Run a blocking ORM function on a separate thread, closing that thread's connection after."""
+    def run():
+        try:
+            return func(*args)
+        finally:
+            connection.close()
+
+    return await sync_to_async(run, thread_sensitive=False)()
+
+
+@require_GET
+async def report_data(request):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+
+    async def build():
+        sections = await asyncio.gather(*(
+            _in_own_thread(lambda rows=rows: list(rows(user))) for rows in REPORT_SECTIONS.values()
+        ))
+        return dict(zip(REPORT_SECTIONS, sections))
+
+    async def view():
+        return _json(await acached_summary(user.pk, "report", "all", build))
+
+    return await _conditional(request, view)
+
+
+@require_GET
+async def period_summary(request, period_id):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+
+    async def build():
+        try:
+            period = await Period.objects.aget(id=period_id, user=user)
+        except Period.DoesNotExist:
+            raise Http404
+        totals = await sync_to_async(FinancialSummary.objects.period_totals)(period)
+        return {
+            "period": period.title,
+            "total_incomes": totals.total_incomes,
+            "total_expenses": totals.total_expenses,
+            "net_income": totals.net_income,
+            "planned_total_incomes": totals.planned_total_incomes,
+            "planned_total_expenses": totals.planned_total_expenses,
+            "planned_net_income": totals.planned_net_income,
+        }
+
+    async def view():
+        try:
+            data = await acached_summary(user.pk, "period-summary", period_id, build)
+        except Http404:
+            return _json({"error": "Period not found."}, status=404)
+        serializer = PeriodSummarySerializer(data=data)
+        serializer.is_valid(raise_exception=True)
+        return _json(serializer.data)
+
+    return await _conditional(request, view)
+
+
+@require_GET
+async def cycle_list(request):
+    user, error = await _authenticate(request)
+    if error:
+        return error
+
+    def serialize():
+        # Narrowed by ?fields= / ?omit= and filtered by ?period= like CycleViewSet.list()
+        api_request = Request(request)
+        api_request.user = user
+        context = {"request": api_request}
+        fields = CycleSerializer(context=context)
+        cycles = Cycle.objects.filter(period__user=user)
+        if "period" in fields.fields:
+            cycles = cycles.select_related("period")
+        if fields.wants_totals():
+            cycles = cycles.with_totals()
+        filterset = DjangoFilterBackend().get_filterset_class(CycleViewSet, cycles)(
+            request.GET, queryset=cycles, request=api_request
+        )
+        if not filterset.is_valid():
+            return _json({name: list(messages) for name, messages in filterset.errors.items()}, status=400)
+        return _json(CycleSerializer(filterset.qs, many=True, context=context).data)
+
+    async def view():
+        # Serializers may query (e.g. totals missing from the annotations), so they run off the loop
+        return await sync_to_async(serialize)()
+
+    return await _conditional(request, view)
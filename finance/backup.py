@@ -0,0 +1,287 @@
+"""
+Per-user account backups, behind the `backup_account` / `restore_account` commands and the
+backup endpoint.
+
+A backup is a gzip-compressed NDJSON stream: a header line, then one line per row in dependency
+order (categories, periods, cycles, financial records, file metadata). Rows are read through
+`values()` projections on server-side cursors and compressed as they go, so exports never hold
+an account in memory.
+
+Restores bulk-load the rows in fixed-size chunks inside one transaction and rebuild the
+account's FinancialSummary rows once at the end. Every reference must resolve to a row of the
+same backup (or of the account), and rows clashing with another account's ids are refused, so
+a crafted backup can't reach into other accounts. Categories are bulk inserted with the codes
+they were exported with, bypassing Category.save() and its per-object validation queries.
+Periods already present in the target account (same title) and their cycles are reused, so a
+backup can be restored into a freshly signed-up account, and archived periods are frozen again.
+Records can't be added to a period already frozen in the account: the restore is refused.
+The auto_now_add timestamps (created_at, uploaded_at) are set to the restore time.
+"""
+import gzip
+import io
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .cache import bump_data_version
+from .models import (
+    ArchivedFinancialRecord, Category, Cycle, FinancialRecord, FinancialRecordFile, FinancialSummary, Period,
+    PeriodSnapshot,
+)
+
+BACKUP_FORMAT = "gradia-backup"
+BACKUP_VERSION = 1
+BACKUP_CHUNK_SIZE = 1000
+GZIP_FLUSH_SIZE = 64 * 1024
+
+# (name, model, exported columns, owner lookup), in dependency order
+BACKUP_MODELS = (
+    ("category", Category, ("id", "name", "code", "description"), "user"),
+    ("period", Period, ("id", "title", "is_archived", "created_at"), "user"),
+    ("cycle", Cycle, ("id", "period_id", "month", "name"), "period__user"),
+    ("record", FinancialRecord, (
+        "id", "cycle_id", "period_id", "category_id", "type_choice", "current_amount",
+        "planned_amount", "date", "created_at", "updated_at", "firebase_uid",
+    ), "user"),
+    ("file", FinancialRecordFile, ("id", "financial_record_id", "file_url", "uploaded_at"), "financial_record__user"),
+)
+
+
+class BackupError(ValueError):
+    """A backup that can't be restored, e.g. not a backup or from an unknown format version."""
+
+
+def iter_backup_lines(user):
+    """Yield the NDJSON lines (as bytes) of the user's backup, header first."""
+    encoder = DjangoJSONEncoder()
+    header = {"format": BACKUP_FORMAT, "version": BACKUP_VERSION, "user": user.get_username(),
+              "created_at": timezone.now()}
+    yield (encoder.encode(header) + "\n").encode()
+    for name, model, columns, owner in BACKUP_MODELS:
+        sources = [model]
+        if model is FinancialRecord:
+            # Records moved to the archive table are backed up (and restored) as regular records
+            sources.append(ArchivedFinancialRecord)
+        for source in sources:
+            rows = source.objects.filter(**{owner: user}).order_by().values_list(*columns)
+            for row in rows.iterator(chunk_size=BACKUP_CHUNK_SIZE):
+                line = {"model": name, "fields": dict(zip(columns, row))}
+                yield (encoder.encode(line) + "\n").encode()
+
+
+def gzip_stream(chunks):
+    """Compress an iterable of bytes on the fly, yielding compressed blocks of about GZIP_FLUSH_SIZE."""
+    buffer = io.BytesIO()
+    with gzip.GzipFile(fileobj=buffer, mode="wb") as archive:
+        for chunk in chunks:
+            archive.write(chunk)
+            if buffer.tell() >= GZIP_FLUSH_SIZE:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+    yield buffer.getvalue()
+
+
+def read_backup(file):
+    """Yield the decoded lines of a gzip-compressed backup read from a binary file."""
+    try:
+        for line in io.TextIOWrapper(gzip.GzipFile(fileobj=file), encoding="utf-8"):
+            if line.strip():
+                yield json.loads(line)
+    except (OSError, EOFError, ValueError) as e:
+        raise BackupError(f"Not a readable backup: {e}")
+
+
+class BackupRestore:
+    """
+    Loads backup lines into `user`'s account. With `remap_ids`, periods, cycles, records and
+    files get new UUIDs (derived from the old ones, so no id map has to be kept for records),
+    which allows restoring into the environment the backup was taken from. Category ids are
+    always reassigned by the database.
+    """
+
+    def __init__(self, user, remap_ids=False, chunk_size=BACKUP_CHUNK_SIZE):
+        self.user = user
+        self.chunk_size = chunk_size
+        self.namespace = uuid.uuid4() if remap_ids else None
+        self.counts = {name: 0 for name, *_ in BACKUP_MODELS}
+        self.categories = {}
+        self.periods = {}
+        self.cycles = {}
+        self.frozen = {}  # Titles of the account's frozen periods, by id
+        self.frozen_cycles = {}  # Titles of the frozen periods of the cycles restored into them
+
+    def new_id(self, old_id):
+        if old_id is None or self.namespace is None:
+            return old_id
+        return uuid.uuid5(self.namespace, str(old_id))
+
+    def load(self, lines):
+        """Restore every line of a backup in one transaction. Returns the rows inserted per model."""
+        lines = iter(lines)
+        header = next(lines, None)
+        if not isinstance(header, dict) or header.get("format") != BACKUP_FORMAT:
+            raise BackupError("Not a backup: the header line is missing.")
+        if header.get("version") != BACKUP_VERSION:
+            raise BackupError(f"Unsupported backup version: {header.get('version')!r}.")
+
+        loaders = {"category": self.load_categories, "period": self.load_periods, "cycle": self.load_cycles,
+                   "record": self.load_records, "file": self.load_files}
+        fields = {name: {column: model._meta.get_field(column) for column in columns}
+                  for name, model, columns, _ in BACKUP_MODELS}
+        self.frozen = dict(PeriodSnapshot.objects.filter(period__user=self.user).values_list("period_id", "period__title"))
+        with transaction.atomic():
+            pending_model, pending = None, []
+            for line in lines:
+                name = line.get("model") if isinstance(line, dict) else None
+                if name not in loaders:
+                    raise BackupError(f"Unknown model in backup: {name!r}.")
+                if name != pending_model or len(pending) >= self.chunk_size:
+                    if pending:
+                        self.run(loaders[pending_model], pending)
+                    pending_model, pending = name, []
+                pending.append(self.parse(name, line, fields[name]))
+            if pending:
+                self.run(loaders[pending_model], pending)
+            FinancialSummary.objects.rebuild_users(self.user.pk, self.user.pk)
+            # Archived periods come back frozen
+            Period.objects.filter(user=self.user, is_archived=True, snapshot__isnull=True).archive()
+            bump_data_version(self.user.pk)
+        return self.counts
+
+    @staticmethod
+    def parse(name, line, fields):
+        """Convert a line's values with its model fields, refusing missing, malformed or null values."""
+        row = {}
+        try:
+            for column, field in fields.items():
+                row[column] = field.to_python(line["fields"][column])
+                if row[column] is None and not field.null:
+                    raise ValidationError(f"{column} can't be null")
+        except (KeyError, TypeError, ValidationError) as e:
+            raise BackupError(f"Malformed {name} line in backup: {e}")
+        return row
+
+    def run(self, loader, rows):
+        try:
+            with transaction.atomic():
+                loader(rows)
+        except IntegrityError as e:
+            raise BackupError(f"The backup clashes with existing data: {e}")
+
+    @staticmethod
+    def resolve(mapping, old_id, model, row):
+        """Map a reference of a backup row to the account's row, which must come from the same backup."""
+        if old_id not in mapping:
+            raise BackupError(f"Backup row {row['id']} references a {model} that isn't in the backup: {old_id}.")
+        return mapping[old_id]
+
+    def load_categories(self, rows):
+        """Map categories onto the account's own by code or name, bulk inserting the others."""
+        existing = {}
+        for category in Category.objects.filter(user=self.user).only("id", "code", "name"):
+            existing[category.code] = category.pk
+            existing.setdefault(category.name.lower(), category.pk)
+        new, matched = [], {}
+        for row in rows:
+            match = existing.get(row["code"], existing.get(row["name"].lower()))
+            if match is None:
+                match = Category(user=self.user, name=row["name"], code=row["code"], description=row["description"])
+                existing[match.code] = existing[match.name.lower()] = match
+                new.append(match)
+            matched[row["id"]] = match
+        Category.objects.bulk_create(new)
+        for old_id, match in matched.items():
+            self.categories[old_id] = match.pk if isinstance(match, Category) else match
+        self.counts["category"] += len(new)
+
+    def load_periods(self, rows):
+        """Map periods onto the account's periods of the same title, bulk inserting the others."""
+        existing = dict(Period.objects.filter(user=self.user).values_list("title", "id"))
+        new = []
+        for row in rows:
+            period_id = existing.get(row["title"])
+            if period_id is None:
+                period_id = existing[row["title"]] = self.new_id(row["id"])
+                new.append(Period(id=period_id, user=self.user, title=row["title"], is_archived=row["is_archived"]))
+            self.periods[row["id"]] = period_id
+        Period.objects.bulk_create(new)
+        self.counts["period"] += len(new)
+
+    def load_cycles(self, rows):
+        """Map cycles onto the existing (period, month) cycles, bulk inserting the others."""
+        existing = dict(
+            ((period_id, month), cycle_id)
+            for cycle_id, period_id, month in Cycle.objects.filter(
+                period_id__in={self.resolve(self.periods, row["period_id"], "period", row) for row in rows}
+            ).values_list("id", "period_id", "month")
+        )
+        new = []
+        for row in rows:
+            period_id = self.periods[row["period_id"]]
+            cycle_id = existing.get((period_id, row["month"]))
+            if cycle_id is None:
+                cycle_id = existing[(period_id, row["month"])] = self.new_id(row["id"])
+                new.append(Cycle(id=cycle_id, period_id=period_id, month=row["month"], name=row["name"]))
+            self.cycles[row["id"]] = cycle_id
+            if period_id in self.frozen:
+                self.frozen_cycles[cycle_id] = self.frozen[period_id]
+        Cycle.objects.bulk_create(new)
+        self.counts["cycle"] += len(new)
+
+    def load_records(self, rows):
+        # The records' periods are derived from their cycles by bulk_create()
+        records = {}
+        for row in rows:
+            record_id = self.new_id(row["id"])
+            records[record_id] = FinancialRecord(
+                id=record_id,
+                user=self.user,
+                cycle_id=self.resolve(self.cycles, row["cycle_id"], "cycle", row),
+                category_id=self.resolve(self.categories, row["category_id"], "category", row),
+                type_choice=row["type_choice"],
+                current_amount=row["current_amount"],
+                planned_amount=row["planned_amount"],
+                date=row["date"],
+                firebase_uid=row["firebase_uid"],
+            )
+        # Records already restored by an earlier run (and maybe archived since) are left as they are
+        existing = {}
+        for model in (FinancialRecord, ArchivedFinancialRecord):
+            existing.update(model.objects.filter(pk__in=records).values_list("pk", "user_id"))
+        if any(owner_id != self.user.pk for owner_id in existing.values()):
+            raise BackupError("The backup's record ids belong to another account; restore it with remap_ids.")
+        new = [record for record_id, record in records.items() if record_id not in existing]
+        for record in new:
+            if record.cycle_id in self.frozen_cycles:
+                raise BackupError(
+                    f"Period {self.frozen_cycles[record.cycle_id]} is archived in this account; "
+                    f"unarchive it before restoring records into it."
+                )
+        FinancialRecord.objects.bulk_create(new)
+        self.counts["record"] += len(new)
+
+    def load_files(self, rows):
+        # Files may only be attached to the account's records, checked with one query per chunk
+        record_ids = {self.new_id(row["financial_record_id"]) for row in rows}
+        owned = set(FinancialRecord.objects.filter(user=self.user, pk__in=record_ids).values_list("pk", flat=True))
+        files = {}
+        for row in rows:
+            file_id = self.new_id(row["id"])
+            record_id = self.new_id(row["financial_record_id"])
+            if record_id not in owned:
+                raise BackupError(f"Backup row {row['id']} references a record that isn't in this account: {record_id}.")
+            files[file_id] = FinancialRecordFile(id=file_id, financial_record_id=record_id, file_url=row["file_url"])
+        existing = set(FinancialRecordFile.objects.filter(pk__in=files).values_list("pk", flat=True))
+        new = [file for file_id, file in files.items() if file_id not in existing]
+        FinancialRecordFile.objects.bulk_create(new)
+        self.counts["file"] += len(new)
+
+
+def restore_backup(user, lines, remap_ids=False, chunk_size=BACKUP_CHUNK_SIZE):
+    """Restore backup lines into `user`'s account. Returns the number of rows loaded per model."""
+    return BackupRestore(user, remap_ids=remap_ids, chunk_size=chunk_size).load(lines)
@@ -0,0 +1,36 @@
+"""Helpers for running maintenance work over id-range chunks, optionally on a worker pool."""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.db import connection
+
+
+def id_ranges(first, last, size):
+    """Split [first, last] into consecutive inclusive (start, end) ranges of at most `size` ids."""
+    start = first
+    while start <= last:
+        yield start, min(start + size - 1, last)
+        start += size
+
+
+def run_chunks(func, chunks, workers=1):
+    """
+    Call func(*chunk) for every chunk and yield (chunk, result) as each one finishes.
+
+    With more than one worker the chunks run on a thread pool; every thread uses its own
+    database connection, which is closed once its chunk is done.
+    """
+    if workers <= 1:
+        for chunk in chunks:
+            yield chunk, func(*chunk)
+        return
+
+    def run(chunk):
+        try:
+            return func(*chunk)
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(run, chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
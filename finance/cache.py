@@ -0,0 +1,166 @@
+"""
+Per-user versioned cache for summary data.
+
+Entries are keyed by (user, kind, object, data version). Any write to a user's periods, cycles,
+categories or financial records bumps that user's data version, so stale entries are never read
+again and age out through the cache's TIMEOUT and MAX_ENTRIES bounds instead of being deleted.
+
+The versions themselves live in the database (DataVersion), not in the cache: a bump made by
+one web worker or by a management command is seen by every process at once, whichever cache
+backend holds the entries.
+"""
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.utils import timezone
+
+from .models import DataVersion
+
+SUMMARY_CACHE_ALIAS = "summaries"
+
+
+def summary_cache():
+    return caches[SUMMARY_CACHE_ALIAS]
+
+
+def get_data_state(user_id):
+    """Return (data version, last modified) of the user; (0, None) until their first write."""
+    state = DataVersion.objects.filter(user_id=user_id).values_list("version", "modified_at").first()
+    return state or (0, None)
+
+
+def get_data_version(user_id):
+    """Return the user's current data version."""
+    return get_data_state(user_id)[0]
+
+
+def get_last_modified(user_id):
+    """Return when the user's data last changed, or None if it hasn't since versions were kept."""
+    return get_data_state(user_id)[1]
+
+
+def request_data_state(request):
+    """
+    `get_data_state()` of the request's user, read once per request and shared by the
+    conditional GET checks and the summary cache. None for anonymous requests.
+    """
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    if not hasattr(request, "_data_state"):
+        request._data_state = get_data_state(user.pk)
+    return request._data_state
+
+
+def bump_data_version(user_id):
+    """Invalidate every cached summary of the user once the current transaction commits."""
+    bump_data_versions([user_id])
+
+
+def bump_data_versions(users):
+    """
+    Bulk variant of `bump_data_version` for the users given as a list of ids or as a user
+    queryset, e.g. a chunk of user ids in a management command. One statement either way.
+
+    Ids bumped inside a transaction are collected and bumped together by a single on_commit
+    callback, so a delete cascading to many rows still costs one statement.
+    """
+    if isinstance(users, QuerySet):
+        transaction.on_commit(lambda: _bump(users))
+        return
+    users = set(users)
+    if not users:
+        return
+    if not connection.in_atomic_block:
+        _bump(sorted(users))
+        return
+    flush = getattr(connection, "_data_version_flush", None)
+    savepoints = set(connection.savepoint_ids)
+    # Ids join a flush registered in the same savepoint that is still pending: one registered
+    # in an outer block, dropped by a rollback or already run can't take them
+    if flush is None or flush.savepoints != savepoints or not any(
+            callback is flush for _, callback, _ in connection.run_on_commit):
+        flush = _pending_bump(savepoints)
+        connection._data_version_flush = flush
+        transaction.on_commit(flush)
+    flush.users.update(users)
+
+
+def _pending_bump(savepoints):
+    """An on_commit callback bumping the ids added to its `users` set by the end of the transaction."""
+    def flush():
+        if connection._data_version_flush is flush:
+            connection._data_version_flush = None
+        _bump(sorted(flush.users))
+
+    flush.savepoints = savepoints
+    flush.users = set()
+    return flush
+
+
+def _bump(users):
+    quote = connection.ops.quote_name
+    table = quote(DataVersion._meta.db_table)
+    if isinstance(users, QuerySet):
+        selected, params = users.order_by().values("pk").query.sql_with_params()
+    else:
+        selected, params = "SELECT unnest(%s::bigint[])", [users]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (user_id, version, modified_at) "
+            f"SELECT u.id, 1, %s FROM ({selected}) u (id) "
+            f"ON CONFLICT (user_id) DO UPDATE SET version = {table}.version + 1, modified_at = EXCLUDED.modified_at",
+            [timezone.now(), *params],
+        )
+
+
+def _entry_key(user_id, kind, key, version):
+    return f"finance:{kind}:{user_id}:{key}:{version}"
+
+
+def cached_summary(user_id, kind, key, compute, version=None):
+    """
+    Return the cached `kind` summary for `key`, computing and storing it on a miss. `version`
+    is the user's data version when the caller already has it (see `request_data_state`).
+    """
+    cache = summary_cache()
+    if version is None:
+        version = get_data_version(user_id)
+    entry_key = _entry_key(user_id, kind, key, version)
+    value = cache.get(entry_key)
+    if value is None:
+        value = compute()
+        cache.set(entry_key, value)
+    return value
+
+
+async def acached_summary(user_id, kind, key, compute):
+    """Async variant of `cached_summary`, where `compute` is a coroutine function."""
+    cache = summary_cache()
+    version = await sync_to_async(get_data_version)(user_id)
+    entry_key = _entry_key(user_id, kind, key, version)
+    value = await cache.aget(entry_key)
+    if value is None:
+        value = await compute()
+        await cache.aset(entry_key, value)
+    return value
+
+
+def cached_summaries(user_id, kind, keys, compute_missing, version=None):
+    """
+    Batch variant of `cached_summary`: returns {key: value} for every key, calling
+    `compute_missing(missing_keys)` once for the keys that aren't cached.
+    """
+    cache = summary_cache()
+    if version is None:
+        version = get_data_version(user_id)
+    entry_keys = {key: _entry_key(user_id, kind, key, version) for key in keys}
+    found = cache.get_many(list(entry_keys.values()))
+    values = {key: found[entry_key] for key, entry_key in entry_keys.items() if entry_key in found}
+    missing = [key for key in keys if key not in values]
+    if missing:
+        computed = compute_missing(missing)
+        cache.set_many({entry_keys[key]: value for key, value in computed.items()})
+        values.update(computed)
+    return values
@@ -0,0 +1,44 @@
+"""
+Conditional GET support for the summary read endpoints.
+
+ETags are derived from the requesting user's data version (see finance.cache), so they are
+computed with a single primary-key lookup instead of the aggregates; a matching If-None-Match
+short-circuits to 304 Not Modified before the view body runs.
+"""
+import hashlib
+
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+
+from .cache import request_data_state
+
+
+def _user_id(request):
+    user = getattr(request, "user", None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def data_version_etag(request, *args, **kwargs):
+    """Strong ETag for this user, data version, URL and negotiated representation."""
+    user_id = _user_id(request)
+    if user_id is None:
+        return None
+    representation = "|".join((
+        request.get_full_path(),
+        request.META.get("HTTP_ACCEPT", ""),
+    ))
+    digest = hashlib.sha256(representation.encode()).hexdigest()[:16]
+    return f"{user_id}-{request_data_state(request)[0]}-{digest}"
+
+
+def data_version_last_modified(request, *args, **kwargs):
+    user_id = _user_id(request)
+    if user_id is None:
+        return None
+    return request_data_state(request)[1]
+
+
+# Decorates a view method (e.g. `get` or `list`); runs after DRF authentication and permissions
+conditional_on_data_version = method_decorator(
+    condition(etag_func=data_version_etag, last_modified_func=data_version_last_modified)
+)
@@ -0,0 +1,284 @@
+"""
+Bank-statement import pipeline behind the record import endpoint and `import_statement`.
+
+Statements (CSV or OFX) are parsed as a stream of rows. Each row is mapped to its cycle through
+an in-memory (year, month) lookup, given a category by rules, and buffered; the buffer is written
+with one bulk_create per fixed-size chunk, so memory stays bounded whatever the file size.
+"""
+import csv
+import io
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .cache import bump_data_version
+from .models import Category, Cycle, FinancialRecord, FinancialSummary, Period, PeriodSnapshot
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+
+CENT = Decimal("0.01")
+_amount_field = FinancialRecord._meta.get_field("current_amount")
+# Amounts must fit the record's DecimalField once rounded to cents
+MAX_AMOUNT = Decimal(10) ** (_amount_field.max_digits - _amount_field.decimal_places)
+
+CSV_COLUMNS = {
+    "date": ("date", "posted", "transaction date", "booking date"),
+    "amount": ("amount", "value"),
+    "description": ("description", "memo", "payee", "name"),
+}
+OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+
+class StatementError(ValueError):
+    """A statement that can't be read at all, as opposed to a single bad row."""
+
+
+def _text(file):
+    """Read a binary upload or file as text, line by line."""
+    return io.TextIOWrapper(file, encoding="utf-8-sig", errors="replace", newline="")
+
+
+def parse_amount(text, decimal_separator="."):
+    """
+    Read an amount written with `decimal_separator` ("." or ","), where the other character may
+    only group thousands. Ambiguous or malformed amounts, such as "12,50" read with ".", raise
+    InvalidOperation instead of being misread.
+    """
+    group = "," if decimal_separator == "." else "."
+    pattern = rf"[+-]?(\d+|\d{{1,3}}({re.escape(group)}\d{{3}})+)({re.escape(decimal_separator)}\d+)?"
+    if not re.fullmatch(pattern, text):
+        raise InvalidOperation
+    return Decimal(text.replace(group, "").replace(decimal_separator, "."))
+
+
+def iter_csv_statement(file, date_format="%Y-%m-%d", decimal_separator="."):
+    """
+    Yield the rows of a CSV statement as {line, date, amount, description, date_format,
+    decimal_separator}, or as {line, error} for a row the CSV parser can't read.
+    """
+    reader = csv.reader(_text(file))
+    try:
+        header = [name.strip().lower() for name in next(reader, [])]
+    except csv.Error as e:
+        raise StatementError(f"Unreadable CSV header: {e}.")
+    columns = {}
+    for key, aliases in CSV_COLUMNS.items():
+        columns[key] = next((header.index(alias) for alias in aliases if alias in header), None)
+    if columns["date"] is None or columns["amount"] is None:
+        raise StatementError("The CSV header must have a date and an amount column.")
+
+    line = 1
+    while True:
+        line += 1
+        try:
+            values = next(reader)
+        except StopIteration:
+            break
+        except csv.Error as e:
+            yield {"line": line, "error": f"Unreadable CSV row: {e}."}
+            continue
+        if not any(values):
+            continue
+
+        def value(key):
+            index = columns[key]
+            return values[index].strip() if index is not None and index < len(values) else ""
+
+        yield {
+            "line": line,
+            "date": value("date"),
+            "amount": value("amount"),
+            "description": value("description"),
+            "date_format": date_format,
+            "decimal_separator": decimal_separator,
+        }
+
+
+def iter_ofx_statement(file):
+    """Yield the <STMTTRN> transactions of an OFX (SGML or XML) statement as CSV-like rows."""
+    transaction_tags = None
+    for line, text in enumerate(_text(file), start=1):
+        for closing, tag, value in OFX_TAG.findall(text):
+            tag = tag.upper()
+            if tag == "STMTTRN":
+                if not closing:
+                    transaction_tags = {"line": line}
+                elif transaction_tags is not None:
+                    yield {
+                        "line": transaction_tags["line"],
+                        # DTPOSTED is YYYYMMDD, optionally followed by a time and a timezone
+                        "date": transaction_tags.get("DTPOSTED", "")[:8],
+                        # OFX amounts have no thousands separator; the decimal one may be a comma
+                        "amount": transaction_tags.get("TRNAMT", ""),
+                        "description": transaction_tags.get("NAME") or transaction_tags.get("MEMO", ""),
+                        "date_format": "%Y%m%d",
+                        "decimal_separator": "," if "," in transaction_tags.get("TRNAMT", "") else ".",
+                    }
+                    transaction_tags = None
+            elif transaction_tags is not None and not closing:
+                transaction_tags[tag] = value.strip()
+
+
+def statement_format(filename):
+    """Guess a statement's format from its file name."""
+    return "ofx" if filename.lower().endswith((".ofx", ".qfx")) else "csv"
+
+
+def read_statement(file, format, date_format="%Y-%m-%d", decimal_separator="."):
+    """Stream the rows of a "csv" or "ofx" statement read from a binary file."""
+    if format == "ofx":
+        return iter_ofx_statement(file)
+    return iter_csv_statement(file, date_format, decimal_separator)
+
+
+class CategoryRules:
+    """
+    Picks a category from a row's description: the first matching rule wins, then a category
+    whose name appears in the description, then the user's DEFAULT category.
+    Rules are {"pattern": <regex, case-insensitive>, "category": <category code or name>}.
+    """
+
+    def __init__(self, user, rules=()):
+        categories = list(Category.objects.filter(user=user))
+        by_key = {}
+        for category in categories:
+            by_key[category.code.lower()] = category
+            by_key.setdefault(category.name.lower(), category)
+
+        self.rules = []
+        for rule in rules:
+            category = by_key.get(str(rule["category"]).lower())
+            if category is None:
+                raise StatementError(f"Unknown category in import rules: {rule['category']!r}.")
+            try:
+                self.rules.append((re.compile(rule["pattern"], re.IGNORECASE), category))
+            except re.error as e:
+                raise StatementError(f"Invalid pattern in import rules: {rule['pattern']!r} ({e}).")
+        self.rules += [
+            (re.compile(rf"\b{re.escape(category.name)}\b", re.IGNORECASE), category)
+            for category in categories
+            if category.code != "DEFAULT"
+        ]
+
+        self.default = next((category for category in categories if category.code == "DEFAULT"), None)
+        if self.default is None:
+            self.default, _ = Category.objects.get_or_create(
+                user=user,
+                code="DEFAULT",
+                defaults={
+                    "name": "Default",
+                    "description": "Default category for reassigned financial records.",
+                },
+            )
+
+    def match(self, description):
+        for pattern, category in self.rules:
+            if pattern.search(description):
+                return category
+        return self.default
+
+
+class CycleLookup:
+    """
+    In-memory (year, month) -> Cycle map of a user's cycles, loaded with one query. Years without
+    a period get one, with its twelve cycles, the first time a row falls in them. `frozen` holds
+    the ids of the user's archived (frozen) periods, whose records can't be written.
+    """
+
+    def __init__(self, user, create_periods=True):
+        self.user = user
+        self.create_periods = create_periods
+        self.cycles = {}
+        for cycle in Cycle.objects.filter(period__user=user).select_related("period").only(
+                "id", "month", "period__id", "period__title"):
+            if cycle.period.title.isdigit():
+                self.cycles[(int(cycle.period.title), cycle.month)] = cycle
+        self.years = {year for year, _ in self.cycles}
+        self.frozen = set(PeriodSnapshot.objects.filter(period__user=user).values_list("period_id", flat=True))
+
+    def get(self, day):
+        cycle = self.cycles.get((day.year, day.month))
+        if cycle is None and self.create_periods and day.year not in self.years:
+            self.years.add(day.year)
+            period, _ = Period.objects.get_or_create(user=self.user, title=str(day.year))
+            period.create_cycles()
+            for new_cycle in period.cycles.all():
+                self.cycles[(day.year, new_cycle.month)] = new_cycle
+            cycle = self.cycles.get((day.year, day.month))
+        return cycle
+
+
+@dataclass
+class ImportProgress:
+    rows: int = 0
+    created: int = 0
+    skipped: int = 0
+    errors: list = field(default_factory=list)
+
+    def skip(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": message})
+
+
+def import_statement(user, rows, rules=(), chunk_size=IMPORT_CHUNK_SIZE, create_periods=True, progress=None):
+    """
+    Create a financial record for every statement row, bulk inserting `chunk_size` records per
+    transaction. `progress(result)` is called after each chunk. Returns the ImportProgress.
+    """
+    categories = CategoryRules(user, rules)
+    cycles = CycleLookup(user, create_periods=create_periods)
+    result = ImportProgress()
+    pending = []
+
+    def flush():
+        with transaction.atomic():
+            FinancialRecord.objects.bulk_create(pending)
+            FinancialSummary.objects.add_records(pending)
+            bump_data_version(user.pk)
+        result.created += len(pending)
+        pending.clear()
+        if progress is not None:
+            progress(result)
+
+    for row in rows:
+        result.rows += 1
+        if "error" in row:
+            result.skip(row["line"], row["error"])
+            continue
+        try:
+            day = datetime.strptime(row["date"], row["date_format"]).date()
+            amount = parse_amount(row["amount"], row["decimal_separator"]).quantize(CENT, rounding=ROUND_HALF_UP)
+        except (ValueError, InvalidOperation):
+            result.skip(row["line"], f"Invalid date or amount: {row['date']!r}, {row['amount']!r}.")
+            continue
+        if abs(amount) >= MAX_AMOUNT:
+            result.skip(row["line"], f"Amount out of range: {row['amount']!r}.")
+            continue
+        cycle = cycles.get(day)
+        if cycle is None:
+            result.skip(row["line"], f"No cycle for {day:%Y-%m}.")
+            continue
+        if cycle.period_id in cycles.frozen:
+            # Checked here rather than left to bulk_create, which would fail the whole chunk
+            result.skip(row["line"], f"Period {day.year} is archived.")
+            continue
+
+        pending.append(FinancialRecord(
+            user=user,
+            cycle=cycle,
+            category=categories.match(row["description"]),
+            type_choice=FinancialRecord.INCOME if amount > 0 else FinancialRecord.EXPENSES,
+            current_amount=abs(amount),
+            date=day,
+        ))
+        if len(pending) >= chunk_size:
+            flush()
+
+    if pending:
+        flush()
+    return result
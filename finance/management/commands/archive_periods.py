@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from finance.batching import id_ranges, run_chunks
+from finance.cache import bump_data_versions
+from finance.models import Period
+
+
+class Command(BaseCommand):
+    help = (
+        "Freeze every archived period that has no snapshot yet (e.g. archived before snapshots "
+        "existed), one transaction per chunk of user ids. With --move-records, the records of all "
+        "frozen periods are also moved to the archive table. Safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of chunks processed in parallel.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of user ids per chunk.")
+        parser.add_argument(
+            "--move-records", action="store_true",
+            help="Move the records of frozen periods to the archive table (records with files stay).",
+        )
+
+    def handle(self, *args, **options):
+        bounds = Period.objects.filter(is_archived=True).aggregate(first=Min("user_id"), last=Max("user_id"))
+        if bounds["first"] is None:
+            self.stdout.write("No archived periods.")
+            return
+
+        chunks = list(id_ranges(bounds["first"], bounds["last"], options["chunk_size"]))
+        move_records = options["move_records"]
+
+        def freeze(first_user_id, last_user_id):
+            in_chunk = Period.objects.filter(is_archived=True, user__gte=first_user_id, user__lte=last_user_id)
+            pending = in_chunk.filter(snapshot__isnull=True) if not move_records else in_chunk
+            with transaction.atomic():
+                bump_data_versions(set(pending.values_list("user_id", flat=True)))
+                return pending.archive(move_records=move_records)
+
+        frozen = 0
+        for done, ((first, last), count) in enumerate(run_chunks(freeze, chunks, options["workers"]), start=1):
+            frozen += count
+            self.stdout.write(f"[{done}/{len(chunks)}] users {first}-{last}: {count} periods frozen")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived periods frozen ({frozen} periods frozen)."))
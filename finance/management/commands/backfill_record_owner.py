@@ -0,0 +1,41 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min, OuterRef, Subquery
+from finance.batching import id_ranges, run_chunks
+from finance.cache import bump_data_versions
+from finance.models import Category, FinancialRecord
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill FinancialRecord.user from each record's category owner, one UPDATE per chunk "
+        "of user ids. Rows that already have an owner are left alone, so it can be re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of chunks updated in parallel.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of user ids per chunk.")
+
+    def handle(self, *args, **options):
+        bounds = Category.objects.aggregate(first=Min("user_id"), last=Max("user_id"))
+        if bounds["first"] is None:
+            self.stdout.write("No financial records to backfill.")
+            return
+
+        chunks = list(id_ranges(bounds["first"], bounds["last"], options["chunk_size"]))
+        owner = Category.objects.filter(pk=OuterRef("category_id")).values("user_id")[:1]
+
+        def backfill(first_user_id, last_user_id):
+            with transaction.atomic():
+                bump_data_versions(get_user_model().objects.filter(pk__gte=first_user_id, pk__lte=last_user_id))
+                return FinancialRecord.objects.filter(
+                    user__isnull=True, category__user__gte=first_user_id, category__user__lte=last_user_id
+                ).update(user_id=Subquery(owner))
+
+        updated = 0
+        for done, ((first, last), count) in enumerate(run_chunks(backfill, chunks, options["workers"]), start=1):
+            updated += count
+            self.stdout.write(f"[{done}/{len(chunks)}] users {first}-{last}: {count} records updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Record owners backfilled ({updated} records updated)."))
@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Max, Min, OuterRef, Q, Subquery
+from finance.batching import id_ranges, run_chunks
+from finance.cache import bump_data_versions
+from finance.models import Cycle, FinancialRecord, Period
+
+
+class Command(BaseCommand):
+    help = (
+        "Set FinancialRecord.period to the period of each record's cycle where it is missing or "
+        "out of step, one UPDATE per chunk of user ids. Consistent rows are left alone, so it can be re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of chunks updated in parallel.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of user ids per chunk.")
+
+    def handle(self, *args, **options):
+        bounds = Period.objects.aggregate(first=Min("user_id"), last=Max("user_id"))
+        if bounds["first"] is None:
+            self.stdout.write("No financial records to backfill.")
+            return
+
+        chunks = list(id_ranges(bounds["first"], bounds["last"], options["chunk_size"]))
+        cycle_period = Cycle.objects.filter(pk=OuterRef("cycle_id")).values("period_id")[:1]
+        stale = Q(period__isnull=True) | ~Q(period_id=F("cycle__period_id"))
+
+        def backfill(first_user_id, last_user_id):
+            with transaction.atomic():
+                bump_data_versions(get_user_model().objects.filter(pk__gte=first_user_id, pk__lte=last_user_id))
+                return FinancialRecord.objects.filter(
+                    stale, cycle__period__user__gte=first_user_id, cycle__period__user__lte=last_user_id
+                ).update(period_id=Subquery(cycle_period))
+
+        updated = 0
+        for done, ((first, last), count) in enumerate(run_chunks(backfill, chunks, options["workers"]), start=1):
+            updated += count
+            self.stdout.write(f"[{done}/{len(chunks)}] users {first}-{last}: {count} records updated")
+
+        self.stdout.write(self.style.SUCCESS(f"Record periods backfilled ({updated} records updated)."))
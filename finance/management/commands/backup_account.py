@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from finance.backup import gzip_stream, iter_backup_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Write a gzip-compressed NDJSON backup of a user's periods, cycles, categories, "
+        "financial records and file metadata."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="Id or username of the user to back up.")
+        parser.add_argument("path", help="Path of the backup file to write (e.g. backup.ndjson.gz).")
+
+    def handle(self, *args, **options):
+        user = get_user(options["user"])
+        with open(options["path"], "wb") as backup:
+            for block in gzip_stream(iter_backup_lines(user)):
+                backup.write(block)
+        self.stdout.write(self.style.SUCCESS(f"Backup of {user.get_username()} written to {options['path']}."))
+
+
+def get_user(value):
+    users = get_user_model().objects
+    user = users.filter(pk=value).first() if value.isdigit() else None
+    if user is None:
+        user = users.filter(username=value).first()
+    if user is None:
+        raise CommandError(f"User {value!r} not found.")
+    return user
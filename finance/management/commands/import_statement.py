@@ -0,0 +1,68 @@
+import json
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from finance.imports import IMPORT_CHUNK_SIZE, StatementError, import_statement, read_statement, statement_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Import a CSV or OFX bank statement for a user, streaming the file and inserting "
+        "its records in fixed-size bulk chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="Id or username of the user the records belong to.")
+        parser.add_argument("path", help="Path of the statement file.")
+        parser.add_argument("--format", choices=["csv", "ofx"], help="Statement format; guessed from the file name.")
+        parser.add_argument("--date-format", default="%Y-%m-%d", help="strptime format of CSV dates.")
+        parser.add_argument(
+            "--decimal-separator", choices=[".", ","], default=".",
+            help="Decimal separator of CSV amounts; the other character may only group thousands.",
+        )
+        parser.add_argument(
+            "--rules",
+            help='JSON file with category rules: [{"pattern": "<regex>", "category": "<code or name>"}].',
+        )
+        parser.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Records per bulk insert.")
+        parser.add_argument(
+            "--no-create-periods", action="store_true",
+            help="Skip rows whose year has no period instead of creating it.",
+        )
+
+    def handle(self, *args, **options):
+        user = self.get_user(options["user"])
+        rules = []
+        if options["rules"]:
+            with open(options["rules"]) as rules_file:
+                rules = json.load(rules_file)
+
+        def progress(result):
+            self.stdout.write(f"{result.rows} rows read: {result.created} records created, {result.skipped} skipped")
+
+        with open(options["path"], "rb") as statement:
+            rows = read_statement(
+                statement, options["format"] or statement_format(options["path"]), options["date_format"],
+                options["decimal_separator"],
+            )
+            try:
+                result = import_statement(
+                    user, rows, rules=rules, chunk_size=options["chunk_size"],
+                    create_periods=not options["no_create_periods"], progress=progress,
+                )
+            except StatementError as e:
+                raise CommandError(str(e))
+
+        for error in result.errors:
+            self.stderr.write(f"line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Statement imported ({result.created} records created, {result.skipped} rows skipped)."
+        ))
+
+    def get_user(self, value):
+        users = get_user_model().objects
+        user = users.filter(pk=value).first() if value.isdigit() else None
+        if user is None:
+            user = users.filter(username=value).first()
+        if user is None:
+            raise CommandError(f"User {value!r} not found.")
+        return user
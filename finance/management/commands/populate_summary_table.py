@@ -1,57 +1,65 @@
-from django.core.management.base import BaseCommand
-from app.models import Period, Cycle, Category, FinancialRecord, FinancialSummary
-from django.db.models import Sum
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from datetime import datetime, time
+from finance.batching import id_ranges, run_chunks
+from finance.cache import bump_data_versions
+from finance.models import FinancialSummary
+
 
 class Command(BaseCommand):
-    help = "Populate the FinancialSummary table with aggregated data."
-
-    def handle(self, *args, **kwargs):
-        for period in Period.objects.all():
-            for cycle in period.cycles.all():
-                for category in period.user.categories.all():
-                    # Sum incomes and expenses for this category, cycle, and period
-                    total_incomes = FinancialRecord.objects.filter(
-                        cycle=cycle, category=category, type_choice="income"
-                    ).aggregate(Sum("current_amount"))["current_amount__sum"] or 0
-
-                    total_expenses = FinancialRecord.objects.filter(
-                        cycle=cycle, category=category, type_choice="expenses"
-                    ).aggregate(Sum("current_amount"))["current_amount__sum"] or 0
-
-                    net_income = total_incomes - total_expenses
-
-                    # Update or create the summary record
-                    FinancialSummary.objects.update_or_create(
-                        period=period,
-                        cycle=cycle,
-                        category=category,
-                        defaults={
-                            "total_incomes": total_incomes,
-                            "total_expenses": total_expenses,
-                            "net_income": net_income,
-                        },
-                    )
-
-                # Handle the "All" category (null category field)
-                total_incomes = FinancialRecord.objects.filter(
-                    cycle=cycle, type_choice="income"
-                ).aggregate(Sum("current_amount"))["current_amount__sum"] or 0
-
-                total_expenses = FinancialRecord.objects.filter(
-                    cycle=cycle, type_choice="expenses"
-                ).aggregate(Sum("current_amount"))["current_amount__sum"] or 0
-
-                net_income = total_incomes - total_expenses
-
-                FinancialSummary.objects.update_or_create(
-                    period=period,
-                    cycle=cycle,
-                    category=None,  # Null for "All" category
-                    defaults={
-                        "total_incomes": total_incomes,
-                        "total_expenses": total_expenses,
-                        "net_income": net_income,
-                    },
-                )
-
-        self.stdout.write(self.style.SUCCESS("FinancialSummary table populated successfully."))
+    help = (
+        "Rebuild the FinancialSummary table with grouped INSERT ... SELECT upserts, "
+        "in chunks of user ids."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=1, help="Number of chunks rebuilt in parallel.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of user ids per chunk.")
+        parser.add_argument(
+            "--since",
+            help=(
+                "Only rebuild cycles that may have changed at or after this ISO date/timestamp: cycles "
+                "holding records updated since, and every cycle of users whose data changed since "
+                "(including records deleted or moved to another cycle)."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        since = self.parse_since(options["since"])
+        users = get_user_model().objects.all()
+        bounds = users.aggregate(first=Min("id"), last=Max("id"))
+        if bounds["first"] is None:
+            self.stdout.write("No users to summarize.")
+            return
+
+        chunks = list(id_ranges(bounds["first"], bounds["last"], options["chunk_size"]))
+
+        def rebuild(first_user_id, last_user_id):
+            with transaction.atomic():
+                # Summaries cached from the old rows must not be served once the chunk commits
+                bump_data_versions(users.filter(pk__gte=first_user_id, pk__lte=last_user_id))
+                return FinancialSummary.objects.rebuild_users(first_user_id, last_user_id, since=since)
+
+        rows = 0
+        for done, ((first, last), written) in enumerate(run_chunks(rebuild, chunks, options["workers"]), start=1):
+            rows += written
+            self.stdout.write(f"[{done}/{len(chunks)}] users {first}-{last}: {written} summary rows written")
+
+        self.stdout.write(self.style.SUCCESS(f"FinancialSummary table populated successfully ({rows} rows written)."))
+
+    def parse_since(self, value):
+        if not value:
+            return None
+        since = parse_datetime(value)
+        if since is None:
+            day = parse_date(value)
+            if day is None:
+                raise CommandError(f"Invalid --since value: {value!r}. Use an ISO date or timestamp.")
+            since = datetime.combine(day, time.min)
+        if timezone.is_naive(since):
+            since = timezone.make_aware(since)
+        return since
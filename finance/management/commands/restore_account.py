@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance.backup import BACKUP_CHUNK_SIZE, BackupError, read_backup, restore_backup
+from finance.management.commands.backup_account import get_user
+
+
+class Command(BaseCommand):
+    help = (
+        "Restore a backup written by backup_account into a user's account, bulk loading its rows "
+        "in fixed-size chunks in a single transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("user", help="Id or username of the user to restore into.")
+        parser.add_argument("path", help="Path of the backup file.")
+        parser.add_argument(
+            "--remap-ids", action="store_true",
+            help="Give periods, cycles, records and files new ids, e.g. to copy an account within one environment.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=BACKUP_CHUNK_SIZE, help="Rows per bulk insert.")
+
+    def handle(self, *args, **options):
+        user = get_user(options["user"])
+        with open(options["path"], "rb") as backup:
+            try:
+                counts = restore_backup(
+                    user, read_backup(backup), remap_ids=options["remap_ids"], chunk_size=options["chunk_size"]
+                )
+            except BackupError as e:
+                raise CommandError(str(e))
+        loaded = ", ".join(f"{name}: {count}" for name, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f"Backup restored into {user.get_username()} ({loaded})."))
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+from django.utils import timezone
+from finance.batching import id_ranges, run_chunks
+from finance.cache import bump_data_versions
+from finance.models import Period
+
+
+class Command(BaseCommand):
+    help = (
+        "Give every active user a period (with its 12 cycles) for the new year and archive (freeze) "
+        "their earlier periods, one transaction per chunk of user ids. Users already rolled over are "
+        "left alone, so the command can be re-run or resumed with --start-user."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Year to roll over to; defaults to the current year.")
+        parser.add_argument("--workers", type=int, default=1, help="Number of chunks rolled over in parallel.")
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Number of user ids per chunk.")
+        parser.add_argument("--start-user", type=int, help="Resume from this user id.")
+        parser.add_argument(
+            "--move-records", action="store_true",
+            help="Also move the records of the archived periods to the archive table.",
+        )
+
+    def handle(self, *args, **options):
+        year = str(options["year"] or timezone.now().year)
+        users = get_user_model().objects.filter(is_active=True)
+        bounds = users.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            self.stdout.write("No users to roll over.")
+            return
+
+        first = max(bounds["first"], options["start_user"] or bounds["first"])
+        chunks = list(id_ranges(first, bounds["last"], options["chunk_size"]))
+        move_records = options["move_records"]
+
+        def roll_over(first_user_id, last_user_id):
+            in_chunk = {"user__gte": first_user_id, "user__lte": last_user_id}
+            with transaction.atomic():
+                # New periods for the users without one for the year, then their cycles
+                missing = users.filter(pk__gte=first_user_id, pk__lte=last_user_id).exclude(
+                    periods__title=year
+                ).values_list("pk", flat=True)
+                periods = Period.objects.bulk_create([Period(user_id=user_id, title=year) for user_id in missing])
+                Period.objects.create_cycles(periods)
+
+                # Archive and freeze every earlier period still active, with set-based statements
+                earlier = Period.objects.filter(is_archived=False, title__lt=year, user__is_active=True, **in_chunk)
+                archived_users = set(earlier.values_list("user_id", flat=True))
+                archived = earlier.archive(move_records=move_records)
+
+                # Versions live in the database, so the web processes see these bumps on commit
+                bump_data_versions(archived_users | {period.user_id for period in periods})
+            return len(periods), archived
+
+        created = archived = 0
+        for done, ((first, last), (new, old)) in enumerate(run_chunks(roll_over, chunks, options["workers"]), start=1):
+            created += new
+            archived += old
+            self.stdout.write(f"[{done}/{len(chunks)}] users {first}-{last}: {new} periods created, {old} archived")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rolled over to {year} ({created} periods created, {archived} periods archived)."
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:24
+
+import django.db.models.deletion
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0003_financialrecordfile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FinancialSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_count', models.IntegerField(default=0)),
+                ('total_incomes', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('planned_total_incomes', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('planned_total_expenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='finance.category')),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='finance.cycle')),
+                ('period', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='summaries', to='finance.period')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['period', 'category'], name='summary_period_category_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('category__isnull', False)), fields=('cycle', 'category'), name='unique_cycle_category_summary'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('cycle',), name='unique_cycle_all_categories_summary')],
+            },
+        ),
+    ]
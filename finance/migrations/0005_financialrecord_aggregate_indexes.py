@@ -0,0 +1,28 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:31
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction, but it doesn't lock the table
+    atomic = False
+
+    dependencies = [
+        ('finance', '0004_financialsummary'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='financialrecord',
+            index=models.Index(fields=['cycle', 'type_choice'], include=('current_amount', 'planned_amount'), name='record_cycle_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='financialrecord',
+            index=models.Index(fields=['period', 'type_choice'], include=('current_amount', 'planned_amount'), name='record_period_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='financialrecord',
+            index=models.Index(fields=['category', 'cycle'], name='record_category_cycle_idx'),
+        ),
+    ]
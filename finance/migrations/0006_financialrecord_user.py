@@ -0,0 +1,29 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The nullable column is added without a table rewrite and the index is built
+    # concurrently; existing rows are filled by the backfill_record_owner command
+    atomic = False
+
+    dependencies = [
+        ('finance', '0005_financialrecord_aggregate_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='financialrecord',
+            name='user',
+            field=models.ForeignKey(blank=True, db_index=False, editable=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='financial_records', to=settings.AUTH_USER_MODEL),
+        ),
+        AddIndexConcurrently(
+            model_name='financialrecord',
+            index=models.Index(fields=['user', 'date'], name='record_user_date_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1.3 on 2026-10-17 01:41
+
+from django.conf import settings
+from django.contrib.postgres.operations import AddIndexConcurrently, RemoveIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # The wider index is built before the one it replaces is dropped, both without locking writes
+    atomic = False
+
+    dependencies = [
+        ('finance', '0006_financialrecord_user'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='financialrecord',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='record_user_keyset_idx'),
+        ),
+        RemoveIndexConcurrently(
+            model_name='financialrecord',
+            name='record_user_date_idx',
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.3 on 2026-10-17 02:03
+
+import django.db.models.deletion
+import uuid
+from decimal import Decimal
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0007_financialrecord_keyset_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodSnapshot',
+            fields=[
+                ('period', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='finance.period')),
+                ('frozen_at', models.DateTimeField()),
+                ('record_count', models.IntegerField(default=0)),
+                ('total_incomes', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('total_expenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('planned_total_incomes', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+                ('planned_total_expenses', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=15)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ArchivedFinancialRecord',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('type_choice', models.CharField(choices=[('income', 'Income'), ('expenses', 'Expenses')], max_length=8)),
+                ('current_amount', models.DecimalField(decimal_places=2, max_digits=13)),
+                ('planned_amount', models.DecimalField(decimal_places=2, max_digits=13)),
+                ('date', models.DateField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('firebase_uid', models.CharField(blank=True, max_length=255, null=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_records', to='finance.category')),
+                ('cycle', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_records', to='finance.cycle')),
+                ('period', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_records', to='finance.period')),
+                ('user', models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_records', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,71 @@
+from django.db import migrations, transaction
+from django.db.models import Max, Min
+
+CHUNK_SIZE = 1000
+
+
+def populate_summaries(apps, schema_editor):
+    """
+    Rebuild the FinancialSummary rows of every period that isn't frozen, one transaction per
+    chunk of user ids, so accounts created before the rollup existed don't read zero totals.
+    Rows already kept by deltas are replaced by the same sums.
+    """
+    Period = apps.get_model("finance", "Period")
+    tables = {
+        name: schema_editor.quote_name(apps.get_model("finance", model)._meta.db_table)
+        for name, model in (
+            ("summary", "FinancialSummary"), ("record", "FinancialRecord"), ("cycle", "Cycle"),
+            ("period", "Period"), ("snapshot", "PeriodSnapshot"),
+        )
+    }
+    in_chunk = (
+        "SELECT p.id FROM {period} p WHERE p.user_id BETWEEN %s AND %s "
+        "AND NOT EXISTS (SELECT 1 FROM {snapshot} fs WHERE fs.period_id = p.id)"
+    ).format(**tables)
+    sums = ", ".join(
+        f"COALESCE(SUM(CASE WHEN r.type_choice = '{type_choice}' THEN r.{amount} END), 0)"
+        for amount, type_choice in (
+            ("current_amount", "income"), ("current_amount", "expenses"),
+            ("planned_amount", "income"), ("planned_amount", "expenses"),
+        )
+    )
+    select = (
+        "SELECT c.period_id, r.cycle_id, {category}, COUNT(*), " + sums + " "
+        "FROM {record} r JOIN {cycle} c ON c.id = r.cycle_id "
+        "WHERE c.period_id IN (" + in_chunk + ") GROUP BY c.period_id, r.cycle_id{group}"
+    )
+    insert = (
+        "INSERT INTO {summary} (period_id, cycle_id, category_id, record_count, total_incomes, "
+        "total_expenses, planned_total_incomes, planned_total_expenses) "
+    ).format(**tables)
+
+    bounds = Period.objects.aggregate(first=Min("user_id"), last=Max("user_id"))
+    if bounds["first"] is None:
+        return
+    connection = schema_editor.connection
+    for first in range(bounds["first"], bounds["last"] + 1, CHUNK_SIZE):
+        params = [first, first + CHUNK_SIZE - 1]
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {summary} WHERE period_id IN (".format(**tables) + in_chunk + ")", params
+            )
+            cursor.execute(
+                insert
+                + select.format(category="r.category_id", group=", r.category_id", **tables)
+                + " UNION ALL "
+                + select.format(category="NULL", group="", **tables),
+                params * 2,
+            )
+
+
+class Migration(migrations.Migration):
+    # Each chunk of users commits on its own, like the populate_summary_table command
+    atomic = False
+
+    dependencies = [
+        ('finance', '0008_period_snapshot'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
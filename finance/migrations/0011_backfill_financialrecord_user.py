@@ -0,0 +1,35 @@
+from django.db import migrations, transaction
+from django.db.models import Max, Min, OuterRef, Subquery
+
+CHUNK_SIZE = 1000
+
+
+def backfill_owners(apps, schema_editor):
+    """
+    Fill FinancialRecord.user from each record's category owner, like backfill_record_owner,
+    one transaction per chunk of user ids, so existing records stay visible to their owners.
+    """
+    Category = apps.get_model("finance", "Category")
+    FinancialRecord = apps.get_model("finance", "FinancialRecord")
+    bounds = Category.objects.aggregate(first=Min("user_id"), last=Max("user_id"))
+    if bounds["first"] is None:
+        return
+    owner = Category.objects.filter(pk=OuterRef("category_id")).values("user_id")[:1]
+    for first in range(bounds["first"], bounds["last"] + 1, CHUNK_SIZE):
+        with transaction.atomic(using=schema_editor.connection.alias):
+            FinancialRecord.objects.filter(
+                user__isnull=True, category__user__gte=first, category__user__lte=first + CHUNK_SIZE - 1
+            ).update(user_id=Subquery(owner))
+
+
+class Migration(migrations.Migration):
+    # Each chunk of users commits on its own, like the backfill_record_owner command
+    atomic = False
+
+    dependencies = [
+        ('finance', '0010_dataversion'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_owners, migrations.RunPython.noop),
+    ]
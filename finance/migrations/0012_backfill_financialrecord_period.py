@@ -0,0 +1,38 @@
+from django.db import migrations, transaction
+from django.db.models import F, Max, Min, OuterRef, Q, Subquery
+
+CHUNK_SIZE = 1000
+
+
+def backfill_periods(apps, schema_editor):
+    """
+    Set FinancialRecord.period to the period of each record's cycle where it is missing or out
+    of step, like backfill_record_period, one transaction per chunk of user ids, so period
+    totals read through the period_id indexes are right from the start.
+    """
+    Cycle = apps.get_model("finance", "Cycle")
+    FinancialRecord = apps.get_model("finance", "FinancialRecord")
+    Period = apps.get_model("finance", "Period")
+    bounds = Period.objects.aggregate(first=Min("user_id"), last=Max("user_id"))
+    if bounds["first"] is None:
+        return
+    cycle_period = Cycle.objects.filter(pk=OuterRef("cycle_id")).values("period_id")[:1]
+    stale = Q(period__isnull=True) | ~Q(period_id=F("cycle__period_id"))
+    for first in range(bounds["first"], bounds["last"] + 1, CHUNK_SIZE):
+        with transaction.atomic(using=schema_editor.connection.alias):
+            FinancialRecord.objects.filter(
+                stale, cycle__period__user__gte=first, cycle__period__user__lte=first + CHUNK_SIZE - 1
+            ).update(period_id=Subquery(cycle_period))
+
+
+class Migration(migrations.Migration):
+    # Each chunk of users commits on its own, like the backfill_record_period command
+    atomic = False
+
+    dependencies = [
+        ('finance', '0011_backfill_financialrecord_user'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+    ]
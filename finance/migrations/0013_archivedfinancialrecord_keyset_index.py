@@ -0,0 +1,19 @@
+# Generated by Django 5.1.3 on 2026-10-17 02:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0012_backfill_financialrecord_period'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedfinancialrecord',
+            index=models.Index(fields=['user', 'date', 'created_at', 'id'], name='archived_user_keyset_idx'),
+        ),
+    ]
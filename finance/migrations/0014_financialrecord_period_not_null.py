@@ -0,0 +1,47 @@
+from importlib import import_module
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+# Records written by older workers between 0012 and this migration get their period first
+backfill_periods = import_module("finance.migrations.0012_backfill_financialrecord_period").backfill_periods
+
+
+class Migration(migrations.Migration):
+    # Each step commits on its own: the constraint is validated without blocking writes, and
+    # SET NOT NULL then trusts it instead of scanning the table under an exclusive lock
+    atomic = False
+
+    dependencies = [
+        ('finance', '0013_archivedfinancialrecord_keyset_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_periods, migrations.RunPython.noop),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    'ALTER TABLE "finance_financialrecord" ADD CONSTRAINT "financialrecord_period_not_null" '
+                    'CHECK ("period_id" IS NOT NULL) NOT VALID',
+                    'ALTER TABLE "finance_financialrecord" DROP CONSTRAINT "financialrecord_period_not_null"',
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE "finance_financialrecord" VALIDATE CONSTRAINT "financialrecord_period_not_null"',
+                    migrations.RunSQL.noop,
+                ),
+                migrations.RunSQL(
+                    'ALTER TABLE "finance_financialrecord" ALTER COLUMN "period_id" SET NOT NULL, '
+                    'DROP CONSTRAINT "financialrecord_period_not_null"',
+                    'ALTER TABLE "finance_financialrecord" ALTER COLUMN "period_id" DROP NOT NULL, '
+                    'ADD CONSTRAINT "financialrecord_period_not_null" CHECK ("period_id" IS NOT NULL) NOT VALID',
+                ),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='financialrecord',
+                    name='period',
+                    field=models.ForeignKey(blank=True, on_delete=django.db.models.deletion.CASCADE, related_name='financial_records', to='finance.period'),
+                ),
+            ],
+        ),
+    ]
@@ -1,14 +1,230 @@
 import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
-from django.db.models import Sum, Q
-from django.core.exceptions import ValidationError
-from django.db import IntegrityError
+from django.db.models import Sum, Q, F, Count, Case, When, Value, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.db import IntegrityError, connection, transaction
 from decimal import Decimal
 
 
+ZERO = Decimal("0.00")
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December"
+]
+TOTALS_FIELDS = ("total_incomes", "total_expenses", "planned_total_incomes", "planned_total_expenses")
+
+
+def totals_aggregates(prefix=""):
+    """
+    Build the four conditional sums (income/expense x current/planned) as aggregate expressions.
+
+    `prefix` is the lookup path from the queried model to FinancialRecord, e.g. "financial_records__".
+    """
+    income = Q(**{f"{prefix}type_choice": FinancialRecord.INCOME})
+    expenses = Q(**{f"{prefix}type_choice": FinancialRecord.EXPENSES})
+    return {
+        "total_incomes": Sum(f"{prefix}current_amount", filter=income),
+        "total_expenses": Sum(f"{prefix}current_amount", filter=expenses),
+        "planned_total_incomes": Sum(f"{prefix}planned_amount", filter=income),
+        "planned_total_expenses": Sum(f"{prefix}planned_amount", filter=expenses),
+    }
+
+
+def _percentage(difference, planned):
+    """Express a planned-vs-current difference as a percentage of the planned value."""
+    if planned == 0:
+        return ZERO  # Avoid division by zero
+    return (difference / planned) * Decimal("100.00")
+
+
+@dataclass(frozen=True)
+class Totals:
+    """Current and planned sums for a period or cycle, plus every metric derived from them."""
+    total_incomes: Decimal = ZERO
+    total_expenses: Decimal = ZERO
+    planned_total_incomes: Decimal = ZERO
+    planned_total_expenses: Decimal = ZERO
+
+    @classmethod
+    def from_aggregate(cls, values):
+        """Build totals from an aggregate/values() dict keyed like `totals_aggregates()`."""
+        return cls(**{name: values.get(name) or ZERO for name in TOTALS_FIELDS})
+
+    @classmethod
+    def from_annotations(cls, obj):
+        """Build totals from an instance loaded through `with_totals()`, or None if it wasn't."""
+        if not all(hasattr(obj, name) for name in TOTALS_FIELDS):
+            return None
+        return cls.from_aggregate(vars(obj))
+
+    @classmethod
+    def for_record(cls, type_choice, current_amount, planned_amount):
+        """Build the totals contributed by a single financial record."""
+        if type_choice == FinancialRecord.INCOME:
+            return cls(total_incomes=current_amount, planned_total_incomes=planned_amount)
+        return cls(total_expenses=current_amount, planned_total_expenses=planned_amount)
+
+    def __add__(self, other):
+        return Totals(*(getattr(self, name) + getattr(other, name) for name in TOTALS_FIELDS))
+
+    def __neg__(self):
+        return Totals(*(-getattr(self, name) for name in TOTALS_FIELDS))
+
+    def is_zero(self):
+        return not any(getattr(self, name) for name in TOTALS_FIELDS)
+
+    @property
+    def net_income(self):
+        return self.total_incomes - self.total_expenses
+
+    @property
+    def planned_net_income(self):
+        return self.planned_total_incomes - self.planned_total_expenses
+
+    @property
+    def income_difference_value(self):
+        return self.planned_total_incomes - self.total_incomes
+
+    @property
+    def income_difference_percentage(self):
+        return _percentage(self.income_difference_value, self.planned_total_incomes)
+
+    @property
+    def expense_difference_value(self):
+        return self.planned_total_expenses - self.total_expenses
+
+    @property
+    def expense_difference_percentage(self):
+        return _percentage(self.expense_difference_value, self.planned_total_expenses)
+
+    @property
+    def net_income_difference_value(self):
+        return self.planned_net_income - self.net_income
+
+    @property
+    def net_income_difference_percentage(self):
+        return _percentage(self.net_income_difference_value, self.planned_net_income)
+
+
+class TotalsQuerySet(models.QuerySet):
+    """QuerySet able to annotate each row with the sums of its financial records."""
+    records_path = ""  # Lookup path from the queried model to FinancialRecord
+    snapshot_path = ""  # Lookup path from the queried model to the PeriodSnapshot of its period
+
+    def frozen_totals(self):
+        """Expressions reading each total of a frozen row from its snapshot, keyed like TOTALS_FIELDS."""
+        return {}
+
+    def with_totals(self):
+        """
+        Annotate the four conditional sums and net incomes in a single GROUP BY. Rows of frozen
+        (archived) periods take their totals from the snapshot instead of their records.
+        """
+        output_field = models.DecimalField(max_digits=13, decimal_places=2)
+        sums = {
+            name: Coalesce(aggregate, ZERO, output_field=output_field)
+            for name, aggregate in totals_aggregates(self.records_path).items()
+        }
+        frozen = self.frozen_totals()
+        if frozen:
+            sums = {
+                name: Case(
+                    When(**{f"{self.snapshot_path}__isnull": False}, then=frozen[name]),
+                    default=aggregate,
+                    output_field=output_field,
+                )
+                for name, aggregate in sums.items()
+            }
+        return self.annotate(**sums).annotate(
+            net_income=F("total_incomes") - F("total_expenses"),
+            planned_net_income=F("planned_total_incomes") - F("planned_total_expenses"),
+        )
+
+
+class PeriodQuerySet(TotalsQuerySet):
+    records_path = "financial_records__"
+    snapshot_path = "snapshot"
+
+    def frozen_totals(self):
+        return {name: F(f"snapshot__{name}") for name in TOTALS_FIELDS}
+
+    def archive(self, move_records=False):
+        """
+        Archive and freeze the selected periods: rebuild their summaries one last time, store
+        their final totals in a PeriodSnapshot and mark them archived, with set-based statements.
+        From then on their summaries are served from the snapshot and their records can't be
+        written. With `move_records`, their records also move to ArchivedFinancialRecord.
+        Periods already frozen are left as they are. Returns the number of periods frozen.
+        """
+        # Pinned by id, since archiving changes what filters such as is_archived=False select
+        period_ids = list(self.values_list("id", flat=True))
+        if not period_ids:
+            return 0
+        periods = Period.objects.filter(pk__in=period_ids)
+        quote = connection.ops.quote_name
+        period = quote(Period._meta.db_table)
+        summary = quote(FinancialSummary._meta.db_table)
+        snapshot = quote(PeriodSnapshot._meta.db_table)
+        selected, params = periods.order_by().values("id").query.sql_with_params()
+        sums = ", ".join(f"COALESCE(SUM(s.{name}), 0)" for name in ("record_count",) + TOTALS_FIELDS)
+        with transaction.atomic():
+            FinancialSummary.objects.rebuild_periods(selected, params)
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"INSERT INTO {snapshot} (period_id, frozen_at, record_count, {', '.join(TOTALS_FIELDS)}) "
+                    f"SELECT p.id, %s, {sums} FROM {period} p "
+                    f"LEFT JOIN {summary} s ON s.period_id = p.id AND s.category_id IS NULL "
+                    f"WHERE p.id IN ({selected}) GROUP BY p.id "
+                    f"ON CONFLICT (period_id) DO NOTHING",
+                    [timezone.now(), *params],
+                )
+                frozen = cursor.rowcount
+            periods.filter(is_archived=False).update(is_archived=True)
+            if move_records:
+                ArchivedFinancialRecord.objects.move_in(periods)
+        return frozen
+
+    def unarchive(self):
+        """Thaw the selected periods: move back their archived records and drop their snapshots."""
+        period_ids = list(self.values_list("id", flat=True))
+        if not period_ids:
+            return
+        periods = Period.objects.filter(pk__in=period_ids)
+        with transaction.atomic():
+            ArchivedFinancialRecord.objects.move_out(periods)
+            PeriodSnapshot.objects.filter(period__in=periods).delete()
+            periods.filter(is_archived=True).update(is_archived=False)
+
+    def create_cycles(self, periods):
+        """Create the 12 monthly cycles of every period in `periods` with one INSERT, skipping months that already exist."""
+        Cycle.objects.bulk_create(
+            [Cycle(period=period, month=month, name=MONTH_NAMES[month - 1])
+             for period in periods for month in range(1, 13)],
+            ignore_conflicts=True,  # (period, month) is unique
+        )
+
+
+class CycleQuerySet(TotalsQuerySet):
+    records_path = "financial_records__"
+    snapshot_path = "period__snapshot"
+
+    def frozen_totals(self):
+        # The "all categories" summary row of a frozen cycle is no longer rebuilt
+        frozen = FinancialSummary.objects.filter(cycle=OuterRef("pk"), category__isnull=True)
+        return {name: Subquery(frozen.values(name)[:1]) for name in TOTALS_FIELDS}
+
+    def totals_by_cycle(self):
+        """Return {(period_id, cycle_id): Totals} for every cycle in the queryset using one grouped query."""
+        rows = self.order_by().with_totals().values("period_id", "id", *TOTALS_FIELDS)
+        return {(row["period_id"], row["id"]): Totals.from_aggregate(row) for row in rows}
+
+
 class Period(models.Model):
     """Represents a financial year with 12 monthly cycles for a user."""
     id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, primary_key=True)
@@ -21,79 +237,99 @@ class Period(models.Model):
     is_archived = models.BooleanField(default=False)  # Marks the period as archived or active
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = PeriodQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.user.username}'s Period {self.title}"
 
+    def totals(self):
+        """
+        Calculate current and planned sums for the period in a single aggregate query, or read
+        them from its snapshot once the period is frozen.
+        """
+        if self.is_archived:
+            snapshot = PeriodSnapshot.objects.filter(period_id=self.pk).first()
+            if snapshot is not None:
+                return snapshot.totals()
+        return Totals.from_aggregate(
+            FinancialRecord.objects.filter(period_id=self.pk).aggregate(**totals_aggregates())
+        )
+
     def calculate_total_incomes(self):
         """Calculate total incomes for the period."""
-        return (self.cycles.aggregate(total=Sum("financial_records__current_amount",
-                                                filter=Q(financial_records__type_choice="income"))).get("total") or 0)
+        return self.totals().total_incomes
 
     def calculate_total_expenses(self):
         """Calculate total expenses for the period."""
-        return (self.cycles.aggregate(total=Sum("financial_records__current_amount",
-                                                filter=Q(financial_records__type_choice="expenses"))).get("total") or 0)
+        return self.totals().total_expenses
 
     def calculate_net_income(self):
         """Calculate net income for the period."""
-        return self.calculate_total_incomes() - self.calculate_total_expenses()
+        return self.totals().net_income
 
     def planned_calculate_total_incomes(self):
         """Calculate total planned incomes for the period."""
-        return (self.cycles.aggregate(total=Sum("financial_records__planned_amount",
-                                                filter=Q(financial_records__type_choice="income"))).get("total") or 0)
+        return self.totals().planned_total_incomes
 
     def planned_calculate_total_expenses(self):
         """Calculate total planned expenses for the period."""
-        return (self.cycles.aggregate(total=Sum("financial_records__planned_amount",
-                                                filter=Q(financial_records__type_choice="expenses"))).get("total") or 0)
+        return self.totals().planned_total_expenses
 
     def planned_calculate_net_income(self):
         """Calculate planned net income for the period."""
-        return self.planned_calculate_total_incomes() - self.planned_calculate_total_expenses()
+        return self.totals().planned_net_income
 
     def income_difference_value(self):
         """Calculate the difference in dollars between planned and current incomes."""
-        return self.planned_calculate_total_incomes() - self.calculate_total_incomes()
+        return self.totals().income_difference_value
 
     def income_difference_percentage(self):
         """Calculate the percentage difference between planned and current incomes."""
-        planned = self.planned_calculate_total_incomes()
-        if planned == 0:
-            return 0  # Avoid division by zero
-        return ((self.planned_calculate_total_incomes() - self.calculate_total_incomes()) / planned) * 100
+        return self.totals().income_difference_percentage
 
     def expense_difference_value(self):
         """Calculate the difference in dollars between planned and current expenses."""
-        return self.planned_calculate_total_expenses() - self.calculate_total_expenses()
+        return self.totals().expense_difference_value
 
     def expense_difference_percentage(self):
         """Calculate the percentage difference between planned and current expenses."""
-        planned = self.planned_calculate_total_expenses()
-        if planned == 0:
-            return 0  # Avoid division by zero
-        return ((self.planned_calculate_total_expenses() - self.calculate_total_expenses()) / planned) * 100
+        return self.totals().expense_difference_percentage
 
     def net_income_difference_value(self):
         """Calculate the difference in dollars between planned and actual net income."""
-        return self.planned_calculate_net_income() - self.calculate_net_income()
+        return self.totals().net_income_difference_value
 
     def net_income_difference_percentage(self):
         """Calculate the percentage difference between planned and actual net income."""
-        planned_net_income = self.planned_calculate_net_income()
-        if planned_net_income == 0:
-            return 0  # Avoid division by zero
-        return ((self.planned_calculate_net_income() - self.calculate_net_income()) / planned_net_income) * 100
+        return self.totals().net_income_difference_percentage
 
     def create_cycles(self):
-        """Create 12 monthly cycles for this period."""
-        MONTH_NAMES = [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-        ]
-        for month in range(1, 13):  # Months 1 to 12
-            if not self.cycles.filter(month=month).exists():  # Avoid duplicates
-                self.cycles.create(month=month, name=MONTH_NAMES[month - 1])
+        """Create the 12 monthly cycles of this period with one INSERT, skipping months that already exist."""
+        Period.objects.create_cycles([self])
+
+    def clone(self, title=None):
+        """
+        Create the next year's period (or `title`) with its twelve cycles and copy every record
+        of this period into the same month, keeping planned amounts and resetting current ones,
+        all in one transaction. Returns the new period and the number of records copied.
+        """
+        with transaction.atomic():
+            period = Period.objects.create(user_id=self.user_id, title=title or str(int(self.title) + 1))
+            period.create_cycles()
+            new_cycles = {cycle.month: cycle for cycle in period.cycles.only("id", "period_id", "month")}
+            targets = {cycle_id: new_cycles[month] for cycle_id, month in self.cycles.values_list("id", "month")}
+            copied = copy_records({"period_id": self.pk}, targets)
+        return period, copied
+
+    def archive(self, move_records=False):
+        """Archive and freeze this period, see PeriodQuerySet.archive()."""
+        Period.objects.filter(pk=self.pk).archive(move_records=move_records)
+        self.is_archived = True
+
+    def unarchive(self):
+        """Thaw this period, see PeriodQuerySet.unarchive()."""
+        Period.objects.filter(pk=self.pk).unarchive()
+        self.is_archived = False
 
     @classmethod
     def start_new_period(cls, user):
@@ -125,12 +361,12 @@ class Cycle(models.Model):
     month = models.PositiveSmallIntegerField()  # 1 = January, 12 = December
     name = models.CharField(max_length=20, blank=True)
 
+    objects = CycleQuerySet.as_manager()
+
     class Meta:
         unique_together = ('period', 'month')
 
     def save(self, *args, **kwargs):
-        MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June',
-                       'July', 'August', 'September', 'October', 'November', 'December']
         if not self.name:
             self.name = MONTH_NAMES[self.month - 1]
         super().save(*args, **kwargs)
@@ -140,72 +376,57 @@ class Cycle(models.Model):
 
     # Calculation Methods
 
+    def totals(self):
+        """Calculate current and planned sums for the cycle (frozen ones from their snapshot) in a single query."""
+        return Totals.from_aggregate(Cycle.objects.filter(pk=self.pk).with_totals().values(*TOTALS_FIELDS).get())
+
     def calculate_total_incomes(self):
         """Calculate total incomes for the cycle."""
-        return self.financial_records.aggregate(
-            total=Sum("current_amount", filter=Q(type_choice=FinancialRecord.INCOME))
-        ).get("total") or Decimal("0.00")
+        return self.totals().total_incomes
 
     def calculate_total_expenses(self):
         """Calculate total expenses for the cycle."""
-        return self.financial_records.aggregate(
-            total=Sum("current_amount", filter=Q(type_choice=FinancialRecord.EXPENSES))
-        ).get("total") or Decimal("0.00")
+        return self.totals().total_expenses
 
     def calculate_net_income(self):
         """Calculate net income for the cycle."""
-        return self.calculate_total_incomes() - self.calculate_total_expenses()
+        return self.totals().net_income
 
     def planned_calculate_total_incomes(self):
         """Calculate total planned incomes for the cycle."""
-        return self.financial_records.aggregate(
-            total=Sum("planned_amount", filter=Q(type_choice=FinancialRecord.INCOME))
-        ).get("total") or Decimal("0.00")
+        return self.totals().planned_total_incomes
 
     def planned_calculate_total_expenses(self):
         """Calculate total planned expenses for the cycle."""
-        return self.financial_records.aggregate(
-            total=Sum("planned_amount", filter=Q(type_choice=FinancialRecord.EXPENSES))
-        ).get("total") or Decimal("0.00")
+        return self.totals().planned_total_expenses
 
     def planned_calculate_net_income(self):
         """Calculate planned net income for the cycle."""
-        return self.planned_calculate_total_incomes() - self.planned_calculate_total_expenses()
+        return self.totals().planned_net_income
 
     def income_difference_value(self):
         """Calculate the difference in dollars between planned and current incomes."""
-        return self.planned_calculate_total_incomes() - self.calculate_total_incomes()
+        return self.totals().income_difference_value
 
     def income_difference_percentage(self):
         """Calculate the percentage difference between planned and current incomes."""
-        planned = self.planned_calculate_total_incomes()
-        if planned == 0:
-            return Decimal("0.00")  # Avoid division by zero
-        return ((self.planned_calculate_total_incomes() - self.calculate_total_incomes()) / planned) * Decimal("100.00")
+        return self.totals().income_difference_percentage
 
     def expense_difference_value(self):
         """Calculate the difference in dollars between planned and current expenses."""
-        return self.planned_calculate_total_expenses() - self.calculate_total_expenses()
+        return self.totals().expense_difference_value
 
     def expense_difference_percentage(self):
         """Calculate the percentage difference between planned and current expenses."""
-        planned = self.planned_calculate_total_expenses()
-        if planned == 0:
-            return Decimal("0.00")  # Avoid division by zero
-        return ((self.planned_calculate_total_expenses() - self.calculate_total_expenses()) / planned) * Decimal(
-            "100.00")
+        return self.totals().expense_difference_percentage
 
     def net_income_difference_value(self):
         """Calculate the difference in dollars between planned and current net income."""
-        return self.planned_calculate_net_income() - self.calculate_net_income()
+        return self.totals().net_income_difference_value
 
     def net_income_difference_percentage(self):
         """Calculate the percentage difference between planned and current net income."""
-        planned_net_income = self.planned_calculate_net_income()
-        if planned_net_income == 0:
-            return Decimal("0.00")  # Avoid division by zero
-        return ((self.planned_calculate_net_income() - self.calculate_net_income()) / planned_net_income) * Decimal(
-            "100.00")
+        return self.totals().net_income_difference_percentage
 
 
 class Category(models.Model):
@@ -264,6 +485,178 @@ class Category(models.Model):
         return new_code
 
 
+class FinancialRecordQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        """
+        Derive each record's period from its cycle, and a missing owner from its category,
+        as save() does. Relations that aren't cached are resolved with one query each.
+        """
+        objs = list(objs)
+        periods = self._related_values(objs, FinancialRecord.cycle, Cycle, "period_id")
+        owners = self._related_values(
+            [obj for obj in objs if obj.user_id is None], FinancialRecord.category, Category, "user_id"
+        )
+        for obj in objs:
+            obj.period_id = periods.get(obj.cycle_id, obj.period_id)
+            if obj.user_id is None:
+                obj.user_id = owners.get(obj.category_id)
+        check_writable({obj.period_id for obj in objs})
+        return super().bulk_create(objs, *args, **kwargs)
+
+    @staticmethod
+    def _related_values(objs, descriptor, model, column):
+        """Map the related ids of `objs` to `column` of the related rows, querying only uncached ones."""
+        values, missing = {}, set()
+        for obj in objs:
+            # Ids may have been assigned as strings (e.g. straight from request data)
+            related_id = descriptor.field.to_python(getattr(obj, descriptor.field.attname))
+            setattr(obj, descriptor.field.attname, related_id)
+            if descriptor.is_cached(obj):
+                values[related_id] = getattr(getattr(obj, descriptor.field.name), column)
+            elif related_id is not None:
+                missing.add(related_id)
+        missing -= values.keys()
+        if missing:
+            values.update(model.objects.filter(pk__in=missing).values_list("pk", column))
+        return values
+
+    @contextmanager
+    def _rebuilding_summaries(self, cycle_ids=()):
+        """
+        Run the block in a transaction, then rebuild the summaries of every cycle the selected
+        records were in, plus `cycle_ids`, with FinancialSummary's set-based rebuild.
+        """
+        with transaction.atomic():
+            touched = set(self.order_by().values_list("cycle_id", flat=True).distinct())
+            yield
+            FinancialSummary.objects.rebuild_cycles(touched | set(cycle_ids))
+
+    def bulk_delete(self):
+        """
+        Delete the selected records with a single DELETE (after one for their file rows),
+        bypassing Django's per-row collector and signals. Returns the number of records deleted.
+        """
+        quote = connection.ops.quote_name
+        record = quote(FinancialRecord._meta.db_table)
+        record_file = quote(FinancialRecordFile._meta.db_table)
+        check_writable(records=self)
+        selected, params = self.order_by().values("id").query.sql_with_params()
+        with self._rebuilding_summaries(), connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {record_file} WHERE financial_record_id IN ({selected})", params)
+            cursor.execute(f"DELETE FROM {record} WHERE id IN ({selected})", params)
+            return cursor.rowcount
+
+    def bulk_assign(self, values):
+        """
+        Assign the same `values` (keyed by column attname) to every selected record with a
+        single UPDATE. Returns the number of records updated.
+        """
+        check_writable([values.get("period_id")], records=self)
+        cycle_ids = [values["cycle_id"]] if "cycle_id" in values else []
+        with self._rebuilding_summaries(cycle_ids):
+            return self.update(updated_at=timezone.now(), **values)
+
+    def bulk_assign_each(self, changes):
+        """
+        Apply per-record assignments {pk: {attname: value}} to the selected records with a single
+        UPDATE holding one CASE per column; records without a value for a column keep theirs.
+        Returns the number of records updated.
+        """
+        columns = {name for values in changes.values() for name in values}
+        assignments = {}
+        for name in columns:
+            field = FinancialRecord._meta.get_field(name)
+            assignments[name] = Case(
+                *[When(pk=pk, then=Value(values[name], output_field=field))
+                  for pk, values in changes.items() if name in values],
+                default=F(name),
+                output_field=field,
+            )
+        cycle_ids = {values["cycle_id"] for values in changes.values() if "cycle_id" in values}
+        selected = self.filter(pk__in=changes.keys())
+        check_writable({values.get("period_id") for values in changes.values()}, records=selected)
+        with selected._rebuilding_summaries(cycle_ids):
+            return selected.update(updated_at=timezone.now(), **assignments)
+
+    def copy_to(self, targets, reset_current=True, reset_planned=False, clear_date=True, values=None,
+                return_ids=False):
+        """
+        Copy the selected records with a single INSERT ... SELECT, without reading them into
+        Python. `targets` is a Cycle or a list of cycles, each receiving a copy of every selected
+        record, or a {source cycle id: target cycle} map copying each record only into its own
+        cycle's target (e.g. month to month when cloning a period). Amounts are reset to zero or
+        kept, and dates cleared or kept, per the flags; `values` sets columns (by attname) to the
+        same value on every copy. Returns the number of records created, or their ids with
+        `return_ids`. Also used by ArchivedFinancialRecord, whose rows are copied the same way.
+        """
+        if isinstance(targets, dict):
+            pairs = [(source_id, cycle) for source_id, cycle in targets.items()]
+            join = "t.source_id = r.cycle_id"
+        else:
+            pairs = [(None, cycle) for cycle in ([targets] if isinstance(targets, Cycle) else targets)]
+            join = "TRUE"
+        if not pairs:
+            return [] if return_ids else 0
+        check_writable({cycle.period_id for _, cycle in pairs})
+
+        quote = connection.ops.quote_name
+        record = quote(FinancialRecord._meta.db_table)
+        source = quote(self.model._meta.db_table)
+        now = timezone.now()
+        expressions = {field.column: (f"r.{quote(field.column)}", []) for field in FinancialRecord._meta.concrete_fields}
+        expressions.update({
+            "id": ("gen_random_uuid()", []),
+            "cycle_id": ("t.cycle_id", []),
+            "period_id": ("t.period_id", []),
+            "created_at": ("%s", [now]),
+            "updated_at": ("%s", [now]),
+        })
+        if reset_current:
+            expressions["current_amount"] = ("%s", [ZERO])
+        if reset_planned:
+            expressions["planned_amount"] = ("%s", [ZERO])
+        if clear_date:
+            expressions["date"] = ("NULL", [])
+        for name, value in (values or {}).items():
+            field = FinancialRecord._meta.get_field(name)
+            expressions[field.column] = ("%s", [field.get_db_prep_save(value, connection)])
+
+        columns = ", ".join(quote(column) for column in expressions)
+        select = ", ".join(expression for expression, _ in expressions.values())
+        params = [param for _, expression_params in expressions.values() for param in expression_params]
+        # The targets are joined as one row per (source cycle, target cycle, target period)
+        params += [
+            [str(source_id) if source_id is not None else None for source_id, _ in pairs],
+            [str(cycle.pk) for _, cycle in pairs],
+            [str(cycle.period_id) for _, cycle in pairs],
+        ]
+        selected, selected_params = self.order_by().values("id").query.sql_with_params()
+        returning = " RETURNING id" if return_ids else ""
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {record} ({columns}) SELECT {select} FROM {source} r "
+                f"JOIN unnest(%s::uuid[], %s::uuid[], %s::uuid[]) AS t(source_id, cycle_id, period_id) ON {join} "
+                f"WHERE r.id IN ({selected}){returning}",
+                params + list(selected_params),
+            )
+            copied = [row[0] for row in cursor.fetchall()] if return_ids else cursor.rowcount
+            FinancialSummary.objects.rebuild_cycles({cycle.pk for _, cycle in pairs})
+        return copied
+
+    def summary_deltas(self):
+        """
+        Group the records by (cycle_id, category_id) in one query, returning
+        {(cycle_id, category_id): (record_count, Totals)} for FinancialSummary.objects.apply_deltas().
+        """
+        rows = self.order_by().values("cycle_id", "category_id").annotate(
+            record_count=Count("id"), **totals_aggregates()
+        )
+        return {
+            (row["cycle_id"], row["category_id"]): (row["record_count"], Totals.from_aggregate(row))
+            for row in rows
+        }
+
+
 class FinancialRecord(models.Model):
     """Represents a financial record within a specific cycle."""
     id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, primary_key=True)
@@ -285,8 +678,18 @@ class FinancialRecord(models.Model):
         Period,
         related_name='financial_records',
         on_delete=models.CASCADE,
+        blank=True,  # Derived from the cycle by save() and bulk_create()
+    )
+    # Denormalized owner (the category's user) so ownership scoping needs no join.
+    # Indexed through record_user_keyset_idx, whose leading column is the user.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name='financial_records',
+        on_delete=models.CASCADE,
         null=True,
         blank=True,
+        editable=False,
+        db_index=False,
     )
     type_choice = models.CharField(max_length=8, choices=TYPE_CHOICES, default=EXPENSES)
     current_amount = models.DecimalField(max_digits=13, decimal_places=2, default=Decimal("0.00"))
@@ -296,10 +699,61 @@ class FinancialRecord(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     firebase_uid = models.CharField(max_length=255, blank=True, null=True)  # Firebase UID field
 
+    objects = FinancialRecordQuerySet.as_manager()
+
+    class Meta:
+        # Composite indexes for the aggregate and list hot paths. On PostgreSQL the amounts are
+        # INCLUDEd so conditional sums can be answered from the index alone.
+        indexes = [
+            models.Index(
+                fields=["cycle", "type_choice"],
+                include=["current_amount", "planned_amount"],
+                name="record_cycle_type_idx",
+            ),
+            models.Index(
+                fields=["period", "type_choice"],
+                include=["current_amount", "planned_amount"],
+                name="record_period_type_idx",
+            ),
+            models.Index(fields=["category", "cycle"], name="record_category_cycle_idx"),
+            # Owner scoping plus the (date, created_at, id) key of RecordCursorPagination
+            models.Index(fields=["user", "date", "created_at", "id"], name="record_user_keyset_idx"),
+        ]
+
+    SUMMARY_FIELDS = ("cycle_id", "category_id", "type_choice", "current_amount", "planned_amount")
+
     def __str__(self):
         period_name = self.period.title if self.period else "No Period"
         return f"{self.type_choice.capitalize()} - {self.category.name} ({self.cycle.name}, {period_name}): Current={self.current_amount}, Planned={self.planned_amount}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the record contributed to FinancialSummary so updates can apply a delta
+        if all(name in field_names for name in cls.SUMMARY_FIELDS):
+            instance._stored_summary_delta = instance.summary_delta()
+        return instance
+
+    def save(self, *args, **kwargs):
+        if self.user_id is None:
+            self.user_id = self.category.user_id
+        # The period always follows the cycle
+        self.period_id = self.cycle.period_id
+        # Neither the period written to nor, on updates, the one moved away from may be frozen
+        check_writable([self.period_id], records=None if self._state.adding else FinancialRecord.objects.filter(pk=self.pk))
+        # The post_save summary update must commit or roll back together with the record
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        check_writable([self.period_id])
+        return super().delete(*args, **kwargs)
+
+    def summary_delta(self):
+        """Return this record's contribution to FinancialSummary, keyed like `summary_deltas()`."""
+        totals = Totals.for_record(self.type_choice, Decimal(self.current_amount), Decimal(self.planned_amount))
+        return {(self.cycle_id, self.category_id): (1, totals)}
+
 class FinancialRecordFile(models.Model):
     """Stores file metadata related to a Financial Record (file stored in S3)."""
     id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True, primary_key=True)
@@ -308,4 +762,341 @@ class FinancialRecordFile(models.Model):
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"File for {self.financial_record} - {self.file_url}"
\ No newline at end of file
+        return f"File for {self.financial_record} - {self.file_url}"
+
+
+class FinancialSummaryQuerySet(models.QuerySet):
+    def apply_deltas(self, added=None, removed=None):
+        """
+        Add (and subtract) record deltas keyed by (cycle_id, category_id) to the summary rows,
+        creating rows that don't exist yet. Each delta also moves the cycle's "all categories" row.
+        """
+        merged = {}
+        for deltas, sign in ((added or {}, 1), (removed or {}, -1)):
+            for (cycle_id, category_id), (count, totals) in deltas.items():
+                if sign < 0:
+                    count, totals = -count, -totals
+                for key in ((cycle_id, category_id), (cycle_id, None)):
+                    previous_count, previous_totals = merged.get(key, (0, Totals()))
+                    merged[key] = (previous_count + count, previous_totals + totals)
+
+        with transaction.atomic():
+            missing = {}
+            for (cycle_id, category_id), (count, totals) in merged.items():
+                if not count and totals.is_zero():
+                    continue
+                changes = {name: F(name) + getattr(totals, name) for name in TOTALS_FIELDS}
+                if not self.filter(cycle_id=cycle_id, category_id=category_id).update(
+                        record_count=F("record_count") + count, **changes):
+                    missing[(cycle_id, category_id)] = (count, totals, changes)
+
+            # Only additions create rows: a removal without a row comes from a cascade that
+            # already deleted the cycle's summaries
+            missing = {key: value for key, value in missing.items() if value[0] > 0}
+            periods = dict(Cycle.objects.filter(pk__in={key[0] for key in missing}).values_list("id", "period_id"))
+            for (cycle_id, category_id), (count, totals, changes) in missing.items():
+                if cycle_id not in periods:
+                    continue
+                try:
+                    with transaction.atomic():
+                        self.create(
+                            period_id=periods[cycle_id], cycle_id=cycle_id, category_id=category_id,
+                            record_count=count, **{name: getattr(totals, name) for name in TOTALS_FIELDS},
+                        )
+                except IntegrityError:
+                    # A concurrent writer created the row first
+                    self.filter(cycle_id=cycle_id, category_id=category_id).update(
+                        record_count=F("record_count") + count, **changes)
+
+    def add_records(self, records):
+        """Apply the deltas of freshly inserted records, e.g. after `bulk_create()`."""
+        added = {}
+        for record in records:
+            for key, (count, totals) in record.summary_delta().items():
+                previous_count, previous_totals = added.get(key, (0, Totals()))
+                added[key] = (previous_count + count, previous_totals + totals)
+        self.apply_deltas(added=added)
+
+    def rebuild_cycles(self, cycle_ids):
+        """Recompute the summary rows of the given cycles from their financial records."""
+        cycle_ids = list(cycle_ids)
+        if not cycle_ids:
+            return 0
+        placeholders = ", ".join(["%s"] * len(cycle_ids))
+        cycle = connection.ops.quote_name(Cycle._meta.db_table)
+        return self._rebuild(f"SELECT id FROM {cycle} WHERE id IN ({placeholders})", cycle_ids)
+
+    def rebuild_users(self, first_user_id, last_user_id, since=None):
+        """
+        Recompute the summary rows of every cycle owned by users in [first_user_id, last_user_id].
+
+        With `since`, only cycles that may have changed from that time on are rebuilt: those
+        holding records updated since, and every cycle of users whose data version was bumped
+        since. The latter covers cycles that records were deleted or moved out of, which leave
+        no updated row behind.
+        """
+        quote = connection.ops.quote_name
+        cycle = quote(Cycle._meta.db_table)
+        period = quote(Period._meta.db_table)
+        params = [first_user_id, last_user_id]
+        scope = (f"SELECT c.id FROM {cycle} c JOIN {period} p ON p.id = c.period_id "
+                 f"WHERE p.user_id BETWEEN %s AND %s")
+        if since is not None:
+            # Recent records are found through their owner column, changed users through their version
+            record = quote(FinancialRecord._meta.db_table)
+            version = quote(DataVersion._meta.db_table)
+            scope = (f"SELECT r.cycle_id FROM {record} r "
+                     f"WHERE r.user_id BETWEEN %s AND %s AND r.updated_at >= %s "
+                     f"UNION {scope} AND p.user_id IN ("
+                     f"SELECT v.user_id FROM {version} v WHERE v.modified_at >= %s)")
+            params = params + [since] + params + [since]
+        return self._rebuild(scope, params)
+
+    def rebuild_periods(self, selected, params=()):
+        """Recompute the summary rows of every cycle of the periods selected by the `selected` id subquery."""
+        cycle = connection.ops.quote_name(Cycle._meta.db_table)
+        return self._rebuild(f"SELECT id FROM {cycle} WHERE period_id IN ({selected})", list(params))
+
+    def _rebuild(self, scope, params):
+        """
+        Rebuild the summaries of the cycles selected by the `scope` subquery with set-based
+        statements: grouped INSERT ... SELECT upserts for the category and "all categories" rows,
+        and a DELETE of rows whose records are gone. Cycles of frozen periods are skipped: their
+        rows are the period's snapshot. Returns the number of rows written.
+        """
+        quote = connection.ops.quote_name
+        summary = quote(self.model._meta.db_table)
+        record = quote(FinancialRecord._meta.db_table)
+        cycle = quote(Cycle._meta.db_table)
+        scope = (f"{scope} EXCEPT SELECT fc.id FROM {cycle} fc "
+                 f"JOIN {quote(PeriodSnapshot._meta.db_table)} fs ON fs.period_id = fc.period_id")
+        columns = ("period_id", "cycle_id", "category_id", "record_count") + TOTALS_FIELDS
+        sums = ", ".join(
+            f"COALESCE(SUM(CASE WHEN r.type_choice = '{type_choice}' THEN r.{amount} END), 0)"
+            for amount, type_choice in (
+                ("current_amount", FinancialRecord.INCOME),
+                ("current_amount", FinancialRecord.EXPENSES),
+                ("planned_amount", FinancialRecord.INCOME),
+                ("planned_amount", FinancialRecord.EXPENSES),
+            )
+        )
+        updates = ", ".join(f"{name} = EXCLUDED.{name}" for name in columns[3:])
+        upsert = (
+            f"INSERT INTO {summary} ({', '.join(columns)}) "
+            f"SELECT c.period_id, r.cycle_id, {{category}}, COUNT(*), {sums} "
+            f"FROM {record} r JOIN {cycle} c ON c.id = r.cycle_id "
+            f"WHERE r.cycle_id IN ({scope}) "
+            f"GROUP BY c.period_id, r.cycle_id{{group}} "
+            f"ON CONFLICT {{conflict}} DO UPDATE SET {updates}"
+        )
+        written = 0
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {summary} WHERE cycle_id IN ({scope}) AND NOT EXISTS ("
+                f"SELECT 1 FROM {record} r WHERE r.cycle_id = {summary}.cycle_id "
+                f"AND ({summary}.category_id IS NULL OR r.category_id = {summary}.category_id))",
+                params,
+            )
+            cursor.execute(upsert.format(
+                category="r.category_id", group=", r.category_id",
+                conflict="(cycle_id, category_id) WHERE category_id IS NOT NULL",
+            ), params)
+            written += cursor.rowcount
+            cursor.execute(upsert.format(
+                category="NULL", group="",
+                conflict="(cycle_id) WHERE category_id IS NULL",
+            ), params)
+            written += cursor.rowcount
+        return written
+
+    def totals(self):
+        """Sum the selected summary rows into a single Totals."""
+        return Totals.from_aggregate(self.aggregate(**{name: Sum(name) for name in TOTALS_FIELDS}))
+
+    def period_totals(self, period):
+        """Totals of a period, read from its twelve "all categories" rows."""
+        return self.filter(period=period, category__isnull=True).totals()
+
+    def cycle_totals(self, cycle):
+        """Totals of a cycle, read from its "all categories" row."""
+        return self.filter(cycle=cycle, category__isnull=True).totals()
+
+
+class FinancialSummary(models.Model):
+    """
+    Rolled-up sums of a cycle's financial records per category, plus one row with a null
+    category covering all categories. Kept current by transactional deltas on every write.
+    """
+    period = models.ForeignKey(Period, related_name="summaries", on_delete=models.CASCADE)
+    cycle = models.ForeignKey(Cycle, related_name="summaries", on_delete=models.CASCADE)
+    category = models.ForeignKey(
+        Category,
+        related_name="summaries",
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,  # Null for the "All" category
+    )
+    record_count = models.IntegerField(default=0)
+    total_incomes = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    total_expenses = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    planned_total_incomes = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    planned_total_expenses = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+
+    objects = FinancialSummaryQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["cycle", "category"],
+                condition=Q(category__isnull=False),
+                name="unique_cycle_category_summary",
+            ),
+            models.UniqueConstraint(
+                fields=["cycle"],
+                condition=Q(category__isnull=True),
+                name="unique_cycle_all_categories_summary",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["period", "category"], name="summary_period_category_idx"),
+        ]
+
+    def __str__(self):
+        category_name = self.category.name if self.category else "All"
+        return f"Summary {self.cycle} / {category_name}"
+
+
+class FrozenPeriodError(PermissionDenied):
+    """A write to the financial records of an archived (frozen) period."""
+    default_message = "The financial records of an archived period can't be changed."
+
+
+def check_writable(period_ids=(), records=None):
+    """
+    Raise FrozenPeriodError if any of `period_ids`, or the period of any record selected by the
+    `records` queryset, is frozen. Costs one query on the small snapshot table.
+    """
+    frozen = Q(period_id__in=[period_id for period_id in period_ids if period_id is not None])
+    if records is not None:
+        frozen |= Q(period_id__in=records.order_by().values("period_id"))
+    if PeriodSnapshot.objects.filter(frozen).exists():
+        raise FrozenPeriodError(FrozenPeriodError.default_message)
+
+
+class PeriodSnapshot(models.Model):
+    """
+    Final totals of an archived period, stored when it was frozen. Its per-cycle and per-category
+    breakdown is the period's FinancialSummary rows, which are no longer rebuilt once frozen.
+    """
+    period = models.OneToOneField(Period, related_name="snapshot", on_delete=models.CASCADE, primary_key=True)
+    frozen_at = models.DateTimeField()
+    record_count = models.IntegerField(default=0)
+    total_incomes = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    total_expenses = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    planned_total_incomes = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+    planned_total_expenses = models.DecimalField(max_digits=15, decimal_places=2, default=Decimal("0.00"))
+
+    def __str__(self):
+        return f"Snapshot of {self.period}"
+
+    def totals(self):
+        return Totals.from_aggregate(vars(self))
+
+
+class ArchivedFinancialRecordQuerySet(models.QuerySet):
+    # Copies land in the record table, e.g. when cloning a frozen period
+    copy_to = FinancialRecordQuerySet.copy_to
+
+    def move_in(self, periods):
+        """
+        Move the financial records of `periods` into the archive table with one DELETE ... RETURNING
+        feeding an INSERT. Records with files stay where they are. Returns the number moved.
+        """
+        return self._move(periods, FinancialRecord, self.model, exclude_with_files=True)
+
+    def move_out(self, periods):
+        """Move the archived records of `periods` back into the financial record table."""
+        return self._move(periods, self.model, FinancialRecord)
+
+    def _move(self, periods, source_model, target_model, exclude_with_files=False):
+        quote = connection.ops.quote_name
+        source = quote(source_model._meta.db_table)
+        target = quote(target_model._meta.db_table)
+        columns = ", ".join(quote(field.column) for field in FinancialRecord._meta.concrete_fields)
+        selected, params = periods.order_by().values("id").query.sql_with_params()
+        condition = f"r.period_id IN ({selected})"
+        if exclude_with_files:
+            record_file = quote(FinancialRecordFile._meta.db_table)
+            condition += f" AND NOT EXISTS (SELECT 1 FROM {record_file} f WHERE f.financial_record_id = r.id)"
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"WITH moved AS (DELETE FROM {source} r WHERE {condition} RETURNING {columns}) "
+                f"INSERT INTO {target} ({columns}) SELECT {columns} FROM moved",
+                params,
+            )
+            return cursor.rowcount
+
+
+class ArchivedFinancialRecord(models.Model):
+    """
+    A financial record of a frozen period, moved out of the hot FinancialRecord table.
+    Same columns as FinancialRecord; the record list, exports and copies read both tables
+    (see `copy_records`), while totals come from the period's snapshot and summaries.
+    """
+    id = models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True)
+    cycle = models.ForeignKey(Cycle, related_name="archived_records", on_delete=models.CASCADE)
+    category = models.ForeignKey(Category, related_name="archived_records", on_delete=models.PROTECT)
+    period = models.ForeignKey(Period, related_name="archived_records", on_delete=models.CASCADE, null=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        related_name="archived_records",
+        on_delete=models.CASCADE,
+        null=True,
+        db_index=False,
+    )
+    type_choice = models.CharField(max_length=8, choices=FinancialRecord.TYPE_CHOICES)
+    current_amount = models.DecimalField(max_digits=13, decimal_places=2)
+    planned_amount = models.DecimalField(max_digits=13, decimal_places=2)
+    date = models.DateField(null=True, blank=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    firebase_uid = models.CharField(max_length=255, blank=True, null=True)
+
+    objects = ArchivedFinancialRecordQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Same key as record_user_keyset_idx, for the archived part of the record list
+            models.Index(fields=["user", "date", "created_at", "id"], name="archived_user_keyset_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived {self.type_choice} ({self.current_amount})"
+
+
+def copy_records(filters, targets, **options):
+    """
+    `copy_to()` the records matching `filters` from the record table and, when there are any,
+    from the archive table their frozen period moved them to. Returns the combined result.
+    """
+    copied = FinancialRecord.objects.filter(**filters).copy_to(targets, **options)
+    archived = ArchivedFinancialRecord.objects.filter(**filters)
+    if archived.exists():
+        copied += archived.copy_to(targets, **options)
+    return copied
+
+
+class DataVersion(models.Model):
+    """
+    Version of everything a user's summaries are computed from, bumped after every committed
+    write (see finance.cache). Kept in the database so web workers and management commands
+    all read the same version.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, related_name="data_version", on_delete=models.CASCADE, primary_key=True
+    )
+    version = models.BigIntegerField(default=0)
+    modified_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"Data version {self.version} of user {self.user_id}"
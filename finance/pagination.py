@@ -0,0 +1,119 @@
+"""
+Keyset pagination for financial records.
+
+Pages are ordered by (date, created_at, id) with undated records last. Every page is read with
+a WHERE on the last row already seen plus a LIMIT, seeking into record_user_keyset_idx, so a
+deep page costs the same as the first one: no OFFSET and no COUNT(*). Records moved to the
+archive table are paged together with the others by seeking both tables and merging the rows.
+"""
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+from uuid import UUID
+
+from django.db.models import F, Q
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+def _seeks(position, reverse):
+    """
+    The filters selecting the rows past `position` in scan order, one per index range: the rest
+    of the position's date (or of the undated rows), then the other dates, then the undated rows.
+    """
+    day, created_at, pk = position
+    bound, strict = ("lte", "lt") if reverse else ("gte", "gt")
+    same_day = Q(date__isnull=True) if day is None else Q(date=day)
+    seeks = [
+        same_day
+        & Q(**{f"created_at__{bound}": created_at})
+        & (Q(**{f"created_at__{strict}": created_at}) | Q(**{f"id__{strict}": pk}))
+    ]
+    if day is None:
+        if reverse:
+            seeks.append(Q(date__isnull=False))
+    else:
+        seeks.append(Q(**{f"date__{strict}": day}))
+        if not reverse:
+            seeks.append(Q(date__isnull=True))
+    return seeks
+
+
+def _key(record):
+    """The (date, created_at, id) position of `record` in scan order, undated records last."""
+    return record.date is None, record.date or date.min, record.created_at, record.pk
+
+
+class RecordCursorPagination(CursorPagination):
+    """
+    Cursor pagination on the full (date, created_at, id) key. DRF's CursorPagination only keys
+    on the first ordering field and skips ties with an OFFSET, which doesn't suit a nullable date.
+    """
+    ordering = ("date", "created_at", "id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """`queryset` may also be a list of querysets over tables sharing the key, paged as one."""
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.request = request
+        position, reverse = self.decode_cursor(request)
+
+        if reverse:
+            ordering = (F("date").desc(nulls_first=True), "-created_at", "-id")
+        else:
+            ordering = (F("date").asc(nulls_last=True), "created_at", "id")
+        sources = [source.order_by(*ordering) for source in (queryset if isinstance(queryset, list) else [queryset])]
+
+        # One extra row tells whether there is a page beyond this one
+        limit = self.page_size + 1
+        rows = []
+        for seek in [Q()] if position is None else _seeks(position, reverse):
+            found = [row for source in sources for row in source.filter(seek)[:limit - len(rows)]]
+            rows += sorted(found, key=_key, reverse=reverse)[:limit - len(rows)]
+            if len(rows) == limit:
+                break
+
+        has_more = len(rows) > self.page_size
+        self.page = rows[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, position is not None
+        return self.page
+
+    def decode_cursor(self, request):
+        """Return the (date, created_at, id) position and direction of the request's cursor."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None, False
+        try:
+            day, created_at, pk, reverse = json.loads(urlsafe_b64decode(encoded.encode("ascii")))
+            position = (parse_date(day) if day is not None else None, parse_datetime(created_at), UUID(pk))
+        except (AttributeError, TypeError, ValueError):  # Tampered: wrong shape or value types
+            raise NotFound(self.invalid_cursor_message)
+        if position[1] is None or (day is not None and position[0] is None):
+            raise NotFound(self.invalid_cursor_message)
+        return position, bool(reverse)
+
+    def encode_cursor(self, record, reverse):
+        """Return the page URL whose cursor points at `record`."""
+        day = record.date.isoformat() if record.date else None
+        token = json.dumps([day, record.created_at.isoformat(), str(record.pk), int(reverse)])
+        encoded = urlsafe_b64encode(token.encode("ascii")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
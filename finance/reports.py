@@ -0,0 +1,141 @@
+"""
+Report engine behind ReportDataView.
+
+Every section is built from one or two grouped queries over FinancialSummary, so the number
+of queries for a report is fixed no matter how many periods, cycles or categories a user has.
+The `iter_*` generators read through server-side cursors for streamed reports.
+
+Values and order match what the report returned when it was computed from the records: periods
+and cycles come in creation order, period rows hold int 0 for empty sums and percentages, and a
+category sum is null when the category has no records of that type.
+"""
+from django.db.models import Case, DecimalField, F, Q, Sum, Value, When
+
+from .models import TOTALS_FIELDS, Category, Cycle, FinancialSummary, Period, Totals
+from .streaming import STREAM_CHUNK_SIZE
+
+
+def _summary_sums(path, **filters):
+    """Sum the summary columns reached through `path`, restricted by `filters` on that relation."""
+    condition = Q(**{f"{path}__{lookup}": value for lookup, value in filters.items()})
+    return {name: Sum(f"{path}__{name}", filter=condition) for name in TOTALS_FIELDS}
+
+
+def _type_total(path, kind):
+    """
+    A summary row's current total of one record type ("incomes" or "expenses"), or null when
+    both its current and planned totals are zero, as a SUM over no records of that type was.
+    """
+    current, planned = f"{path}total_{kind}", f"{path}planned_total_{kind}"
+    return Case(
+        When(**{current: 0, planned: 0}, then=Value(None)),
+        default=F(current),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+
+
+def _totals_fields(totals):
+    """The summary values shared by period and cycle rows, under the report's key names."""
+    return {
+        "total_incomes": totals.total_incomes,
+        "total_expenses": totals.total_expenses,
+        "net_income": totals.net_income,
+        "planned_incomes": totals.planned_total_incomes,
+        "planned_expenses": totals.planned_total_expenses,
+        "planned_net_income": totals.planned_net_income,
+        "income_difference_value": totals.income_difference_value,
+        "income_difference_percentage": totals.income_difference_percentage,
+        "expense_difference_value": totals.expense_difference_value,
+        "expense_difference_percentage": totals.expense_difference_percentage,
+        "net_income_difference_value": totals.net_income_difference_value,
+        "net_income_difference_percentage": totals.net_income_difference_percentage,
+    }
+
+
+# Period percentage keys and the planned value each is taken of
+PERIOD_PERCENTAGE_BASES = {
+    "income_difference_percentage": "planned_incomes",
+    "expense_difference_percentage": "planned_expenses",
+    "net_income_difference_percentage": "planned_net_income",
+}
+
+
+def iter_period_data(user):
+    """One row per period, grouped by period in a single query."""
+    periods = (
+        Period.objects.filter(user=user)
+        .annotate(**_summary_sums("summaries", category__isnull=True))
+        .order_by("created_at", "id")
+        .values("title", *TOTALS_FIELDS)
+    )
+    for row in periods.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        # Empty sums are int 0, so the values derived from them stay int unless a sum isn't
+        fields = _totals_fields(Totals(**{name: row[name] or 0 for name in TOTALS_FIELDS}))
+        fields.update({key: 0 for key, base in PERIOD_PERCENTAGE_BASES.items() if fields[base] == 0})
+        yield {"title": row["title"], **fields}
+
+
+def iter_cycle_data(user):
+    """
+    One row per cycle with its category breakdown: a query by cycle and one by (cycle, category),
+    both in the same order so they are merged while streaming.
+    """
+    cycles = (
+        Cycle.objects.filter(period__user=user)
+        .annotate(**_summary_sums("summaries", category__isnull=True))
+        .order_by("period__created_at", "period_id", "month")
+        .values("id", "name", "period__title", *TOTALS_FIELDS)
+    )
+    breakdown = (
+        FinancialSummary.objects.filter(period__user=user, category__isnull=False, record_count__gt=0)
+        .order_by("period__created_at", "period_id", "cycle__month")
+        .values(
+            "cycle_id",
+            "category__name",
+            total_income=_type_total("", "incomes"),
+            total_expense=_type_total("", "expenses"),
+        )
+    )
+    breakdown = breakdown.iterator(chunk_size=STREAM_CHUNK_SIZE)
+    pending = next(breakdown, None)
+    for row in cycles.iterator(chunk_size=STREAM_CHUNK_SIZE):
+        categories = []
+        while pending is not None and pending["cycle_id"] == row["id"]:
+            pending.pop("cycle_id")
+            categories.append(pending)
+            pending = next(breakdown, None)
+        yield {
+            "id": row["id"],
+            "name": row["name"],
+            "period_title": row["period__title"],
+            **_totals_fields(Totals.from_aggregate(row)),
+            "categories": categories,
+        }
+
+
+def iter_category_data(user):
+    """One row per category, grouped by category in a single query."""
+    categories = Category.objects.filter(user=user).annotate(
+        total_income=Sum(_type_total("summaries__", "incomes")),
+        total_expense=Sum(_type_total("summaries__", "expenses")),
+    ).values("name", "code", "total_income", "total_expense")
+    return categories.iterator(chunk_size=STREAM_CHUNK_SIZE)
+
+
+REPORT_SECTIONS = {
+    "period_data": iter_period_data,
+    "cycle_data": iter_cycle_data,
+    "category_data": iter_category_data,
+}
+
+
+def build_report(user):
+    """Assemble the full report-data payload."""
+    return {section: list(rows(user)) for section, rows in REPORT_SECTIONS.items()}
+
+
+def iter_report_lines(user):
+    """Yield the report as {"section": ..., "row": ...} lines for streaming."""
+    for section, rows in REPORT_SECTIONS.items():
+        for row in rows(user):
+            yield {"section": section, "row": row}
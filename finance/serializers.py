@@ -1,6 +1,8 @@
 # serializers.py
-from rest_framework import serializers
-from .models import Period, Cycle, FinancialRecord, Category, FinancialRecordFile
+from rest_framework import permissions, serializers
+from django.db import models, transaction
+from .models import Period, Cycle, FinancialRecord, Category, FinancialRecordFile, Totals
+from .cache import cached_summary, cached_summaries, request_data_state
 from django.contrib.auth.models import User
 from drf_spectacular.utils import extend_schema_field
 from decimal import Decimal
@@ -19,7 +21,9 @@ class UserSerializer(serializers.ModelSerializer):
         extra_kwargs = {'password': {'write_only': True, 'required': True}}
 
     def create(self, validated_data):
-        user = User.objects.create_user(**validated_data)
+        # The user and everything provisioned for it by handle_new_user commit together
+        with transaction.atomic():
+            user = User.objects.create_user(**validated_data)
         return user
 
 
@@ -31,9 +35,100 @@ class PeriodForCycleSerializer(serializers.ModelSerializer):
         fields = ['id', 'title']  # Only include the fields you need
 
 
-class CycleSerializer(serializers.ModelSerializer):
+def _request_user_id(context):
+    """Return the authenticated user's id from a serializer context, if there is one."""
+    request = context.get("request")
+    user = getattr(request, "user", None)
+    return user.pk if user is not None and user.is_authenticated else None
+
+
+def _request_data_version(context):
+    """Return the authenticated user's data version, read once per request."""
+    return request_data_state(context.get("request"))[0]
+
+
+def _query_list(request, name):
+    """Values of a comma-separated query parameter, which may also be repeated."""
+    return {
+        value.strip()
+        for param in request.query_params.getlist(name)
+        for value in param.split(",")
+        if value.strip()
+    }
+
+
+class SparseFieldsMixin:
+    """
+    Lets read requests pick their fields with `?fields=` and `?omit=`. Nested relations listed
+    in `expandable_fields` are dropped by `?fields=` like any other field unless they are also
+    named in `?expand=`. Only the top-level serializer of a GET request is narrowed.
+    """
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in permissions.SAFE_METHODS:
+            return
+        requested = _query_list(request, "fields")
+        if requested:
+            keep = requested | (_query_list(request, "expand") & set(self.expandable_fields))
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+        for name in _query_list(request, "omit") & set(self.fields):
+            self.fields.pop(name)
+
+
+class TotalsMixin:
+    """
+    Resolves an object's Totals once and shares them across all of its summary fields.
+
+    Totals are taken, in order, from a batch placed in the serializer context under
+    `totals_context_key`, from `with_totals()` annotations, and finally from a single
+    aggregate query.
+    """
+    totals_context_key = None
+    totals_fields = (
+        "total_incomes", "total_expenses", "net_income",
+        "planned_total_incomes", "planned_total_expenses", "planned_net_income",
+        "income_difference_value", "income_difference_percentage",
+        "expense_difference_value", "expense_difference_percentage",
+        "net_income_difference_value", "net_income_difference_percentage",
+    )
+
+    def wants_totals(self):
+        """Whether any field computed from the totals is being serialized."""
+        return any(name in self.fields for name in self.totals_fields)
+
+    def totals_key(self, obj):
+        return obj.pk
+
+    def _totals(self, obj):
+        totals = getattr(obj, "_serialized_totals", None)
+        if totals is None:
+            batch = self.context.get(self.totals_context_key) or {}
+            totals = batch.get(self.totals_key(obj))
+            if totals is None:
+                totals = Totals.from_annotations(obj)
+            if totals is None:
+                totals = self._cached_totals(obj)
+            obj._serialized_totals = totals
+        return totals
+
+    def _cached_totals(self, obj):
+        user_id = _request_user_id(self.context)
+        if user_id is None:
+            return obj.totals()
+        return cached_summary(
+            user_id, f"{obj._meta.model_name}-totals", obj.pk, obj.totals, _request_data_version(self.context)
+        )
+
+
+class CycleSerializer(SparseFieldsMixin, TotalsMixin, serializers.ModelSerializer):
     """Serializer for Cycle model, including period details and calculated fields."""
 
+    totals_context_key = "cycle_totals"
+
     period = PeriodForCycleSerializer(read_only=True)
     total_incomes = serializers.SerializerMethodField()
     total_expenses = serializers.SerializerMethodField()
@@ -59,69 +154,85 @@ class CycleSerializer(serializers.ModelSerializer):
             'net_income_difference_value', 'net_income_difference_percentage',
         ]
 
+    def totals_key(self, obj):
+        return (obj.period_id, obj.pk)
+
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_total_incomes(self, obj):
         """Retrieve total incomes for the cycle."""
-        return obj.calculate_total_incomes()
+        return self._totals(obj).total_incomes
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_total_expenses(self, obj):
         """Retrieve total expenses for the cycle."""
-        return obj.calculate_total_expenses()
+        return self._totals(obj).total_expenses
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_net_income(self, obj):
         """Retrieve net income for the cycle."""
-        return obj.calculate_net_income()
+        return self._totals(obj).net_income
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_planned_total_incomes(self, obj):
         """Retrieve planned total incomes for the cycle."""
-        return obj.planned_calculate_total_incomes()
+        return self._totals(obj).planned_total_incomes
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_planned_total_expenses(self, obj):
         """Retrieve planned total expenses for the cycle."""
-        return obj.planned_calculate_total_expenses()
+        return self._totals(obj).planned_total_expenses
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_planned_net_income(self, obj):
         """Retrieve planned net income for the cycle."""
-        return obj.planned_calculate_net_income()
+        return self._totals(obj).planned_net_income
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_income_difference_value(self, obj):
         """Retrieve the difference in value between planned and actual incomes."""
-        return obj.income_difference_value()
+        return self._totals(obj).income_difference_value
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_income_difference_percentage(self, obj):
         """Retrieve the percentage difference between planned and actual incomes."""
-        return obj.income_difference_percentage()
+        return self._totals(obj).income_difference_percentage
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_expense_difference_value(self, obj):
         """Retrieve the difference in value between planned and actual expenses."""
-        return obj.expense_difference_value()
+        return self._totals(obj).expense_difference_value
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_expense_difference_percentage(self, obj):
         """Retrieve the percentage difference between planned and actual expenses."""
-        return obj.expense_difference_percentage()
+        return self._totals(obj).expense_difference_percentage
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_net_income_difference_value(self, obj):
         """Retrieve the difference in value between planned and actual net income."""
-        return obj.net_income_difference_value()
+        return self._totals(obj).net_income_difference_value
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_net_income_difference_percentage(self, obj):
         """Retrieve the percentage difference between planned and actual net income."""
-        return obj.net_income_difference_percentage()
+        return self._totals(obj).net_income_difference_percentage
+
+
+class PeriodListSerializer(serializers.ListSerializer):
+    """Batches the totals of every period on the page, and of their cycles, before serializing."""
 
+    def to_representation(self, data):
+        periods = list(data.all() if isinstance(data, models.Manager) else data)
+        if self.child.needs_totals():
+            self.child.prefetch_totals(periods)
+        return super().to_representation(periods)
 
-class PeriodSerializer(serializers.ModelSerializer):
+
+class PeriodSerializer(SparseFieldsMixin, TotalsMixin, serializers.ModelSerializer):
     """Serializer for Period model with summaries."""
+    totals_context_key = "period_totals"
+    expandable_fields = ("cycles",)
+
     total_incomes = serializers.SerializerMethodField()
     total_expenses = serializers.SerializerMethodField()
     net_income = serializers.SerializerMethodField()
@@ -147,75 +258,105 @@ class PeriodSerializer(serializers.ModelSerializer):
             'net_income_difference_value', 'net_income_difference_percentage'
         ]
         read_only_fields = ['id', 'user', 'created_at']
+        list_serializer_class = PeriodListSerializer
+
+    def prefetch_totals(self, periods):
+        """
+        Compute the totals of every cycle of `periods` in one grouped query keyed by
+        (period_id, cycle_id) and hand them, with the period sums, to the serializers via context.
+        Periods already in the summary cache are skipped.
+        """
+        def compute(period_ids):
+            batches = {period_id: (Totals(), {}) for period_id in period_ids}
+            for (period_id, cycle_id), totals in Cycle.objects.filter(period__in=period_ids).totals_by_cycle().items():
+                period_totals, cycle_totals = batches[period_id]
+                cycle_totals[(period_id, cycle_id)] = totals
+                batches[period_id] = (period_totals + totals, cycle_totals)
+            return batches
+
+        period_ids = [period.pk for period in periods]
+        user_id = _request_user_id(self.context)
+        if user_id is None:
+            batches = compute(period_ids)
+        else:
+            batches = cached_summaries(
+                user_id, "period-batch", period_ids, compute, _request_data_version(self.context)
+            )
+
+        self.context.setdefault("cycle_totals", {})
+        self.context.setdefault("period_totals", {})
+        for period_id, (period_totals, cycle_totals) in batches.items():
+            self.context["period_totals"][period_id] = period_totals
+            self.context["cycle_totals"].update(cycle_totals)
+
+    def needs_totals(self):
+        """Whether the period sums or the nested cycles' sums are being serialized."""
+        return self.wants_totals() or "cycles" in self.fields
+
+    def to_representation(self, instance):
+        if instance.pk not in self.context.get("period_totals", {}) and self.needs_totals():
+            self.prefetch_totals([instance])
+        return super().to_representation(instance)
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_total_incomes(self, obj):
         """Retrieve total incomes for the period."""
-        return obj.calculate_total_incomes()
+        return self._totals(obj).total_incomes
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_total_expenses(self, obj):
         """Retrieve total expenses for the period."""
-        return obj.calculate_total_expenses()
+        return self._totals(obj).total_expenses
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_net_income(self, obj):
         """Retrieve net income for the period."""
-        return obj.calculate_net_income()
+        return self._totals(obj).net_income
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_planned_total_incomes(self, obj):
         """Retrieve planned total incomes for the period."""
-        return obj.planned_calculate_total_incomes()
+        return self._totals(obj).planned_total_incomes
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_planned_total_expenses(self, obj):
         """Retrieve planned total expenses for the period."""
-        return obj.planned_calculate_total_expenses()
+        return self._totals(obj).planned_total_expenses
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_planned_net_income(self, obj):
         """Retrieve planned net income for the period."""
-        return obj.planned_calculate_net_income()
+        return self._totals(obj).planned_net_income
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_expense_difference_value(self, obj):
         """Calculate the difference between planned and current expenses in value."""
-        return obj.planned_calculate_total_expenses() - obj.calculate_total_expenses()
+        return self._totals(obj).expense_difference_value
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_expense_difference_percentage(self, obj):
         """Calculate the percentage difference between planned and current expenses."""
-        planned_expenses = obj.planned_calculate_total_expenses()
-        if planned_expenses == 0:
-            return 0  # Avoid division by zero
-        return ((planned_expenses - obj.calculate_total_expenses()) / planned_expenses) * 100
+        return self._totals(obj).expense_difference_percentage
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_income_difference_value(self, obj):
         """Calculate the difference between planned and current incomes in value."""
-        return obj.planned_calculate_total_incomes() - obj.calculate_total_incomes()
+        return self._totals(obj).income_difference_value
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_income_difference_percentage(self, obj):
         """Calculate the percentage difference between planned and current incomes."""
-        planned_incomes = obj.planned_calculate_total_incomes()
-        if planned_incomes == 0:
-            return 0  # Avoid division by zero
-        return ((planned_incomes - obj.calculate_total_incomes()) / planned_incomes) * 100
+        return self._totals(obj).income_difference_percentage
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_net_income_difference_value(self, obj):
         """Calculate the difference between planned and current net incomes in value."""
-        return obj.planned_calculate_net_income() - obj.calculate_net_income()
+        return self._totals(obj).net_income_difference_value
 
     @extend_schema_field(serializers.DecimalField(max_digits=10, decimal_places=2))
     def get_net_income_difference_percentage(self, obj):
         """Calculate the percentage difference between planned and current net incomes."""
-        planned_net_income = obj.planned_calculate_net_income()
-        if planned_net_income == 0:
-            return 0  # Avoid division by zero
-        return ((planned_net_income - obj.calculate_net_income()) / planned_net_income) * 100
+        return self._totals(obj).net_income_difference_percentage
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -233,9 +374,9 @@ class CategorySerializer(serializers.ModelSerializer):
         return value
 
 
-class FinancialRecordSerializer(serializers.ModelSerializer):
+class FinancialRecordSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     cycle = serializers.PrimaryKeyRelatedField(queryset=Cycle.objects.all())
-    period = serializers.PrimaryKeyRelatedField(queryset=Period.objects.all())
+    period = serializers.PrimaryKeyRelatedField(queryset=Period.objects.all(), required=False)
     category_name = serializers.CharField(source='category.name', read_only=True)
     category_code = serializers.CharField(source='category.code', read_only=True)
     diff_planned_actual = serializers.SerializerMethodField()  # Explicit calculation
@@ -259,11 +400,112 @@ class FinancialRecordSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ["created_at", "updated_at"]
 
+    def validate(self, data):
+        """The period is derived from the cycle; an explicit one must match it."""
+        cycle = data.get("cycle") or getattr(self.instance, "cycle", None)
+        period = data.get("period")
+        if cycle is not None and period is not None and period.pk != cycle.period_id:
+            raise serializers.ValidationError({"period": "The period must be the period of the selected cycle."})
+        return data
+
     def get_diff_planned_actual(self, obj):
         """Calculate the difference between planned and actual amounts."""
         return obj.planned_amount - obj.current_amount
 
 
+class FinancialRecordBatchItemSerializer(serializers.ModelSerializer):
+    """
+    One record of a batch create. Relations are only checked to be well-formed ids here;
+    the view resolves them for the whole batch at once.
+    """
+    cycle = serializers.UUIDField()
+    period = serializers.UUIDField(required=False)
+    category = serializers.IntegerField()
+
+    class Meta:
+        model = FinancialRecord
+        fields = ["cycle", "period", "category", "type_choice", "current_amount", "planned_amount", "date"]
+
+
+class FinancialRecordBatchSerializer(serializers.Serializer):
+    records = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=10000)
+    # Create the valid records and report the invalid ones instead of rejecting the whole batch
+    skip_invalid = serializers.BooleanField(default=False)
+
+
+class FinancialRecordFilterSerializer(serializers.Serializer):
+    """Filters selecting the records of a bulk operation; at least one is required."""
+    cycle = serializers.UUIDField(required=False)
+    period = serializers.UUIDField(required=False)
+    category = serializers.IntegerField(required=False)
+    type_choice = serializers.ChoiceField(choices=FinancialRecord.TYPE_CHOICES, required=False)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("At least one of cycle, period, category or type_choice is required.")
+        return data
+
+
+class FinancialRecordChangesSerializer(serializers.Serializer):
+    """Field assignments of a bulk update. Relations are given as ids."""
+    cycle = serializers.UUIDField(required=False)
+    category = serializers.IntegerField(required=False)
+    type_choice = serializers.ChoiceField(choices=FinancialRecord.TYPE_CHOICES, required=False)
+    current_amount = serializers.DecimalField(max_digits=13, decimal_places=2, required=False)
+    planned_amount = serializers.DecimalField(max_digits=13, decimal_places=2, required=False)
+    date = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError("No fields to update.")
+        return data
+
+
+class FinancialRecordUpdateItemSerializer(serializers.Serializer):
+    id = serializers.UUIDField()
+    fields = FinancialRecordChangesSerializer()
+
+
+class FinancialRecordBulkUpdateSerializer(serializers.Serializer):
+    """Either a list of `updates` ({id, fields}), or a `filter` plus the `fields` assigned to every match."""
+    updates = serializers.ListField(
+        child=FinancialRecordUpdateItemSerializer(), required=False, allow_empty=False, max_length=10000
+    )
+    filter = FinancialRecordFilterSerializer(required=False)
+    fields = FinancialRecordChangesSerializer(required=False)
+
+    def validate(self, data):
+        if "updates" in data:
+            if "filter" in data or "fields" in data:
+                raise serializers.ValidationError("Send either a list of updates or a filter with fields, not both.")
+        elif "filter" not in data or "fields" not in data:
+            raise serializers.ValidationError("A list of updates, or a filter with fields, is required.")
+        return data
+
+
+class CategoryRuleSerializer(serializers.Serializer):
+    pattern = serializers.CharField()
+    category = serializers.CharField()  # Category code or name
+
+
+class StatementImportSerializer(serializers.Serializer):
+    file = serializers.FileField()
+    format = serializers.ChoiceField(choices=["csv", "ofx"], required=False)  # Guessed from the file name
+    date_format = serializers.CharField(default="%Y-%m-%d")  # strptime format of CSV dates
+    decimal_separator = serializers.ChoiceField(choices=[".", ","], default=".")  # Of CSV amounts
+    rules = serializers.JSONField(required=False, default=list)  # JSON list of category rules
+
+    def validate_rules(self, value):
+        rules = CategoryRuleSerializer(data=value, many=True)
+        rules.is_valid(raise_exception=True)
+        return rules.validated_data
+
+
+class BackupRestoreSerializer(serializers.Serializer):
+    file = serializers.FileField()  # gzip-compressed NDJSON backup
+    remap_ids = serializers.BooleanField(default=False)  # Give periods, cycles and records new ids
+
+
 class PeriodSummarySerializer(serializers.Serializer):
     period = serializers.CharField()
     total_incomes = serializers.DecimalField(max_digits=13, decimal_places=2)
@@ -274,20 +516,114 @@ class PeriodSummarySerializer(serializers.Serializer):
     planned_net_income = serializers.DecimalField(max_digits=13, decimal_places=2)
 
 
-class CopyFinancialRecordsSerializer(serializers.Serializer):
+def _scope_cycles(serializer, *names):
+    """Limit the serializer's cycle fields to the requesting user's cycles."""
+    request = serializer.context.get("request")
+    if request is not None:
+        for name in names:
+            serializer.fields[name].queryset = Cycle.objects.filter(period__user=request.user)
+
+
+class RecordCopyPolicySerializer(serializers.Serializer):
+    """How copied records are filled in, see FinancialRecordQuerySet.copy_to()."""
+    reset_current_amount = serializers.BooleanField(default=True)
+    reset_planned_amount = serializers.BooleanField(default=False)
+    clear_date = serializers.BooleanField(default=True)
+    return_ids = serializers.BooleanField(default=False)  # Return the new records' ids, not only their count
+
+    def copy_options(self):
+        """Keyword arguments of FinancialRecordQuerySet.copy_to() for the validated policy."""
+        return {
+            "reset_current": self.validated_data["reset_current_amount"],
+            "reset_planned": self.validated_data["reset_planned_amount"],
+            "clear_date": self.validated_data["clear_date"],
+            "return_ids": self.validated_data["return_ids"],
+        }
+
+
+class CycleCopySerializer(RecordCopyPolicySerializer):
+    """Source and target cycles of a record copy, scoped to the requesting user, plus the copy policy."""
     current_cycle_id = serializers.PrimaryKeyRelatedField(queryset=Cycle.objects.all())
     previous_cycle_id = serializers.PrimaryKeyRelatedField(queryset=Cycle.objects.all())
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _scope_cycles(self, "current_cycle_id", "previous_cycle_id")
+
     def validate(self, data):
-        """Validate that the cycles exist and belong to the same period."""
         if data['current_cycle_id'] == data['previous_cycle_id']:
             raise serializers.ValidationError("Current and previous cycles cannot be the same.")
+        return data
+
 
-        if data['current_cycle_id'].period != data['previous_cycle_id'].period:
+class CopyFinancialRecordsSerializer(CycleCopySerializer):
+    def validate(self, data):
+        """Validate that the cycles exist and belong to the same period."""
+        data = super().validate(data)
+        if data['current_cycle_id'].period_id != data['previous_cycle_id'].period_id:
             raise serializers.ValidationError("Both cycles must belong to the same period.")
 
         return data
-    
+
+
+class CopyPreviousMonthSerializer(CycleCopySerializer):
+    reset_current_amount = serializers.BooleanField(default=False)  # Copies keep their current amounts
+    firebase_uid = serializers.CharField(max_length=255, required=False, allow_null=True, default=None)
+
+
+class CycleFanOutSerializer(RecordCopyPolicySerializer):
+    """
+    Targets of a one-to-many copy from a cycle: a list of cycles, a month range (in `period`,
+    or the source cycle's period), or every cycle of `period`.
+    """
+    cycles = serializers.ListField(child=serializers.UUIDField(), required=False, max_length=120)
+    period = serializers.PrimaryKeyRelatedField(queryset=Period.objects.all(), required=False)
+    first_month = serializers.IntegerField(min_value=1, max_value=12, required=False)
+    last_month = serializers.IntegerField(min_value=1, max_value=12, required=False)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is not None:
+            self.fields["period"].queryset = Period.objects.filter(user=request.user)
+
+    def validate_cycles(self, value):
+        """Resolve the target cycles with one query scoped to the user; repeated ids count once."""
+        request = self.context.get("request")
+        cycles = Cycle.objects.filter(period__user=request.user) if request is not None else Cycle.objects.all()
+        ids = list(dict.fromkeys(value))
+        found = cycles.only("id", "period_id").in_bulk(ids)
+        missing = [str(pk) for pk in ids if pk not in found]
+        if missing:
+            raise serializers.ValidationError(f"Cycles not found: {', '.join(missing)}.")
+        return [found[pk] for pk in ids]
+
+    def validate(self, data):
+        has_range = "first_month" in data or "last_month" in data
+        if "cycles" in data and (has_range or "period" in data):
+            raise serializers.ValidationError("Give either cycles, or a period and/or a month range.")
+        if "cycles" not in data and not has_range and "period" not in data:
+            raise serializers.ValidationError("Give the target cycles, a month range or a period.")
+        if data.get("first_month", 1) > data.get("last_month", 12):
+            raise serializers.ValidationError("first_month must not be after last_month.")
+        return data
+
+    def target_cycles(self, source):
+        """The validated target cycles of a copy from `source`, never including `source` itself."""
+        data = self.validated_data
+        if "cycles" in data:
+            return [cycle for cycle in data["cycles"] if cycle.pk != source.pk]
+        period_id = data["period"].pk if "period" in data else source.period_id
+        return list(
+            Cycle.objects.filter(
+                period_id=period_id, month__gte=data.get("first_month", 1), month__lte=data.get("last_month", 12)
+            ).exclude(pk=source.pk).only("id", "period_id")
+        )
+
+
+class PeriodCloneSerializer(serializers.Serializer):
+    title = serializers.RegexField(r"^\d{4}$", required=False)  # Defaults to the next year
+
 
 class FinancialRecordFileSerializer(serializers.ModelSerializer):
     class Meta:
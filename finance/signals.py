@@ -1,34 +1,118 @@
-from django.db.models.signals import post_save
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.conf import settings
 from rest_framework.authtoken.models import Token
-from .models import Period, Category
-from django.db.utils import IntegrityError
+from .models import Period, Cycle, Category, FinancialRecord, FinancialSummary
+from .cache import bump_data_version
+from django.db import transaction
 
 
 @receiver(post_save, sender=settings.AUTH_USER_MODEL)
-def handle_new_user(sender, instance, created, **kwargs):
-    """Handles actions when a new user is created."""
-    if created:
-        try:
-            # Create a new period for the user with cycles
-            Period.start_new_period(user=instance)
-
-            # Create an authentication token for the user
-            Token.objects.get_or_create(user=instance)  # Ensure only one token is created
-
-            # Ensure the default category exists for the user
-            Category.objects.get_or_create(
+def handle_new_user(sender, instance, created, raw=False, **kwargs):
+    """
+    Provisions a new user: the current year's period with its cycles, an authentication token
+    and the DEFAULT category, in one transaction with a fixed number of queries. Failures
+    propagate, so a user is never left half provisioned.
+    """
+    if not created or raw:
+        return
+    with transaction.atomic():
+        # Create a new period for the user with cycles
+        Period.start_new_period(user=instance)
+
+        # Create an authentication token for the user
+        Token.objects.create(user=instance)
+
+        # The default category, inserted without Category.save()'s validation queries:
+        # a new user has no categories it could clash with
+        Category.objects.bulk_create([
+            Category(
                 user=instance,
                 code="DEFAULT",
-                defaults={
-                    "name": "Default",
-                    "description": "Default category for reassigned financial records.",
-                },
+                name="Default",
+                description="Default category for reassigned financial records.",
             )
-        except IntegrityError:
-            # Handle potential database integrity issues (e.g., unique constraints)
-            pass
-        except Exception:
-            # Handle all other exceptions gracefully
-            pass
+        ], ignore_conflicts=True)
+
+
+@receiver(post_save, sender=FinancialRecord)
+def update_summary_on_save(sender, instance, created, raw=False, **kwargs):
+    """Applies a created or updated record's delta to FinancialSummary."""
+    if raw:
+        return
+    previous = getattr(instance, "_stored_summary_delta", None)
+    if created or previous is not None:
+        FinancialSummary.objects.apply_deltas(added=instance.summary_delta(), removed=previous)
+    else:
+        # Loaded without its amounts (e.g. through only()), so the old contribution is unknown
+        FinancialSummary.objects.rebuild_cycles([instance.cycle_id])
+    instance._stored_summary_delta = instance.summary_delta()
+
+
+# The parents whose deletion cascades to the rows of each model
+CASCADE_PARENTS = {Cycle: (Period,), FinancialRecord: (Period, Cycle)}
+
+
+def _cascaded_from(origin, *models):
+    """Whether a delete signal comes from deleting an instance or queryset of one of `models`."""
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return issubclass(model, models)
+
+
+@receiver(post_delete, sender=FinancialRecord)
+def update_summary_on_delete(sender, instance, origin=None, **kwargs):
+    """
+    Removes a deleted record's contribution from FinancialSummary. Records deleted along with
+    their period or cycle are skipped: the cycle's summary rows are deleted by the same cascade.
+    """
+    if _cascaded_from(origin, *CASCADE_PARENTS[FinancialRecord]):
+        return
+    previous = getattr(instance, "_stored_summary_delta", None)
+    FinancialSummary.objects.apply_deltas(removed=previous or instance.summary_delta())
+
+
+@receiver(post_save, sender=Cycle)
+def sync_record_periods(sender, instance, created, raw=False, **kwargs):
+    """Moves a cycle's records and summary rows along when the cycle is moved to another period."""
+    if created or raw:
+        return
+    instance.financial_records.exclude(period_id=instance.period_id).update(period_id=instance.period_id)
+    instance.summaries.exclude(period_id=instance.period_id).update(period_id=instance.period_id)
+
+
+def _owner_id(instance):
+    """Return the id of the user owning a period, cycle, category or financial record."""
+    if isinstance(instance, (Period, Category)):
+        return instance.user_id
+    if isinstance(instance, Cycle):
+        if Cycle.period.is_cached(instance):
+            return instance.period.user_id
+        return Period.objects.filter(pk=instance.period_id).values_list("user_id", flat=True).first()
+    if instance.user_id is not None:
+        return instance.user_id
+    if FinancialRecord.category.is_cached(instance):
+        return instance.category.user_id
+    return Category.objects.filter(pk=instance.category_id).values_list("user_id", flat=True).first()
+
+
+@receiver(post_save, sender=Period)
+@receiver(post_save, sender=Cycle)
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=FinancialRecord)
+@receiver(post_delete, sender=Period)
+@receiver(post_delete, sender=Cycle)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=FinancialRecord)
+def invalidate_cached_summaries(sender, instance, raw=False, origin=None, **kwargs):
+    """
+    Bumps the owner's data version so their cached summaries are no longer served. Rows deleted
+    by the cascade of a period or cycle are left to that period's or cycle's own bump.
+    """
+    if raw:
+        return
+    if _cascaded_from(origin, *CASCADE_PARENTS.get(sender, ())):
+        return
+    owner_id = _owner_id(instance)
+    if owner_id is not None:
+        bump_data_version(owner_id)
@@ -1,3 +1,1155 @@
-from django.test import TestCase
+import csv
+import gzip
+import json
+from base64 import urlsafe_b64encode
+from datetime import date
+from decimal import Decimal
+from importlib import import_module
+from io import BytesIO, StringIO
+from tempfile import NamedTemporaryFile
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, IntegrityError, connection
+from django.db.models import Q, Sum
+from django.test import AsyncClient, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .backup import iter_backup_lines
+from .cache import bump_data_version, summary_cache
+from .imports import import_statement, read_statement
+from .serializers import CycleSerializer, FinancialRecordSerializer
+from .models import (
+    ArchivedFinancialRecord, Category, Cycle, DataVersion, FinancialRecord, FinancialRecordFile, FinancialSummary,
+    Period, Totals,
+)
+
+
+@skipUnless(connection.vendor == "postgresql", "Query plans are checked against PostgreSQL")
+class AggregateQueryPlanTests(TestCase):
+    """
+    The main read endpoints must reach financial records through indexes, not table scans.
+    The seeded table is far too small for the planner to prefer an index on its own, so plans
+    are taken with sequential scans disabled: one that still shows up has no index to use.
+    """
+    USERS = 20
+    RECORDS_PER_CYCLE = 20
+
+    @classmethod
+    def setUpTestData(cls):
+        records = []
+        for index in range(cls.USERS):
+            user = User.objects.create(username=f"plan-user-{index}")
+            category = Category.objects.create(user=user, name="Groceries")
+            period = Period.objects.create(user=user, title="2020")
+            period.create_cycles()
+            for cycle in period.cycles.all():
+                records.extend(
+                    FinancialRecord(
+                        cycle=cycle,
+                        period=period,
+                        category=category,
+                        type_choice=FinancialRecord.INCOME if n % 4 == 0 else FinancialRecord.EXPENSES,
+                        current_amount=Decimal(n),
+                        planned_amount=Decimal(n + 1),
+                    )
+                    for n in range(cls.RECORDS_PER_CYCLE)
+                )
+        FinancialRecord.objects.bulk_create(records)
+        cls.user = user
+        cls.period = period
+        cls.cycle = period.cycles.get(month=6)
+        with connection.cursor() as cursor:
+            for model in (Period, Cycle, Category, FinancialRecord):
+                cursor.execute(f"ANALYZE {model._meta.db_table}")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_record_reads_use_indexes(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        tables = [model._meta.db_table for model in (FinancialRecord, ArchivedFinancialRecord)]
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            for query in queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT"):
+                    continue
+                cursor.execute(f"EXPLAIN {sql}")
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+                for table in tables:
+                    self.assertNotIn(f"Seq Scan on {table}", plan, f"{url} scans {table}:\n{sql}\n{plan}")
+
+    def test_cycle_list(self):
+        self.assert_record_reads_use_indexes("/finance/cycles/")
+
+    def test_cycle_detail(self):
+        self.assert_record_reads_use_indexes(f"/finance/cycles/{self.cycle.pk}/")
+
+    def test_period_list(self):
+        self.assert_record_reads_use_indexes("/finance/periods/")
+
+    def test_record_list_by_cycle(self):
+        self.assert_record_reads_use_indexes(f"/finance/financial_records/?cycle={self.cycle.pk}")
+
+    def test_record_list_by_period(self):
+        self.assert_record_reads_use_indexes(f"/finance/financial_records/?period={self.period.pk}")
+
+    def test_period_totals(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        queryset = FinancialRecord.objects.filter(period=self.period, type_choice=FinancialRecord.INCOME)
+        plan = queryset.values("current_amount").explain()
+        self.assertIn("record_period_type_idx", plan)
+
+
+class EmptyTotalsQueryCountTests(TestCase):
+    """Lists of periods and cycles without records must not fall back to per-object totals."""
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def list_queries(self, url, periods):
+        user = User.objects.create(username=f"empty-{periods}")
+        for year in range(2020, 2020 + periods):
+            Period.objects.create(user=user, title=str(year)).create_cycles()
+        self.client.force_authenticate(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_cycle_list(self):
+        self.assertEqual(self.list_queries("/finance/cycles/", 1), self.list_queries("/finance/cycles/", 3))
+
+    def test_period_list(self):
+        self.assertEqual(self.list_queries("/finance/periods/", 1), self.list_queries("/finance/periods/", 3))
+
+
+class PopulateSummaryMigrationTests(TestCase):
+    """Migration 0009 fills the rollup for accounts whose records predate it."""
+
+    def test_rebuilds_rollup_from_records(self):
+        user = User.objects.create(username="rollup")
+        category = Category.objects.create(user=user, name="Groceries")
+        period = Period.objects.create(user=user, title="2020")
+        period.create_cycles()
+        FinancialRecord.objects.bulk_create(
+            FinancialRecord(cycle=cycle, category=category, type_choice=type_choice,
+                            current_amount=Decimal(cycle.month), planned_amount=Decimal(2))
+            for cycle in period.cycles.all()
+            for type_choice in (FinancialRecord.INCOME, FinancialRecord.EXPENSES)
+        )
+        expected = period.totals()
+        FinancialSummary.objects.all().delete()
+
+        migration = import_module("finance.migrations.0009_populate_financialsummary")
+        with connection.schema_editor(atomic=False) as schema_editor:
+            migration.populate_summaries(apps, schema_editor)
+
+        self.assertEqual(FinancialSummary.objects.period_totals(period), expected)
+        self.assertEqual(expected.total_incomes, Decimal(78))
+        self.assertEqual(FinancialSummary.objects.filter(period=period).count(), 24)
+
+
+class DataVersionTests(TestCase):
+    """Data versions are shared through the database, not through each process's cache."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="versioned")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def etag(self):
+        response = self.client.get("/finance/periods/")
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_version_outlives_the_process_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version(self.user.pk)
+        etag = self.etag()
+        # Another worker starts with an empty local cache and must agree on the version
+        summary_cache().clear()
+        self.assertEqual(self.client.get("/finance/periods/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_maintenance_commands_bump_versions(self):
+        for command in ("populate_summary_table", "backfill_record_owner", "backfill_record_period"):
+            etag = self.etag()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command(command, stdout=StringIO())
+            response = self.client.get("/finance/periods/", HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, command)
+
+    def test_roll_over_year_reaches_the_web_processes(self):
+        Period.objects.create(user=self.user, title="2020")
+        etag = self.etag()
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("roll_over_year", year=2021, stdout=StringIO())
+        summary_cache().clear()
+        response = self.client.get("/finance/periods/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("2021", [period["title"] for period in response.json()])
+
+
+class SignupTests(TestCase):
+    """handle_new_user provisions a new user with fixed queries, together with the user or not at all."""
+
+    def signup(self):
+        return APIClient().post("/finance/users/", {"username": "new", "password": "a-Pass-1234"}, format="json")
+
+    def test_provisioning_runs_a_fixed_number_of_queries(self):
+        # Username check, user, period get_or_create (2), cycles, token, category, the data
+        # version bump at commit, and the savepoints of the nested atomic blocks (6)
+        with self.assertNumQueries(14), self.captureOnCommitCallbacks(execute=True):
+            response = self.signup()
+        self.assertEqual(response.status_code, 201, response.content)
+        user = User.objects.get(username="new")
+        self.assertEqual(Period.objects.get(user=user).cycles.count(), 12)
+        self.assertTrue(Token.objects.filter(user=user).exists())
+        self.assertTrue(Category.objects.filter(user=user, code="DEFAULT").exists())
+        self.assertEqual(DataVersion.objects.get(user=user).version, 1)
+
+    def test_failed_provisioning_rolls_back_the_user(self):
+        with mock.patch.object(Token.objects, "create", side_effect=DatabaseError("token table is gone")):
+            with self.assertRaises(DatabaseError):
+                self.signup()
+        self.assertFalse(User.objects.filter(username="new").exists())
+        self.assertFalse(Period.objects.filter(user__username="new").exists())
+
+
+class AsyncCycleListTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # No records and no committed write yet: zero totals and no Last-Modified time
+        cls.user = User.objects.create(username="async-new-user")
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_matches_sync_list(self, query=""):
+        expected = self.client.get(f"/finance/cycles/{query}")
+        with mock.patch("finance.async_views.FirebaseAuthentication.authenticate", return_value=(self.user, None)):
+            response = async_to_sync(AsyncClient().get)(f"/finance/async/cycles/{query}")
+        self.assertEqual(response.status_code, expected.status_code, query)
+        self.assertEqual(json.loads(response.content), expected.json(), query)
+        return expected.json()
+
+    def test_matches_sync_list_for_a_new_user(self):
+        self.assertEqual(len(self.assert_matches_sync_list()), 12)
+
+    def test_period_filter(self):
+        period = Period.objects.create(user=self.user, title="2020")
+        period.create_cycles()
+        self.assertEqual(len(self.assert_matches_sync_list()), 24)
+        cycles = self.assert_matches_sync_list(f"?period={period.pk}")
+        self.assertEqual({cycle["period"]["title"] for cycle in cycles}, {"2020"})
+        self.assertEqual(len(cycles), 12)
+
+    def test_invalid_period_is_a_bad_request(self):
+        self.assertIn("period", self.assert_matches_sync_list("?period=not-a-uuid"))
+        with mock.patch("finance.async_views.FirebaseAuthentication.authenticate", return_value=(self.user, None)):
+            response = async_to_sync(AsyncClient().get)("/finance/async/cycles/?period=not-a-uuid")
+        self.assertEqual(response.status_code, 400)
+
+    def test_sparse_fields(self):
+        cycles = self.assert_matches_sync_list("?fields=id,month")
+        self.assertEqual({key for cycle in cycles for key in cycle}, {"id", "month"})
+        cycles = self.assert_matches_sync_list(f"?omit={','.join(CycleSerializer.totals_fields)}")
+        self.assertEqual({key for cycle in cycles for key in cycle}, {"id", "month", "name", "period"})
+
+
+class RecordBackfillMigrationTests(TestCase):
+    """Migrations 0011 and 0012 fill the owner and period of records that predate the columns."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="backfilled")
+        category = Category.objects.create(user=cls.user, name="Rent")
+        cls.period = Period.objects.create(user=cls.user, title="2020")
+        cls.period.create_cycles()
+        FinancialRecord.objects.bulk_create(
+            FinancialRecord(cycle=cycle, category=category, type_choice=FinancialRecord.EXPENSES,
+                            current_amount=Decimal(10), planned_amount=Decimal(10))
+            for cycle in cls.period.cycles.all()
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def run_migration(self, name, function):
+        with connection.schema_editor(atomic=False) as schema_editor:
+            getattr(import_module(f"finance.migrations.{name}"), function)(apps, schema_editor)
+
+    def test_owner_backfill(self):
+        FinancialRecord.objects.update(user=None)
+        url = f"/finance/financial_records/?period={self.period.pk}"
+        self.assertEqual(self.client.get(url).json()["results"], [])
+
+        self.run_migration("0011_backfill_financialrecord_user", "backfill_owners")
+        self.assertEqual(len(self.client.get(url).json()["results"]), 12)
+
+    def test_period_backfill(self):
+        # Records from before 0014 made the column NOT NULL (the DDL is rolled back with the test).
+        # Deferred foreign key checks must fire first, or the table can't be altered
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+            cursor.execute('ALTER TABLE "finance_financialrecord" ALTER COLUMN "period_id" DROP NOT NULL')
+            cursor.execute("SET CONSTRAINTS ALL DEFERRED")
+        FinancialRecord.objects.update(period=None)
+        self.assertEqual(FinancialRecord.objects.filter(period=self.period).count(), 0)
+
+        self.run_migration("0012_backfill_financialrecord_period", "backfill_periods")
+        self.assertEqual(FinancialRecord.objects.filter(period=self.period).count(), 12)
+        self.assertEqual(self.period.totals().total_expenses, Decimal(120))
+
+    def test_period_is_required(self):
+        with self.assertRaises(IntegrityError):
+            FinancialRecord.objects.update(period=None)
+
+
+class RecordCursorPaginationTests(TestCase):
+    """Keyset pages must walk (date, created_at, id) in order, both ways, with undated rows last."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username="paged")
+        category = Category.objects.create(user=cls.user, name="Groceries")
+        period = Period.objects.create(user=cls.user, title="2020")
+        period.create_cycles()
+        cycle = period.cycles.get(month=1)
+        days = [date(2020, 1, 1)] * 4 + [date(2020, 1, 2)] * 3 + [None] * 4
+        FinancialRecord.objects.bulk_create(
+            FinancialRecord(cycle=cycle, category=category, date=day, current_amount=Decimal(1)) for day in days
+        )
+        # Ties on created_at inside a date and among undated records, broken by id
+        tied = timezone.now()
+        FinancialRecord.objects.filter(cycle=cycle, date=date(2020, 1, 1)).update(created_at=tied)
+        FinancialRecord.objects.filter(cycle=cycle, date__isnull=True).update(created_at=tied)
+        records = FinancialRecord.objects.filter(cycle=cycle)
+        cls.url = f"/finance/financial_records/?cycle={cycle.pk}&page_size=3"
+        cls.expected = [
+            str(record.pk)
+            for record in sorted(records, key=lambda r: (r.date is None, r.date or date.min, r.created_at, str(r.pk)))
+        ]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            page = self.client.get(url).json()
+            pages.append([record["id"] for record in page["results"]])
+            url = page[link]
+        return pages
+
+    def test_forward_and_backward(self):
+        forward = self.walk(self.url, "next")
+        self.assertEqual([pk for page in forward for pk in page], self.expected)
+        self.assertEqual([len(page) for page in forward], [3, 3, 3, 2])
+
+        last = self.client.get(self.url).json()
+        for _ in range(len(forward) - 1):
+            last = self.client.get(last["next"]).json()
+        backward = self.walk(last["previous"], "previous")
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_tampered_cursor(self):
+        for position in (["2020-01-01", "2020-01-01T00:00:00+00:00", 7, 0], 7, ["x", None, None, 0], "[]"):
+            cursor = urlsafe_b64encode(json.dumps(position).encode()).decode()
+            response = self.client.get(f"{self.url}&cursor={cursor}")
+            self.assertEqual(response.status_code, 404, position)
+        self.assertEqual(self.client.get(f"{self.url}&cursor=not-base64!").status_code, 404)
+
+
+class RollupTestCase(TestCase):
+    """Two users with a year of records each, and a check that the rollup matches the records."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.period, cls.categories = cls.create_account("owner")
+        cls.other, cls.other_period, cls.other_categories = cls.create_account("other")
+
+    @staticmethod
+    def create_account(username):
+        user = User.objects.create(username=username)
+        categories = [Category.objects.create(user=user, name=name) for name in ("Salary", "Rent")]
+        period = Period.objects.create(user=user, title="2020")
+        period.create_cycles()
+        records = [
+            FinancialRecord(cycle=cycle, category=category, type_choice=type_choice,
+                            current_amount=Decimal(cycle.month * 10 + n), planned_amount=Decimal(100))
+            for cycle in period.cycles.all()
+            for category, type_choice in zip(categories, (FinancialRecord.INCOME, FinancialRecord.EXPENSES))
+            for n in range(2)
+        ]
+        FinancialRecord.objects.bulk_create(records)
+        FinancialSummary.objects.add_records(records)
+        return user, period, categories
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_rollup_matches_records(self, *periods):
+        for period in periods:
+            expected = {}
+            for record in FinancialRecord.objects.filter(cycle__period=period):
+                for key in ((record.cycle_id, record.category_id), (record.cycle_id, None)):
+                    count, totals = expected.get(key, (0, Totals()))
+                    expected[key] = (count + 1, totals + record.summary_delta()[(record.cycle_id, record.category_id)][1])
+            stored = {
+                (row.cycle_id, row.category_id): (row.record_count, Totals.from_aggregate(vars(row)))
+                for row in FinancialSummary.objects.filter(period=period)
+            }
+            self.assertEqual(stored, expected, period)
+
+
+class ConditionalGetTests(RollupTestCase):
+    """ETags of the summary reads: 304 without the aggregates, new tags after writes and per representation."""
+
+    def urls(self):
+        return ["/finance/periods/", "/finance/cycles/", "/finance/report-data/",
+                f"/finance/periods/{self.period.pk}/summary/", f"/finance/periods/{self.period.pk}/",
+                f"/finance/cycles/{self.period.cycles.get(month=1).pk}/"]
+
+    def test_unchanged_data_is_not_modified(self):
+        for url in self.urls():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            # Only the data version lookup runs
+            with self.assertNumQueries(1):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+            self.assertEqual(response.status_code, 304, url)
+
+    def test_record_write_changes_the_etag(self):
+        urls = self.urls()
+        etags = {url: self.client.get(url)["ETag"] for url in urls}
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post("/finance/financial_records/", {
+                "cycle": str(self.period.cycles.get(month=1).pk), "category": self.categories[0].pk,
+                "type_choice": FinancialRecord.INCOME, "current_amount": "1.00", "planned_amount": "0.00",
+            }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        for url in urls:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etags[url])
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response["ETag"], etags[url], url)
+
+    def test_representations_have_their_own_etags(self):
+        full = self.client.get("/finance/periods/")
+        sparse = self.client.get("/finance/periods/?fields=id,title", HTTP_IF_NONE_MATCH=full["ETag"])
+        self.assertEqual(sparse.status_code, 200)
+        self.assertNotEqual(sparse["ETag"], full["ETag"])
+
+        report = self.client.get("/finance/report-data/")
+        stream = self.client.get(
+            "/finance/report-data/", HTTP_ACCEPT="application/x-ndjson", HTTP_IF_NONE_MATCH=report["ETag"]
+        )
+        self.assertEqual(stream.status_code, 200)
+        self.assertNotEqual(stream["ETag"], report["ETag"])
+        self.assertEqual(stream["Content-Type"], "application/x-ndjson")
+
+
+class SparseFieldsTests(RollupTestCase):
+    """?fields= / ?omit= / ?expand= narrow both the payload and the queries behind it."""
+
+    def setUp(self):
+        super().setUp()
+        summary_cache().clear()
+
+    def test_period_fields_skip_totals_and_cycles(self):
+        # The data version lookup, then the periods alone
+        with self.assertNumQueries(2):
+            response = self.client.get("/finance/periods/?fields=id,title")
+        self.assertEqual({key for period in response.json() for key in period}, {"id", "title"})
+
+    def test_period_expand_cycles(self):
+        with self.assertNumQueries(4):
+            response = self.client.get("/finance/periods/?fields=id,title&expand=cycles")
+        periods = {period["title"]: period for period in response.json()}
+        self.assertEqual(set(periods["2020"]), {"id", "title", "cycles"})
+        self.assertEqual(len(periods["2020"]["cycles"]), 12)
+        self.assertEqual(periods["2020"]["cycles"][0]["total_incomes"], 21.0)
+
+    def test_period_omit_cycles(self):
+        with self.assertNumQueries(3):
+            response = self.client.get("/finance/periods/?omit=cycles")
+        period = next(period for period in response.json() if period["title"] == "2020")
+        self.assertNotIn("cycles", period)
+        self.assertEqual(period["total_incomes"], sum(month * 20 + 1 for month in range(1, 13)))
+
+    def test_cycle_omit_totals_skips_with_totals(self):
+        totals = ",".join(CycleSerializer.totals_fields)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/finance/cycles/?omit={totals}")
+        self.assertEqual(len(queries), 2)
+        self.assertFalse(any("total_incomes" in query["sql"] for query in queries))
+        self.assertEqual({key for cycle in response.json() for key in cycle}, {"id", "month", "name", "period"})
+
+    def test_record_stream_fields(self):
+        for query, keys in (("fields=id,current_amount", {"id", "current_amount"}),
+                            ("omit=diff_planned_actual,created_at,updated_at", set(FinancialRecordSerializer.Meta.fields)
+                             - {"diff_planned_actual", "created_at", "updated_at"})):
+            response = self.client.get(f"/finance/financial_records/?stream=1&period={self.period.pk}&{query}")
+            lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+            self.assertEqual(len(lines), 48)
+            self.assertEqual({key for line in lines for key in line}, keys, query)
+
+
+class ReportDataTests(RollupTestCase):
+    """The report payload keeps the values and order it had when it was computed from the records."""
+
+    @staticmethod
+    def record_totals(records, zero, hundred):
+        """A period's or cycle's report values as its model methods computed them from `records`."""
+        def total(field, type_choice):
+            return records.filter(type_choice=type_choice).aggregate(total=Sum(field))["total"] or zero
+
+        def percentage(planned, current):
+            return zero if planned == 0 else (planned - current) / planned * hundred
+
+        incomes = total("current_amount", FinancialRecord.INCOME)
+        expenses = total("current_amount", FinancialRecord.EXPENSES)
+        planned_incomes = total("planned_amount", FinancialRecord.INCOME)
+        planned_expenses = total("planned_amount", FinancialRecord.EXPENSES)
+        return {
+            "total_incomes": incomes,
+            "total_expenses": expenses,
+            "net_income": incomes - expenses,
+            "planned_incomes": planned_incomes,
+            "planned_expenses": planned_expenses,
+            "planned_net_income": planned_incomes - planned_expenses,
+            "income_difference_value": planned_incomes - incomes,
+            "income_difference_percentage": percentage(planned_incomes, incomes),
+            "expense_difference_value": planned_expenses - expenses,
+            "expense_difference_percentage": percentage(planned_expenses, expenses),
+            "net_income_difference_value": (planned_incomes - planned_expenses) - (incomes - expenses),
+            "net_income_difference_percentage": percentage(planned_incomes - planned_expenses, incomes - expenses),
+        }
+
+    def record_report(self, user):
+        """The report as ReportDataView built it from the records, in the order rows were created."""
+        income, expense = FinancialRecord.INCOME, FinancialRecord.EXPENSES
+        return {
+            "period_data": [
+                {"title": period.title,
+                 **self.record_totals(FinancialRecord.objects.filter(cycle__period=period), 0, 100)}
+                for period in Period.objects.filter(user=user).order_by("created_at", "id")
+            ],
+            "cycle_data": [
+                {"id": cycle.id, "name": cycle.name, "period_title": cycle.period.title,
+                 **self.record_totals(cycle.financial_records.all(), Decimal("0.00"), Decimal("100.00")),
+                 "categories": list(cycle.financial_records.values("category__name").annotate(
+                     total_income=Sum("current_amount", filter=Q(type_choice=income)),
+                     total_expense=Sum("current_amount", filter=Q(type_choice=expense)),
+                 ))}
+                for cycle in Cycle.objects.filter(period__user=user).order_by("period__created_at", "period_id", "month")
+            ],
+            "category_data": list(Category.objects.filter(user=user).annotate(
+                total_income=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice=income)),
+                total_expense=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice=expense)),
+            ).values("name", "code", "total_income", "total_expense")),
+        }
+
+    @staticmethod
+    def rendered(payload):
+        """The payload as JSON, with floats kept apart from ints and unordered lists sorted."""
+        data = json.loads(payload, parse_float=str)
+        for cycle in data["cycle_data"]:
+            cycle["categories"].sort(key=lambda category: category["category__name"])
+        data["category_data"].sort(key=lambda category: category["name"])
+        return data
+
+    def test_payload_matches_the_records(self):
+        Category.objects.create(user=self.user, name="Gifts")
+        summary_cache().clear()
+        response = self.client.get("/finance/report-data/")
+        self.assertEqual(response.status_code, 200)
+        report = self.rendered(response.content)
+        self.assertEqual(report, self.rendered(JSONRenderer().render(self.record_report(self.user))))
+
+        # The signup period, created first, has no records: its sums and percentages are int 0
+        periods = report["period_data"]
+        self.assertEqual([period["title"] for period in periods], [str(timezone.now().year), "2020"])
+        self.assertEqual(periods[0]["total_incomes"], 0)
+        self.assertEqual(periods[0]["income_difference_percentage"], 0)
+        # Salary only holds incomes, Gifts holds nothing
+        categories = {category["name"]: category for category in report["category_data"]}
+        self.assertIsNone(categories["Salary"]["total_expense"])
+        self.assertIsNone(categories["Gifts"]["total_income"])
+        january = next(cycle for cycle in report["cycle_data"] if cycle["period_title"] == "2020")
+        self.assertEqual(january["categories"], [
+            {"category__name": "Rent", "total_income": None, "total_expense": "21.0"},
+            {"category__name": "Salary", "total_income": "21.0", "total_expense": None},
+        ])
+
+
+class NDJSONStreamTests(RollupTestCase):
+    """Streamed responses carry, line by line, the same rows as the regular JSON responses."""
+
+    def stream_lines(self, url, **headers):
+        response = self.client.get(url, HTTP_ACCEPT="application/x-ndjson", **headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        content = b"".join(response.streaming_content)
+        self.assertTrue(content.endswith(b"\n"))
+        return [json.loads(line, parse_float=str) for line in content.split(b"\n")[:-1]]
+
+    def test_report_stream(self):
+        summary_cache().clear()
+        report = json.loads(self.client.get("/finance/report-data/").content, parse_float=str)
+        lines = self.stream_lines("/finance/report-data/")
+        self.assertEqual(len(lines), sum(len(rows) for rows in report.values()))
+        streamed = {}
+        for line in lines:
+            self.assertEqual(set(line), {"section", "row"})
+            streamed.setdefault(line["section"], []).append(line["row"])
+        # Sections come whole and in order, and the merge-joined breakdown matches each cycle's
+        self.assertEqual(list(streamed), ["period_data", "cycle_data", "category_data"])
+        self.assertEqual(streamed, report)
+        for cycle in streamed["cycle_data"]:
+            names = {category["category__name"] for category in cycle["categories"]}
+            self.assertEqual(names, {"Salary", "Rent"} if cycle["period_title"] == "2020" else set(), cycle["id"])
+
+    def test_record_stream(self):
+        url = f"/finance/financial_records/?period={self.period.pk}"
+        page = json.loads(self.client.get(url).content, parse_float=str)
+        self.assertIsNone(page["next"])
+        lines = self.stream_lines(url)
+        self.assertEqual(len(lines), 48)
+        self.assertEqual(sorted(lines, key=lambda record: record["id"]),
+                         sorted(page["results"], key=lambda record: record["id"]))
+        self.assertEqual(lines, self.stream_lines(url.replace("?", "?stream=1&")))
+
+    def test_errors_are_negotiated_as_one_line(self):
+        self.client.force_authenticate(None)
+        response = self.client.get("/finance/report-data/", HTTP_ACCEPT="application/x-ndjson")
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertEqual(response.content.count(b"\n"), 1)
+        self.assertIn("detail", json.loads(response.content))
+
+
+class BulkRecordOperationTests(RollupTestCase):
+    """bulk_delete / bulk_assign / bulk_assign_each: counts, user scoping and the rollup."""
+
+    def test_bulk_delete(self):
+        cycle = self.period.cycles.get(month=3)
+        record = FinancialRecord.objects.filter(cycle=cycle).first()
+        FinancialRecordFile.objects.create(financial_record=record, file_url="https://example.com/a.pdf")
+
+        response = self.client.post("/finance/financial_records/bulk-delete/", {"cycle": str(cycle.pk)}, format="json")
+        self.assertEqual(response.json(), {"deleted": 4})
+        self.assertFalse(FinancialRecord.objects.filter(cycle=cycle).exists())
+        self.assertFalse(FinancialRecordFile.objects.exists())
+
+        # Another user's cycle selects nothing of theirs
+        other_cycle = self.other_period.cycles.get(month=3)
+        response = self.client.post(
+            "/finance/financial_records/bulk-delete/", {"cycle": str(other_cycle.pk)}, format="json"
+        )
+        self.assertEqual(response.json(), {"deleted": 0})
+        self.assertEqual(FinancialRecord.objects.filter(cycle=other_cycle).count(), 4)
+        self.assert_rollup_matches_records(self.period, self.other_period)
+        self.assertEqual(FinancialSummary.objects.filter(cycle=cycle).count(), 0)
+
+    def test_bulk_assign(self):
+        rent = self.categories[1]
+        response = self.client.post("/finance/financial_records/bulk-update/", {
+            "filter": {"category": rent.pk, "period": str(self.period.pk)},
+            "fields": {"planned_amount": "7.50", "category": self.categories[0].pk},
+        }, format="json")
+        self.assertEqual(response.json(), {"updated": 24})
+        self.assertFalse(FinancialRecord.objects.filter(category=rent).exists())
+        self.assert_rollup_matches_records(self.period, self.other_period)
+
+    def test_bulk_assign_each(self):
+        source = self.period.cycles.get(month=1)
+        target = self.period.cycles.get(month=2)
+        first, second = FinancialRecord.objects.filter(cycle=source)[:2]
+        foreign = FinancialRecord.objects.filter(user=self.other).first()
+        response = self.client.post("/finance/financial_records/bulk-update/", {"updates": [
+            {"id": str(first.pk), "fields": {"current_amount": "1000.00"}},
+            {"id": str(second.pk), "fields": {"cycle": str(target.pk), "type_choice": FinancialRecord.EXPENSES}},
+            {"id": str(foreign.pk), "fields": {"current_amount": "1.00"}},
+        ]}, format="json")
+        self.assertEqual(response.json(), {"updated": 2})
+
+        first.refresh_from_db()
+        second.refresh_from_db()
+        foreign_amount = foreign.current_amount
+        foreign.refresh_from_db()
+        self.assertEqual(first.current_amount, Decimal("1000.00"))
+        self.assertEqual((second.cycle_id, second.period_id), (target.pk, self.period.pk))
+        self.assertEqual(foreign.current_amount, foreign_amount)
+        self.assert_rollup_matches_records(self.period, self.other_period)
+
+
+class CascadeDeleteTests(RollupTestCase):
+    """Deleting a period or cycle leaves its records' summary deltas and version bumps to the cascade."""
+
+    def delete(self, url):
+        """Delete `url`, committing, and return the statements it ran."""
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(url)
+        self.assertEqual(response.status_code, 204, response.content)
+        return [query["sql"] for query in queries]
+
+    def assert_no_record_deltas_and_one_bump(self, statements):
+        summary, version = FinancialSummary._meta.db_table, DataVersion._meta.db_table
+        self.assertFalse([sql for sql in statements if sql.startswith("UPDATE") and summary in sql])
+        self.assertEqual(len([sql for sql in statements if sql.startswith("INSERT") and version in sql]), 1)
+
+    def test_cycle_delete_costs_the_same_for_any_record_count(self):
+        january, february = self.period.cycles.get(month=1), self.period.cycles.get(month=2)
+        records = [
+            FinancialRecord(cycle=february, category=self.categories[0], type_choice=FinancialRecord.INCOME,
+                            current_amount=Decimal(n), planned_amount=Decimal(0))
+            for n in range(40)
+        ]
+        FinancialRecord.objects.bulk_create(records)
+        FinancialSummary.objects.add_records(records)
+
+        few = self.delete(f"/finance/cycles/{january.pk}/")
+        many = self.delete(f"/finance/cycles/{february.pk}/")
+        self.assertEqual(len(many), len(few))
+        self.assert_no_record_deltas_and_one_bump(many)
+        self.assertFalse(FinancialSummary.objects.filter(cycle__in=[january, february]).exists())
+        self.assert_rollup_matches_records(self.period)
+
+    def test_period_delete_bumps_the_version_once(self):
+        version = DataVersion.objects.filter(user=self.user).values_list("version", flat=True).first() or 0
+        statements = self.delete(f"/finance/periods/{self.period.pk}/")
+        self.assert_no_record_deltas_and_one_bump(statements)
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version + 1)
+        self.assertFalse(FinancialSummary.objects.filter(period__user=self.user).exists())
+        self.assert_rollup_matches_records(self.other_period)
+
+
+class PopulateSummaryCommandTests(RollupTestCase):
+    """populate_summary_table --since rebuilds what changed since, including cycles records left."""
+
+    def populate(self, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("populate_summary_table", stdout=StringIO(), **options)
+
+    def test_since_rebuilds_cycles_of_users_changed_since(self):
+        FinancialRecord.objects.update(updated_at=timezone.now() - timezone.timedelta(days=30))
+        since = (timezone.now() - timezone.timedelta(days=1)).isoformat()
+        # Both users' March rows drift, as after a delete whose delta was lost; only the owner
+        # wrote since, which leaves their data version, not any record, newer than --since
+        FinancialSummary.objects.filter(cycle__month=3).update(total_incomes=Decimal(999))
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_data_version(self.user.pk)
+
+        self.populate(since=since)
+        self.assert_rollup_matches_records(self.period)
+        self.assertEqual(
+            FinancialSummary.objects.get(cycle__period=self.other_period, cycle__month=3, category=None).total_incomes,
+            Decimal(999),
+        )
+
+    def test_since_rebuilds_cycles_with_updated_records(self):
+        FinancialRecord.objects.update(updated_at=timezone.now() - timezone.timedelta(days=30))
+        FinancialSummary.objects.all().delete()
+        record = FinancialRecord.objects.filter(cycle__period=self.other_period, cycle__month=5).first()
+        FinancialRecord.objects.filter(pk=record.pk).update(updated_at=timezone.now())
+
+        self.populate(since=(timezone.now() - timezone.timedelta(days=1)).date().isoformat())
+        self.assertEqual(set(FinancialSummary.objects.values_list("cycle_id", flat=True)), {record.cycle_id})
+
+
+class PopulateSummaryWorkersTests(TransactionTestCase):
+    """populate_summary_table --workers rebuilds every chunk, each on its own thread and connection."""
+
+    def test_workers_rebuild_every_user(self):
+        periods = [RollupTestCase.create_account(f"user-{index}")[1] for index in range(3)]
+        FinancialSummary.objects.all().delete()
+        out = StringIO()
+        call_command("populate_summary_table", workers=2, chunk_size=1, stdout=out)
+        self.assertEqual(out.getvalue().count(" summary rows written"), 3)
+        self.assertIn("(108 rows written)", out.getvalue())
+        for period in periods:
+            RollupTestCase.assert_rollup_matches_records(self, period)
+
+
+class RecordCopyTests(RollupTestCase):
+    """copy_to's INSERT ... SELECT: counts, copied values, user scoping and the rollup."""
+
+    def test_copy_between_cycles(self):
+        source = self.period.cycles.get(month=1)
+        target = self.period.cycles.get(month=2)
+        response = self.client.post("/finance/app/copy/", {
+            "previous_cycle_id": str(source.pk), "current_cycle_id": str(target.pk), "return_ids": True,
+        }, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["copied"], 4)
+
+        copies = FinancialRecord.objects.filter(pk__in=response.json()["ids"])
+        self.assertEqual(copies.count(), 4)
+        for copy in copies:
+            self.assertEqual((copy.cycle_id, copy.period_id, copy.user_id), (target.pk, self.period.pk, self.user.pk))
+            self.assertEqual((copy.current_amount, copy.planned_amount, copy.date), (Decimal(0), Decimal(100), None))
+        self.assertEqual(FinancialRecord.objects.filter(cycle=target).count(), 8)
+        self.assert_rollup_matches_records(self.period, self.other_period)
+
+    def test_copy_previous_month_keeps_amounts(self):
+        source = self.period.cycles.get(month=5)
+        target = self.period.cycles.get(month=6)
+        response = self.client.post("/finance/financial_records/copy-previous-month/", {
+            "previous_cycle_id": str(source.pk), "current_cycle_id": str(target.pk), "firebase_uid": "uid-1",
+        }, format="json")
+        self.assertEqual(response.json()["copied"], 4)
+        copied = FinancialRecord.objects.filter(cycle=target, firebase_uid="uid-1")
+        self.assertEqual(
+            sorted(copied.values_list("current_amount", flat=True)),
+            sorted(FinancialRecord.objects.filter(cycle=source).values_list("current_amount", flat=True)),
+        )
+        self.assert_rollup_matches_records(self.period)
+
+    def test_other_users_cycles_are_rejected(self):
+        own = self.period.cycles.get(month=1)
+        foreign = self.other_period.cycles.get(month=1)
+        for source, target in ((foreign, own), (own, foreign)):
+            response = self.client.post("/finance/app/copy/", {
+                "previous_cycle_id": str(source.pk), "current_cycle_id": str(target.pk),
+            }, format="json")
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(FinancialRecord.objects.count(), 96)
+
+    def test_copy_into_many_cycles(self):
+        source = self.period.cycles.get(month=1)
+        targets = list(self.period.cycles.filter(month__gt=9))
+        copied = FinancialRecord.objects.filter(cycle=source, user=self.user).copy_to(targets)
+        self.assertEqual(copied, 12)
+        for target in targets:
+            self.assertEqual(FinancialRecord.objects.filter(cycle=target).count(), 8)
+        self.assert_rollup_matches_records(self.period, self.other_period)
+
+
+class BatchCreateTests(RollupTestCase):
+    """The batch create endpoint: per-item errors, user scoping, the rollup and the data version."""
+
+    def item(self, month=1, category=None, **values):
+        return {
+            "cycle": str(self.period.cycles.get(month=month).pk), "category": (category or self.categories[0]).pk,
+            "type_choice": FinancialRecord.INCOME, "current_amount": "5.00", **values,
+        }
+
+    def batch(self, records, **options):
+        return self.client.post("/finance/financial_records/batch/", {"records": records, **options}, format="json")
+
+    def test_creates_records_updating_rollup_and_version(self):
+        version = DataVersion.objects.filter(user=self.user).values_list("version", flat=True).first() or 0
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.batch([self.item(1), self.item(2), self.item(2, self.categories[1], type_choice="expenses")])
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(len(response.json()["created"]), 3)
+        self.assertEqual(response.json()["errors"], [])
+        self.assertEqual(FinancialRecord.objects.filter(user=self.user).count(), 51)
+        self.assert_rollup_matches_records(self.period)
+        self.assertEqual(DataVersion.objects.get(user=self.user).version, version + 1)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        counts = []
+        for size in (2, 40):
+            records = [self.item(1, self.categories[n % 2]) for n in range(size)]
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual(self.batch(records).status_code, 201)
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_errors_are_reported_per_index(self):
+        records = [
+            self.item(1),
+            {**self.item(1), "cycle": str(self.other_period.cycles.get(month=1).pk)},
+            self.item(1, self.other_categories[0]),
+            self.item(1, current_amount="lots"),
+            self.item(1, period=str(self.other_period.pk)),
+        ]
+        response = self.batch(records)
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual([error["index"] for error in errors], [1, 2, 3, 4])
+        self.assertEqual(list(errors[0]["errors"]), ["cycle"])
+        self.assertEqual(list(errors[1]["errors"]), ["category"])
+        self.assertEqual(list(errors[2]["errors"]), ["current_amount"])
+        self.assertEqual(list(errors[3]["errors"]), ["period"])
+        self.assertEqual(FinancialRecord.objects.count(), 96)
+
+        response = self.batch(records, skip_invalid=True)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()["created"]), 1)
+        self.assertEqual([error["index"] for error in response.json()["errors"]], [1, 2, 3, 4])
+        self.assertEqual(FinancialRecord.objects.count(), 97)
+        self.assertEqual(FinancialRecord.objects.filter(user=self.other).count(), 48)
+
+    def test_items_of_frozen_periods_are_item_errors(self):
+        self.period.archive()
+        open_period = Period.objects.create(user=self.user, title="2021")
+        open_period.create_cycles()
+        records = [self.item(1), {**self.item(1), "cycle": str(open_period.cycles.get(month=1).pk)}]
+        self.assertEqual(self.batch(records).status_code, 400)
+
+        response = self.batch(records, skip_invalid=True)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["errors"], [
+            {"index": 0, "errors": {"cycle": ["The financial records of an archived period can't be changed."]}},
+        ])
+        self.assertEqual(FinancialRecord.objects.filter(period=open_period).count(), 1)
+
+    def test_batch_size_is_limited(self):
+        response = self.batch([self.item(1)] * 10001)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("records", response.json())
+        self.assertEqual(FinancialRecord.objects.count(), 96)
+
+
+class StatementImportTests(TestCase):
+    def test_bad_amounts_and_rows_are_skipped(self):
+        user = User.objects.create(username="importer")
+        statement = "\n".join([
+            "date,amount,description",
+            "2024-01-01,1.005,rounded",
+            "2024-01-02,NaN,not a number",
+            "2024-01-03,-Infinity,infinite",
+            "2024-01-04,123456789012.34,too many digits",
+            "2024-01-05,1e400,huge exponent",
+            f'2024-01-06,1,"{"x" * (csv.field_size_limit() + 1)}"',
+            "2024-01-07,-20.50,kept",
+        ])
+        result = import_statement(user, read_statement(BytesIO(statement.encode()), "csv"), chunk_size=1)
+
+        self.assertEqual((result.rows, result.created, result.skipped), (7, 2, 5))
+        self.assertEqual([error["line"] for error in result.errors], [3, 4, 5, 6, 7])
+        amounts = FinancialRecord.objects.filter(user=user).order_by("date").values_list("current_amount", "type_choice")
+        self.assertEqual(list(amounts), [
+            (Decimal("1.01"), FinancialRecord.INCOME), (Decimal("20.50"), FinancialRecord.EXPENSES),
+        ])
+
+    def test_decimal_separators(self):
+        user = User.objects.create(username="separators")
+        statement = 'date,amount\n2024-01-01,"12,50"\n2024-01-02,"1,234.56"\n2024-01-03,"1.234,56"\n2024-01-04,"-0.5"\n'
+        for separator, expected, errors in (
+            (".", [Decimal("1234.56"), Decimal("0.50")], [2, 4]),
+            (",", [Decimal("12.50"), Decimal("1234.56")], [3, 5]),
+        ):
+            FinancialRecord.objects.filter(user=user).delete()
+            result = import_statement(user, read_statement(BytesIO(statement.encode()), "csv", "%Y-%m-%d", separator))
+            self.assertEqual([error["line"] for error in result.errors], errors, separator)
+            amounts = FinancialRecord.objects.filter(user=user).order_by("date").values_list("current_amount", flat=True)
+            self.assertEqual(list(amounts), expected, separator)
+
+    def test_ofx_comma_amounts(self):
+        user = User.objects.create(username="ofx")
+        statement = "<OFX><STMTTRN><DTPOSTED>20240105<TRNAMT>-12,50<NAME>Shop</STMTTRN></OFX>"
+        import_statement(user, read_statement(BytesIO(statement.encode()), "ofx"))
+        self.assertEqual(FinancialRecord.objects.get(user=user).current_amount, Decimal("12.50"))
+
+    def test_rows_of_frozen_periods_are_skipped(self):
+        user = User.objects.create(username="rolled-over")
+        Period.objects.create(user=user, title="2023").create_cycles()
+        Period.objects.get(user=user, title="2023").archive()
+        statement = "date,amount\n2023-12-30,-1\n2024-01-02,-2\n2023-12-31,-3\n"
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+        response = self.client.post("/finance/financial_records/import/", {
+            "file": BytesIO(statement.encode()),
+        }, format="multipart")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json(), {"rows": 3, "created": 1, "skipped": 2, "errors": [
+            {"line": 2, "error": "Period 2023 is archived."}, {"line": 4, "error": "Period 2023 is archived."},
+        ]})
+        self.assertEqual(list(FinancialRecord.objects.filter(user=user).values_list("period__title", flat=True)), ["2024"])
+
+
+class BackupRestoreTests(RollupTestCase):
+    def backup_lines(self, user):
+        return [json.loads(line) for line in b"".join(iter_backup_lines(user)).splitlines()]
+
+    @staticmethod
+    def compress(lines):
+        return gzip.compress(b"".join(json.dumps(line, cls=DjangoJSONEncoder).encode() + b"\n" for line in lines))
+
+    def restore(self, lines, **options):
+        return self.client.post(
+            "/finance/backup/", {"file": BytesIO(self.compress(lines)), **options}, format="multipart"
+        )
+
+    def test_restoring_again_inserts_nothing(self):
+        record = FinancialRecord.objects.filter(user=self.user).first()
+        FinancialRecordFile.objects.create(financial_record=record, file_url="https://example.com/a.pdf")
+        lines = self.backup_lines(self.user)
+        response = self.restore(lines)
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json(), {"category": 0, "period": 0, "cycle": 0, "record": 0, "file": 0})
+
+        FinancialRecord.objects.filter(pk=record.pk).delete()
+        response = self.restore(lines)
+        self.assertEqual(response.json()["record"], 1)
+        self.assertEqual(response.json()["file"], 1)
+        self.assert_rollup_matches_records(self.period)
+
+    def test_files_only_attach_to_own_records(self):
+        foreign = FinancialRecord.objects.filter(user=self.other).first()
+        lines = self.backup_lines(self.user) + [{"model": "file", "fields": {
+            "id": "00000000-0000-0000-0000-000000000001", "financial_record_id": str(foreign.pk),
+            "file_url": "https://example.com/planted.pdf", "uploaded_at": None,
+        }}]
+        response = self.restore(lines)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(FinancialRecordFile.objects.exists())
+
+    def test_references_outside_the_backup_are_rejected(self):
+        header, *rows = self.backup_lines(self.user)
+        foreign_cycle = self.other_period.cycles.get(month=1)
+        records = [row for row in rows if row["model"] == "record"]
+        for field, value in (("cycle_id", str(foreign_cycle.pk)), ("category_id", self.other_categories[0].pk),
+                             ("cycle_id", None)):
+            tampered = dict(records[0], fields={**records[0]["fields"], field: value})
+            response = self.restore([header, *[row for row in rows if row["model"] != "record"], tampered])
+            self.assertEqual(response.status_code, 400, (field, value))
+        self.assertEqual(FinancialRecord.objects.filter(cycle=foreign_cycle).count(), 4)
+
+    def test_records_into_frozen_periods_are_refused(self):
+        lines = self.backup_lines(self.user)
+        self.period.archive()
+        response = self.restore(lines, remap_ids=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["file"], [
+            "Period 2020 is archived in this account; unarchive it before restoring records into it.",
+        ])
+        with NamedTemporaryFile(suffix=".gz") as backup:
+            backup.write(self.compress(lines))
+            backup.flush()
+            with self.assertRaisesMessage(CommandError, "Period 2020 is archived"):
+                call_command("restore_account", self.user.username, backup.name, "--remap-ids", stdout=StringIO())
+        self.assertEqual(FinancialRecord.objects.filter(user=self.user).count(), 48)
+        # Restoring the records already there is still a no-op
+        self.assertEqual(self.restore(lines).status_code, 201)
+
+    def test_record_ids_of_another_account_are_rejected(self):
+        header, *rows = self.backup_lines(self.other)
+        self.assertEqual(self.restore([header, *rows]).status_code, 400)
+        self.assertEqual(FinancialRecord.objects.filter(user=self.user).count(), 48)
+
+
+class CycleFanOutTests(RollupTestCase):
+    def copy_to(self, source, cycles):
+        return self.client.post(
+            f"/finance/cycles/{source.pk}/copy-to/", {"cycles": [str(cycle.pk) for cycle in cycles]}, format="json"
+        )
+
+    def test_targets_resolve_in_one_query_and_count_once(self):
+        source = self.period.cycles.get(month=1)
+        few = list(self.period.cycles.filter(month__in=(2, 3)))
+        many = list(self.period.cycles.exclude(month=1))
+        with CaptureQueriesContext(connection) as few_queries:
+            self.copy_to(source, few)
+        with CaptureQueriesContext(connection) as many_queries:
+            response = self.copy_to(source, many + many + [source])
+        self.assertEqual(len(few_queries), len(many_queries))
+        self.assertEqual(response.json(), {"copied": 44})
+        # Month 4 was only a target of the second copy, listed twice
+        self.assertEqual(FinancialRecord.objects.filter(cycle__period=self.period, cycle__month=4).count(), 8)
+        self.assert_rollup_matches_records(self.period)
+
+    def test_other_users_cycles_are_rejected(self):
+        source = self.period.cycles.get(month=1)
+        response = self.copy_to(source, [self.period.cycles.get(month=2), self.other_period.cycles.get(month=2)])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(FinancialRecord.objects.filter(user=self.other).count(), 48)
+        self.assertEqual(FinancialRecord.objects.filter(cycle__month=2, user=self.user).count(), 4)
+
+
+class ArchivedRecordReadTests(RollupTestCase):
+    """Records moved to the archive table are still listed, exported and copied with their period."""
+
+    def setUp(self):
+        super().setUp()
+        self.period.archive(move_records=True)
+        self.next_period = Period.objects.create(user=self.user, title="2021")
+        self.next_period.create_cycles()
+        FinancialRecord.objects.create(
+            cycle=self.next_period.cycles.get(month=1), category=self.categories[0], date=date(2021, 1, 5),
+            type_choice=FinancialRecord.INCOME, current_amount=Decimal(1),
+        )
+
+    def list_ids(self, url):
+        ids, page = [], self.client.get(url).json()
+        while True:
+            ids += [record["id"] for record in page["results"]]
+            if page["next"] is None:
+                return ids
+            page = self.client.get(page["next"]).json()
+
+    def test_list_pages_through_both_tables(self):
+        archived = {str(pk) for pk in ArchivedFinancialRecord.objects.filter(user=self.user).values_list("pk", flat=True)}
+        ids = self.list_ids(f"/finance/financial_records/?period={self.period.pk}&page_size=7")
+        self.assertEqual(len(ids), 48)
+        self.assertEqual(set(ids), archived)
+
+        ids = self.list_ids("/finance/financial_records/?page_size=10")
+        self.assertEqual(len(set(ids)), 49)
+        # The dated record of 2021 comes before the undated archived ones
+        self.assertNotIn(ids[0], archived)
+
+    def test_stream_retrieve_and_export(self):
+        response = self.client.get(f"/finance/financial_records/?period={self.period.pk}&stream=1")
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 48)
+
+        record = ArchivedFinancialRecord.objects.filter(user=self.user).first()
+        response = self.client.get(f"/finance/financial_records/{record.pk}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["period"], str(self.period.pk))
+        foreign = ArchivedFinancialRecord.objects.create(
+            cycle=self.other_period.cycles.get(month=1), category=self.other_categories[0], period=self.other_period,
+            user=self.other, type_choice=FinancialRecord.INCOME, current_amount=Decimal(1), planned_amount=Decimal(1),
+            created_at=timezone.now(), updated_at=timezone.now(),
+        )
+        self.assertEqual(self.client.get(f"/finance/financial_records/{foreign.pk}/").status_code, 404)
+
+        response = self.client.get("/finance/financial_records/export/")
+        rows = list(csv.DictReader(StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(len(rows), 49)
+        self.assertEqual(rows[0]["period"], "2021")
+        self.assertEqual({row["period"] for row in rows[1:]}, {"2020"})
+
+    def test_clone_and_copy_read_the_archive(self):
+        response = self.client.post(f"/finance/periods/{self.period.pk}/clone/", {"title": "2022"}, format="json")
+        self.assertEqual(response.status_code, 201, response.content)
+        self.assertEqual(response.json()["copied"], 48)
+        clone = Period.objects.get(user=self.user, title="2022")
+        self.assert_rollup_matches_records(clone)
+
+        response = self.client.post("/finance/financial_records/copy-previous-month/", {
+            "previous_cycle_id": str(self.period.cycles.get(month=12).pk),
+            "current_cycle_id": str(self.next_period.cycles.get(month=1).pk),
+            "firebase_uid": "uid-1",
+        }, format="json")
+        self.assertEqual(response.json()["copied"], 4)
+        self.assert_rollup_matches_records(self.next_period)
+
+    def test_period_category_filter(self):
+        response = self.client.get(f"/finance/periods/?category={self.categories[1].pk}")
+        self.assertEqual([period["title"] for period in response.json()], ["2020"])
@@ -1,8 +1,10 @@
 
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from finance import views
-from finance.views import PeriodSummaryView, VerifyTokenView, ReportDataView, CopyFinancialRecordsView, FinancialRecordViewSet
+from finance import views, async_views
+from finance.views import (
+    PeriodSummaryView, VerifyTokenView, ReportDataView, CopyFinancialRecordsView, FinancialRecordViewSet, AccountBackupView,
+)
 # Set up the router for viewsets
 router = DefaultRouter()
 router.register('cycles', views.CycleViewSet)
@@ -19,6 +21,11 @@ urlpatterns = [
     path('verify-token/', VerifyTokenView.as_view(), name='verify-token'),
     path('report-data/', ReportDataView.as_view(), name='report_data'),
     path('app/copy/', CopyFinancialRecordsView.as_view(), name='copy-financial-records'),
+    path('backup/', AccountBackupView.as_view(), name='account-backup'),
+    # Async variants of the read-heavy endpoints (serve through gradiafinance.asgi)
+    path('async/report-data/', async_views.report_data, name='report_data_async'),
+    path('async/periods/<uuid:period_id>/summary/', async_views.period_summary, name='period-summary-async'),
+    path('async/cycles/', async_views.cycle_list, name='cycle-list-async'),
     
    
 ]
@@ -1,26 +1,40 @@
 from rest_framework import viewsets, mixins, status
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import PermissionDenied, AuthenticationFailed, APIException, NotFound
+from rest_framework.exceptions import PermissionDenied, AuthenticationFailed, APIException, NotFound, ValidationError
 from rest_framework.decorators import api_view
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.authentication import get_authorization_header
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Prefetch
 from django.db import IntegrityError
 from firebase_admin import auth as firebase_auth
 from .authentication import FirebaseAuthentication
+from .backup import BackupError, gzip_stream, iter_backup_lines, read_backup, restore_backup
+from .cache import bump_data_version, cached_summary, request_data_state
+from .conditional import conditional_on_data_version
+from .imports import StatementError, import_statement, read_statement, statement_format
+from .pagination import RecordCursorPagination
+from .reports import build_report, iter_report_lines
+from .streaming import (
+    NDJSONRenderer, csv_response, iter_financial_records, iter_financial_records_csv, ndjson_response,
+    wants_stream,
+)
 from drf_spectacular.utils import extend_schema
-from rest_framework.generics import GenericAPIView
+from rest_framework.generics import GenericAPIView, get_object_or_404
 from django.conf import settings
 from rest_framework.pagination import PageNumberPagination
 from django.contrib.auth.models import User
-from .models import Cycle, Period, FinancialRecord, Category,  FinancialRecordFile
+from .models import (
+    ArchivedFinancialRecord, Cycle, Period, FinancialRecord, Category, FinancialRecordFile, FinancialSummary,
+    FrozenPeriodError, PeriodSnapshot, check_writable, copy_records,
+)
 from django.db.models import Sum, Q
 import matplotlib.pyplot as plt
 from io import BytesIO
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from .models import Period
 from .serializers import (
     CycleSerializer,
@@ -31,7 +45,16 @@ from .serializers import (
     VerifyTokenSerializer,
     PeriodSummarySerializer, 
     CopyFinancialRecordsSerializer,
+    CopyPreviousMonthSerializer,
+    CycleFanOutSerializer,
+    PeriodCloneSerializer,
     FinancialRecordFileSerializer,
+    FinancialRecordBatchSerializer,
+    FinancialRecordBatchItemSerializer,
+    FinancialRecordFilterSerializer,
+    FinancialRecordBulkUpdateSerializer,
+    StatementImportSerializer,
+    BackupRestoreSerializer,
     
 
     
@@ -121,7 +144,22 @@ class CycleViewSet(viewsets.ModelViewSet):
         """
         if not self.request.user.is_authenticated:
             raise PermissionDenied("You must be logged in to view this resource.")
-        return Cycle.objects.filter(period__user=self.request.user)
+        queryset = Cycle.objects.filter(period__user=self.request.user)
+        # Only join and aggregate for the fields being serialized (see ?fields= / ?omit=)
+        serializer = self.get_serializer()
+        if "period" in serializer.fields:
+            queryset = queryset.select_related("period")
+        if serializer.wants_totals():
+            queryset = queryset.with_totals()
+        return queryset
+
+    @conditional_on_data_version
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_on_data_version
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
 
     @action(detail=True, methods=['get'])
     def last_5_cycles(self, request, pk=None):
@@ -130,6 +168,25 @@ class CycleViewSet(viewsets.ModelViewSet):
         serializer = self.get_serializer(cycle)
         return Response(serializer.data.get('last_5_cycles'))
 
+    @action(detail=True, methods=["post"], url_path="copy-to")
+    def copy_to(self, request, pk=None):
+        """
+        Copy this cycle's records into many cycles at once (a list, a month range or a whole
+        period) with a single INSERT ... SELECT.
+        """
+        source = Cycle.objects.filter(period__user=request.user, pk=pk).only("id", "period_id").first()
+        if source is None:
+            raise NotFound("Cycle not found.")
+        serializer = CycleFanOutSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            copied = copy_records(
+                {"cycle": source, "user": request.user}, serializer.target_cycles(source), **serializer.copy_options()
+            )
+            bump_data_version(request.user.pk)
+        return Response(copy_result(copied), status=status.HTTP_201_CREATED)
+
 # Category Management
 class CategoryViewSet(
     mixins.ListModelMixin,
@@ -177,11 +234,22 @@ class CategoryViewSet(
             },
         )
 
-        # Reassign financial records linked to the category being deleted
-        instance.financial_records.update(category=default_category)
+        # Records of archived periods are frozen, so their categories can't be reassigned
+        check_writable(records=instance.financial_records.all())
+        check_writable(records=instance.archived_records.all())
+
+        with transaction.atomic():
+            # Reassign financial records linked to the category being deleted
+            moved = instance.financial_records.summary_deltas()
+            instance.financial_records.update(category=default_category)
+            FinancialSummary.objects.apply_deltas(
+                added={(cycle_id, default_category.pk): delta for (cycle_id, _), delta in moved.items()},
+                removed=moved,
+            )
+            bump_data_version(instance.user_id)
 
-        # Proceed to delete the category
-        instance.delete()
+            # Proceed to delete the category
+            instance.delete()
 
 
 # Period Management
@@ -196,19 +264,34 @@ class PeriodViewSet(viewsets.ModelViewSet):
     filterset_fields = ['is_archived']
 
     def get_queryset(self):
+        # Totals for the page's periods and their cycles are batched by PeriodSerializer
         queryset = super().get_queryset().filter(user=self.request.user)
+        if "cycles" in self.get_serializer().fields:
+            queryset = queryset.prefetch_related(Prefetch("cycles", queryset=Cycle.objects.order_by("month")))
         categories = self.request.query_params.getlist('category')
         periods = self.request.query_params.getlist('period')
 
         if categories:
-            # Filter by categories in related financial records
-            queryset = queryset.filter(cycles__financial_records__category__id__in=categories).distinct()
+            # Filter by categories in related financial records. A subquery keeps the
+            # annotated totals covering every record instead of only the matching ones.
+            queryset = queryset.filter(
+                Q(id__in=FinancialRecord.objects.filter(category__id__in=categories).values("period_id"))
+                | Q(id__in=ArchivedFinancialRecord.objects.filter(category__id__in=categories).values("period_id"))
+            )
         if periods:
             # Filter by specific periods
             queryset = queryset.filter(id__in=periods)
 
         return queryset
 
+    @conditional_on_data_version
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_on_data_version
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
     def create(self, request, *args, **kwargs):
         """
         Override the create method to handle cycle creation.
@@ -229,43 +312,270 @@ class PeriodViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(period)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
-        
+
+    def perform_update(self, serializer):
+        # Archiving freezes the period's summaries and records; unarchiving thaws them
+        with transaction.atomic():
+            was_archived = serializer.instance.is_archived
+            period = serializer.save()
+            if period.is_archived and not was_archived:
+                period.archive()
+            elif was_archived and not period.is_archived:
+                period.unarchive()
+
+    @action(detail=True, methods=["post"])
+    def clone(self, request, pk=None):
+        """
+        Create the next year's period (or "title") with its cycles, copying every record of this
+        period into the same month with its planned amount.
+        """
+        period = Period.objects.filter(user=request.user, pk=pk).first()
+        if period is None:
+            raise NotFound("Period not found.")
+        payload = PeriodCloneSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        title = payload.validated_data.get("title")
+        if title is None:
+            if not period.title.isdigit():
+                return Response({"error": "Year (title) is required."}, status=status.HTTP_400_BAD_REQUEST)
+            title = str(int(period.title) + 1)
+
+        if Period.objects.filter(user=request.user, title=title).exists():
+            return Response({"error": "Period for this year already exists."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            new_period, copied = period.clone(title)
+            bump_data_version(request.user.pk)
+        return Response(
+            {"period": self.get_serializer(new_period).data, "copied": copied}, status=status.HTTP_201_CREATED
+        )
+
+
 class FinancialRecordViewSet(viewsets.ModelViewSet):
     serializer_class = FinancialRecordSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = RecordCursorPagination
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
 
     def get_queryset(self):
         """
         Override to filter records by cycle, period, and optionally by category.
         """
-        queryset = FinancialRecord.objects.filter(category__user=self.request.user)
-        cycle_id = self.request.query_params.get("cycle")
-        period_id = self.request.query_params.get("period")
-        category_id = self.request.query_params.get("category")
-
-        if cycle_id:
-            queryset = queryset.filter(cycle_id=cycle_id)
-        if period_id:
-            queryset = queryset.filter(cycle__period_id=period_id)  # Filtering via related Cycle's Period
-        if category_id:
-            queryset = queryset.filter(category_id=category_id)
-
+        return self.user_records(FinancialRecord)
+
+    def user_records(self, model):
+        """The user's records in the table of `model`, narrowed by the request's filters."""
+        queryset = model.objects.filter(user=self.request.user)
+        if {"category_name", "category_code"} & set(self.get_serializer().fields):
+            queryset = queryset.select_related("category")
+        return self.filter_records(queryset, self.request.query_params)
+
+    record_filters = {"cycle": "cycle_id", "period": "period_id", "category": "category_id", "type_choice": "type_choice"}
+
+    def filter_records(self, queryset, filters):
+        """Narrow `queryset` by the cycle, period, category and type_choice present in `filters`."""
+        for name, lookup in self.record_filters.items():
+            value = filters.get(name)
+            if value:
+                queryset = queryset.filter(**{lookup: value})
         return queryset
 
+    def list(self, request, *args, **kwargs):
+        # Records moved to the archive table with their frozen period are listed with the others;
+        # one probe spares every page's seeks on that table when there are none
+        sources = [self.filter_queryset(self.get_queryset())]
+        archived = self.filter_queryset(self.user_records(ArchivedFinancialRecord))
+        if archived.exists():
+            sources.append(archived)
+        if wants_stream(request):
+            records = iter_financial_records(*sources)
+            fields = list(self.get_serializer().fields)
+            return ndjson_response({name: record[name] for name in fields} for record in records)
+        page = self.paginate_queryset(sources)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            # Archived records are read-only, so only reads fall back to the archive table
+            record = get_object_or_404(self.user_records(ArchivedFinancialRecord), pk=kwargs["pk"])
+            return Response(self.get_serializer(record).data)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        """Download the user's records, narrowed by the usual list filters, as a streamed CSV file."""
+        records, archived = (
+            self.filter_records(model.objects.filter(user=request.user), request.query_params)
+            for model in (FinancialRecord, ArchivedFinancialRecord)
+        )
+        return csv_response(iter_financial_records_csv(records, archived), "financial-records.csv")
+
     def perform_create(self, serializer):
         category = serializer.validated_data.get("category")
         cycle = serializer.validated_data.get("cycle")
 
         # Ensure the category belongs to the authenticated user
-        if category.user != self.request.user:
+        if category.user_id != self.request.user.pk:
             raise PermissionDenied("You cannot create a record with a category that does not belong to you.")
 
         # Validate cycle and period consistency
-        if cycle.period.user != self.request.user:
+        if cycle.period.user_id != self.request.user.pk:
             raise PermissionDenied("The selected cycle's period does not belong to you.")
 
         # Save the financial record
-        serializer.save()
+        serializer.save(user=self.request.user)
+
+    @action(detail=False, methods=["post"], url_path="batch")
+    def batch_create(self, request):
+        """
+        Create many records at once. Cycles and categories are resolved for the whole batch with
+        one query each, scoped to the user, and the records are inserted with bulk_create in one
+        transaction. Errors are reported per item index; with "skip_invalid" the valid records
+        are still created.
+        """
+        batch = FinancialRecordBatchSerializer(data=request.data)
+        batch.is_valid(raise_exception=True)
+        skip_invalid = batch.validated_data["skip_invalid"]
+
+        item_serializer = FinancialRecordBatchItemSerializer()
+        items, errors = [], []
+        for index, item in enumerate(batch.validated_data["records"]):
+            try:
+                items.append((index, item_serializer.run_validation(item)))
+            except ValidationError as e:
+                errors.append({"index": index, "errors": e.detail})
+
+        user = request.user
+        cycles = Cycle.objects.filter(period__user=user).only("id", "period").in_bulk(
+            {data["cycle"] for _, data in items}
+        )
+        categories = Category.objects.filter(user=user).only("id", "user", "name", "code").in_bulk(
+            {data["category"] for _, data in items}
+        )
+        # Items into archived periods fail on their own instead of failing the whole insert
+        frozen = set(PeriodSnapshot.objects.filter(
+            period_id__in={cycle.period_id for cycle in cycles.values()}
+        ).values_list("period_id", flat=True))
+
+        records = []
+        for index, data in items:
+            cycle = cycles.get(data.pop("cycle"))
+            category = categories.get(data.pop("category"))
+            period_id = data.pop("period", None)
+            item_errors = {}
+            if cycle is None:
+                item_errors["cycle"] = ["Cycle not found."]
+            elif period_id is not None and period_id != cycle.period_id:
+                item_errors["period"] = ["The period must be the period of the selected cycle."]
+            elif cycle.period_id in frozen:
+                item_errors["cycle"] = [FrozenPeriodError.default_message]
+            if category is None:
+                item_errors["category"] = ["Category not found."]
+            if item_errors:
+                errors.append({"index": index, "errors": item_errors})
+                continue
+            records.append(FinancialRecord(user=user, cycle=cycle, category=category, **data))
+
+        errors.sort(key=lambda error: error["index"])
+        if errors and not skip_invalid:
+            return Response({"errors": errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            FinancialRecord.objects.bulk_create(records, batch_size=1000)
+            FinancialSummary.objects.add_records(records)
+            bump_data_version(user.pk)
+
+        return Response(
+            {"created": FinancialRecordSerializer(records, many=True).data, "errors": errors},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(detail=False, methods=["post"], url_path="bulk-delete")
+    def bulk_delete(self, request):
+        """Delete every record of the user matching the cycle/period/category/type_choice filters in one statement."""
+        filters = FinancialRecordFilterSerializer(data=request.data)
+        filters.is_valid(raise_exception=True)
+        records = self.filter_records(FinancialRecord.objects.filter(user=request.user), filters.validated_data)
+        with transaction.atomic():
+            deleted = records.bulk_delete()
+            bump_data_version(request.user.pk)
+        return Response({"deleted": deleted})
+
+    @action(detail=False, methods=["post"], url_path="bulk-update")
+    def bulk_update(self, request):
+        """
+        Update many records of the user with a single UPDATE, either from a list of {id, fields}
+        or by assigning the same fields to every record matching a filter.
+        """
+        payload = FinancialRecordBulkUpdateSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        records = FinancialRecord.objects.filter(user=request.user)
+
+        with transaction.atomic():
+            if "updates" in payload.validated_data:
+                updates = payload.validated_data["updates"]
+                columns = self.resolve_changes([update["fields"] for update in updates])
+                updated = records.bulk_assign_each(
+                    {update["id"]: values for update, values in zip(updates, columns)}
+                )
+            else:
+                [values] = self.resolve_changes([payload.validated_data["fields"]])
+                updated = self.filter_records(records, payload.validated_data["filter"]).bulk_assign(values)
+            bump_data_version(request.user.pk)
+        return Response({"updated": updated})
+
+    def resolve_changes(self, changes):
+        """
+        Turn validated field assignments into column values, resolving the cycles (with their
+        periods) and categories they name with one query each, scoped to the user.
+        """
+        user = self.request.user
+        cycle_periods = dict(Cycle.objects.filter(
+            period__user=user, pk__in={values["cycle"] for values in changes if "cycle" in values}
+        ).values_list("id", "period_id"))
+        category_ids = set(Category.objects.filter(
+            user=user, pk__in={values["category"] for values in changes if "category" in values}
+        ).values_list("id", flat=True))
+
+        columns = []
+        for values in changes:
+            values = dict(values)
+            if "cycle" in values:
+                cycle_id = values.pop("cycle")
+                if cycle_id not in cycle_periods:
+                    raise ValidationError({"cycle": [f"Cycle {cycle_id} not found."]})
+                values.update(cycle_id=cycle_id, period_id=cycle_periods[cycle_id])
+            if "category" in values:
+                category_id = values.pop("category")
+                if category_id not in category_ids:
+                    raise ValidationError({"category": [f"Category {category_id} not found."]})
+                values["category_id"] = category_id
+            columns.append(values)
+        return columns
+
+    @action(detail=False, methods=["post"], url_path="import", parser_classes=[MultiPartParser, FormParser])
+    def import_statement(self, request):
+        """
+        Import a CSV or OFX bank statement. Rows are streamed from the upload, mapped to the
+        cycle of their date and categorized by the given rules, and inserted in fixed-size chunks.
+        """
+        upload = StatementImportSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        data = upload.validated_data
+        statement = data["file"]
+        rows = read_statement(
+            statement.file, data.get("format") or statement_format(statement.name), data["date_format"],
+            data["decimal_separator"],
+        )
+        try:
+            result = import_statement(request.user, rows, rules=data["rules"])
+        except StatementError as e:
+            raise ValidationError({"file": [str(e)]})
+        return Response(
+            {"rows": result.rows, "created": result.created, "skipped": result.skipped, "errors": result.errors},
+            status=status.HTTP_201_CREATED,
+        )
 
     @action(detail=True, methods=["post"], url_path="upload-file")
     def upload_file(self, request, pk=None):
@@ -312,61 +622,37 @@ class FinancialRecordViewSet(viewsets.ModelViewSet):
         
     @action(detail=False, methods=["post"], url_path="copy-previous-month")
     def copy_previous_month(self, request):
-        user = request.user
-        current_cycle_id = request.data.get("current_cycle_id")
-        previous_cycle_id = request.data.get("previous_cycle_id")
+        """Copy the user's records of a cycle into another one, keeping their amounts by default."""
+        serializer = CopyPreviousMonthSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
-        if not current_cycle_id or not previous_cycle_id:
-            return Response({"detail": "Current and previous cycle IDs are required."}, status=400)
+        with transaction.atomic():
+            copied = copy_records(
+                {"cycle": data["previous_cycle_id"], "user": request.user}, data["current_cycle_id"],
+                values={"firebase_uid": data["firebase_uid"]}, **serializer.copy_options(),
+            )
+            bump_data_version(request.user.pk)
+        return Response({"detail": "Records copied successfully.", **copy_result(copied)})
+
+
+def copy_result(copied):
+    """The response body of a record copy: the number of records created, plus their ids if requested."""
+    if isinstance(copied, list):
+        return {"copied": len(copied), "ids": copied}
+    return {"copied": copied}
 
-        try:
-            with transaction.atomic():
-                previous_records = FinancialRecord.objects.filter(
-                    cycle_id=previous_cycle_id, cycle__user=user
-                )
-                new_records = []
-                for record in previous_records:
-                    new_records.append(FinancialRecord(
-                        cycle_id=current_cycle_id,
-                        category=record.category,
-                        period=record.period,
-                        type_choice=record.type_choice,
-                        current_amount=record.current_amount,
-                        planned_amount=record.planned_amount,
-                        firebase_uid=request.data.get("firebase_uid"),
-                        date=None  # Reset date for copied records
-                    ))
-                FinancialRecord.objects.bulk_create(new_records)
-                return Response({"detail": "Records copied successfully."})
-        except Exception as e:
-            return Response({"detail": str(e)}, status=500)
-        
 
 class PeriodSummaryView(APIView):
+    @conditional_on_data_version
     def get(self, request, *args, **kwargs):
         try:
             period_id = kwargs.get('period_id')
-            period = Period.objects.get(id=period_id)
-
-            # Perform calculations
-            total_incomes = Decimal(period.calculate_total_incomes() or 0)
-            total_expenses = Decimal(period.calculate_total_expenses() or 0)
-            net_income = total_incomes - total_expenses
-
-            planned_total_incomes = Decimal(period.planned_calculate_total_incomes() or 0)
-            planned_total_expenses = Decimal(period.planned_calculate_total_expenses() or 0)
-            planned_net_income = planned_total_incomes - planned_total_expenses
-
-            # Prepare data
-            data = {
-                "period": period.title,
-                "total_incomes": total_incomes,
-                "total_expenses": total_expenses,
-                "net_income": net_income,
-                "planned_total_incomes": planned_total_incomes,
-                "planned_total_expenses": planned_total_expenses,
-                "planned_net_income": planned_net_income,
-            }
+            period = Period.objects.get(id=period_id, user=request.user)
+            data = cached_summary(
+                request.user.pk, "period-summary", period.pk, lambda: self.build_summary(period),
+                request_data_state(request)[0],
+            )
 
             serializer = PeriodSummarySerializer(data=data)
             serializer.is_valid(raise_exception=True)
@@ -378,111 +664,78 @@ class PeriodSummaryView(APIView):
             print(f"Error fetching period summary: {e}")
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    def build_summary(self, period):
+        # Read the period's rolled-up totals
+        totals = FinancialSummary.objects.period_totals(period)
+        return {
+            "period": period.title,
+            "total_incomes": totals.total_incomes,
+            "total_expenses": totals.total_expenses,
+            "net_income": totals.net_income,
+            "planned_total_incomes": totals.planned_total_incomes,
+            "planned_total_expenses": totals.planned_total_expenses,
+            "planned_net_income": totals.planned_net_income,
+        }
+
 
 class ReportDataView(APIView):
     """
     Provides aggregated report data for the authenticated user.
     """
     permission_classes = [IsAuthenticated]  # Ensure the user is authenticated
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, NDJSONRenderer]
 
+    @conditional_on_data_version
     def get(self, request, *args, **kwargs):
         user = request.user
+        if wants_stream(request):
+            return ndjson_response(iter_report_lines(user))
+        return Response(cached_summary(user.pk, "report", "all", lambda: build_report(user), request_data_state(request)[0]))
 
-        # Aggregate period data
-        periods = Period.objects.filter(user=user)
-        period_data = []
-        for period in periods:
-            period_data.append({
-                "title": period.title,
-                "total_incomes": period.calculate_total_incomes(),
-                "total_expenses": period.calculate_total_expenses(),
-                "net_income": period.calculate_net_income(),
-                "planned_incomes": period.planned_calculate_total_incomes(),
-                "planned_expenses": period.planned_calculate_total_expenses(),
-                "planned_net_income": period.planned_calculate_net_income(),
-                "expense_difference_value": period.expense_difference_value(),
-                "expense_difference_percentage": period.expense_difference_percentage(),
-                "income_difference_value": period.income_difference_value(),
-                "income_difference_percentage": period.income_difference_percentage(),
-                "net_income_difference_value": period.net_income_difference_value(),
-                "net_income_difference_percentage": period.net_income_difference_percentage(),
-            })
-
-        # Aggregate cycle data
-        cycles = Cycle.objects.filter(period__user=user)
-        cycle_data = []
-        for cycle in cycles:
-            # Fetch associated categories for this cycle
-            categories = FinancialRecord.objects.filter(cycle=cycle).values(
-                'category__name'
-            ).annotate(
-                total_income=Sum('current_amount', filter=Q(type_choice="income")),
-                total_expense=Sum('current_amount', filter=Q(type_choice="expenses"))
+
+class AccountBackupView(APIView):
+    """
+    GET streams a gzip-compressed NDJSON backup of the user's account; POST restores one
+    (multipart "file", optional "remap_ids") into it.
+    """
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get(self, request, *args, **kwargs):
+        response = StreamingHttpResponse(gzip_stream(iter_backup_lines(request.user)), content_type="application/gzip")
+        response["Content-Disposition"] = 'attachment; filename="gradia-backup.ndjson.gz"'
+        return response
+
+    def post(self, request, *args, **kwargs):
+        upload = BackupRestoreSerializer(data=request.data)
+        upload.is_valid(raise_exception=True)
+        try:
+            counts = restore_backup(
+                request.user, read_backup(upload.validated_data["file"].file),
+                remap_ids=upload.validated_data["remap_ids"],
             )
+        except BackupError as e:
+            raise ValidationError({"file": [str(e)]})
+        return Response(counts, status=status.HTTP_201_CREATED)
 
-            cycle_data.append({
-                "id": cycle.id,
-                "name": cycle.name,
-                "period_title": cycle.period.title,
-                "total_incomes": cycle.calculate_total_incomes(),
-                "total_expenses": cycle.calculate_total_expenses(),
-                "net_income": cycle.calculate_net_income(),
-                "planned_incomes": cycle.planned_calculate_total_incomes(),
-                "planned_expenses": cycle.planned_calculate_total_expenses(),
-                "planned_net_income": cycle.planned_calculate_net_income(),
-                "income_difference_value": cycle.income_difference_value(),
-                "income_difference_percentage": cycle.income_difference_percentage(),
-                "expense_difference_value": cycle.expense_difference_value(),
-                "expense_difference_percentage": cycle.expense_difference_percentage(),
-                "net_income_difference_value": cycle.net_income_difference_value(),
-                "net_income_difference_percentage": cycle.net_income_difference_percentage(),
-                "categories": list(categories),  # Include category data
-            })
-
-        # Aggregate category data
-        category_data = Category.objects.filter(user=user).annotate(
-            total_income=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice="income")),
-            total_expense=Sum("financial_records__current_amount", filter=Q(financial_records__type_choice="expenses"))
-        ).values("name", "code", "total_income", "total_expense")
-
-        return Response({
-            "period_data": period_data,
-            "cycle_data": cycle_data,
-            "category_data": list(category_data),
-        })
 
 class CopyFinancialRecordsView(APIView):
     """API endpoint to copy financial records from one cycle to another."""
     
     def post(self, request, *args, **kwargs):
-        serializer = CopyFinancialRecordsSerializer(data=request.data)
+        serializer = CopyFinancialRecordsSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
         current_cycle = serializer.validated_data['current_cycle_id']
         previous_cycle = serializer.validated_data['previous_cycle_id']
 
-        # Fetch financial records from the previous cycle
-        previous_records = FinancialRecord.objects.filter(cycle=previous_cycle)
-        if not previous_records.exists():
-            return Response({"detail": "No financial records found in the previous cycle."}, status=status.HTTP_404_NOT_FOUND)
-
-        # Create copies of financial records for the current cycle
-        new_records = []
-        for record in previous_records:
-            new_record = FinancialRecord(
-                cycle=current_cycle,
-                period=record.period,
-                category=record.category,
-                type_choice=record.type_choice,
-                planned_amount=record.planned_amount,
-                current_amount=0,  # Reset the current amount for the new cycle
-            )
-            new_records.append(new_record)
-
-        # Bulk create the new financial records in an atomic transaction
+        # Copy the previous cycle's records inside the database; by default the current amounts
+        # are reset for the new cycle and the planned amounts kept
         with transaction.atomic():
-            FinancialRecord.objects.bulk_create(new_records)
+            copied = copy_records(
+                {"cycle": previous_cycle, "user": request.user}, current_cycle, **serializer.copy_options()
+            )
+            if not copied:
+                return Response({"detail": "No financial records found in the previous cycle."}, status=status.HTTP_404_NOT_FOUND)
+            bump_data_version(request.user.pk)
 
-        # Serialize the new records to return as response
-        new_records_serialized = FinancialRecordSerializer(new_records, many=True)
-        return Response(new_records_serialized.data, status=status.HTTP_201_CREATED)
\ No newline at end of file
+        return Response(copy_result(copied), status=status.HTTP_201_CREATED)
\ No newline at end of file
@@ -3,6 +3,17 @@ ASGI config for gradiafinance project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serving through uvicorn runs the async endpoints under /finance/async/ (report data, period
+summary, cycle list) natively, computing independent report sections concurrently:
+
+    uvicorn gradiafinance.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+The synchronous DRF endpoints keep working under this server as well.
+
+With several workers, ETags stay consistent because the per-user data versions they are built
+from live in the database (finance.DataVersion). Summary entries are cached per worker by
+default; point SUMMARY_CACHE_DIR at a directory all workers share to compute them once.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
 """
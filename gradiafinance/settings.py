@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'django_extensions',
     'rest_framework',
+    'rest_framework.authtoken',
     'finance',
     'corsheaders',
      "storages",
@@ -112,6 +113,33 @@ DATABASES = {
 }
 
 
+# Caches
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# Summary entries are keyed by each user's data version, which is kept in the database and
+# bumped on every write (by any process, management commands included), so stale entries are
+# never served and simply age out through TIMEOUT/MAX_ENTRIES. Local memory is per process, so
+# each worker computes its own entries; set SUMMARY_CACHE_DIR to share them between the workers
+# of a host through the file backend.
+
+SUMMARY_CACHE_DIR = os.getenv("SUMMARY_CACHE_DIR")
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'summaries': {
+        'BACKEND': (
+            'django.core.cache.backends.filebased.FileBasedCache'
+            if SUMMARY_CACHE_DIR else 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': SUMMARY_CACHE_DIR or 'summaries',
+        'TIMEOUT': int(os.getenv("SUMMARY_CACHE_TIMEOUT", 3600)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv("SUMMARY_CACHE_MAX_ENTRIES", 10000)),
+        },
+    },
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators